@@ -0,0 +1,210 @@
+"""
+End to end benchmarks of the API on the in-memory Cosmos DB, with Azure AD
+and the blob storage replaced by fixed data, so they run offline.
+
+Run them with `pytest benchmarks`. The latency injected in each Cosmos DB
+call is taken from the BENCHMARK_COSMOS_LATENCY_MS environment variable and
+the size of the data set from BENCHMARK_TIME_ENTRIES.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import jwt
+import pytest
+from faker import Faker
+from flask import Flask
+from flask.testing import FlaskClient
+
+for variable in (
+    'MS_CLIENT_ID',
+    'MS_AUTHORITY',
+    'MS_SECRET',
+    'MS_SCOPE',
+    'MS_ENDPOINT',
+    'USERID',
+    'AZURE_STORAGE_CONNECTION_STRING',
+):
+    os.environ.setdefault(variable, 'benchmark')
+
+fake = Faker()
+Faker.seed(0)
+
+COSMOS_LATENCY_MS = float(os.environ.get('BENCHMARK_COSMOS_LATENCY_MS', 0))
+TIME_ENTRIES_AMOUNT = int(os.environ.get('BENCHMARK_TIME_ENTRIES', 500))
+USERS_AMOUNT = 10
+CUSTOMERS_AMOUNT = 5
+PROJECTS_AMOUNT = 30
+ACTIVITIES_AMOUNT = 15
+
+tenant_id = 'cc925a5d-9644-4a4f-8d99-0bee49aadd05'
+owner_id = fake.uuid4()
+user_ids = [owner_id] + [fake.uuid4() for _ in range(USERS_AMOUNT - 1)]
+customers = [
+    {'id': fake.uuid4(), 'name': fake.company(), 'tenant_id': tenant_id}
+    for _ in range(CUSTOMERS_AMOUNT)
+]
+projects = [
+    {
+        'id': fake.uuid4(),
+        'name': fake.catch_phrase(),
+        'description': fake.paragraph(),
+        'customer_id': customers[index % CUSTOMERS_AMOUNT]['id'],
+        'project_type_id': None,
+        'status': 'active',
+        'technologies': [],
+        'tenant_id': tenant_id,
+    }
+    for index in range(PROJECTS_AMOUNT)
+]
+activities = [
+    {
+        'id': fake.uuid4(),
+        'name': fake.job(),
+        'description': fake.sentence(),
+        'status': 'active',
+        'tenant_id': tenant_id,
+    }
+    for _ in range(ACTIVITIES_AMOUNT)
+]
+
+
+def azure_users() -> list:
+    from utils.azure_users import AzureUser
+
+    return [
+        AzureUser(user_id, fake.name(), fake.email(), [], [])
+        for user_id in user_ids
+    ]
+
+
+def time_entries() -> list:
+    """
+    Entries of 20 minutes every half an hour, going back from now, so they
+    are spread over the range of the current month and the summary
+    """
+    now = datetime.utcnow()
+    result = []
+    for index in range(TIME_ENTRIES_AMOUNT):
+        start_date = now - timedelta(minutes=30 * (index // USERS_AMOUNT + 1))
+        result.append(
+            {
+                'id': fake.uuid4(),
+                'project_id': projects[index % PROJECTS_AMOUNT]['id'],
+                'activity_id': activities[index % ACTIVITIES_AMOUNT]['id'],
+                'description': fake.sentence(),
+                'start_date': start_date.isoformat() + 'Z',
+                'end_date': (start_date + timedelta(minutes=20)).isoformat()
+                + 'Z',
+                'owner_id': user_ids[index % USERS_AMOUNT],
+                'technologies': [],
+                'uri': None,
+                'tenant_id': tenant_id,
+            }
+        )
+    return result
+
+
+@pytest.fixture(scope='session')
+def app() -> Flask:
+    users = azure_users()
+    azure_patches = [
+        patch(
+            'utils.azure_users.AzureConnection.get_msal_client',
+            return_value=Mock(),
+        ),
+        patch(
+            'utils.azure_users.AzureConnection.get_token',
+            return_value='token',
+        ),
+        patch(
+            'utils.azure_users.AzureConnection.users',
+            return_value=users,
+        ),
+        patch(
+            'utils.azure_users.AzureConnection.get_user_emails',
+            side_effect=lambda user_ids: {
+                user.id: user.email for user in users if user.id in user_ids
+            },
+        ),
+        patch(
+            'utils.azure_users.AzureConnection.is_test_user',
+            return_value=False,
+        ),
+        patch(
+            'utils.azure_users.AzureConnection.get_test_user_ids',
+            return_value=[],
+        ),
+    ]
+    for azure_patch in azure_patches:
+        azure_patch.start()
+
+    from commons.data_access_layer.file import FileStream
+
+    file_stream_patch = patch.object(
+        FileStream,
+        'get_file_stream',
+        return_value=json.dumps(activities).encode('utf-8'),
+    )
+    file_stream_patch.start()
+
+    from time_tracker_api import create_app
+
+    app = create_app(
+        'time_tracker_api.config.TestConfig',
+        {
+            'DEBUG': False,
+            'COSMOS_DATABASE_URI': 'memory://',
+            'DATABASE_NAME': 'time-tracker-benchmark',
+            'COSMOS_DATABASE_LATENCY_MS': COSMOS_LATENCY_MS,
+            'REFERENCE_CACHE_ENABLED': True,
+        },
+    )
+    seed_database()
+
+    yield app
+
+    for active_patch in azure_patches + [file_stream_patch]:
+        active_patch.stop()
+
+
+def seed_database():
+    from commons.data_access_layer import cosmos_db
+    from time_tracker_api.customers import customers_model
+    from time_tracker_api.projects import projects_model
+    from time_tracker_api.time_entries import time_entries_model
+
+    for model, items in (
+        (customers_model, customers),
+        (projects_model, projects),
+        (time_entries_model, time_entries()),
+    ):
+        container = cosmos_db.cosmos_helper.create_container_if_not_exists(
+            model.container_definition
+        )
+        for item in items:
+            container.create_item(item)
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    with app.test_client() as c:
+        return c
+
+
+@pytest.fixture(scope='session')
+def valid_header(app: Flask) -> dict:
+    from time_tracker_api.security import get_or_generate_dev_secret_key
+
+    with app.app_context():
+        token = jwt.encode(
+            {
+                'iss': 'https://ioetec.b2clogin.com/%s/v2.0/' % tenant_id,
+                'oid': owner_id,
+                'exp': datetime.utcnow() + timedelta(hours=1),
+                'extension_role': 'time-tracker-admin',
+            },
+            key=get_or_generate_dev_secret_key(),
+        ).decode('UTF-8')
+    return {'Authorization': 'Bearer %s' % token}
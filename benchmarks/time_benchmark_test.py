@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+import pytest
+from dateutil import parser
+
+from utils.time import datetime_str, parse_datetime, str_to_datetime
+
+now = datetime.utcnow()
+values = [
+    datetime_str(now - timedelta(minutes=minutes)) + 'Z'
+    for minutes in range(1000)
+]
+
+
+def dateutil_str_to_datetime(value: str) -> datetime:
+    # utils.time.str_to_datetime before the ISO 8601 fast path
+    from pytz import timezone
+
+    if parser.parse(value).tzinfo is None:
+        return timezone('UTC').localize(parser.parse(value))
+    return parser.parse(value)
+
+
+@pytest.mark.benchmark(group='str_to_datetime')
+def test_parse_dates_with_dateutil(benchmark):
+    result = benchmark(lambda: [dateutil_str_to_datetime(v) for v in values])
+
+    assert len(result) == len(values)
+
+
+@pytest.mark.benchmark(group='str_to_datetime')
+def test_parse_dates_with_the_iso_8601_fast_path(benchmark):
+    result = benchmark(lambda: [parse_datetime(v) for v in values])
+
+    assert result == [dateutil_str_to_datetime(v) for v in values]
+
+
+@pytest.mark.benchmark(group='str_to_datetime')
+def test_parse_dates_seen_before(benchmark):
+    result = benchmark(lambda: [str_to_datetime(v) for v in values])
+
+    assert result == [parse_datetime(v) for v in values]
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from itertools import count
+
+from flask.testing import FlaskClient
+
+from benchmarks.conftest import activities, projects
+
+
+def test_list_time_entries(benchmark, client: FlaskClient, valid_header):
+    response = benchmark(
+        client.get,
+        "/time-entries",
+        headers=valid_header,
+        follow_redirects=True,
+    )
+
+    assert HTTPStatus.OK == response.status_code
+    assert len(response.json) > 0
+
+
+def test_list_time_entries_of_all_users(
+    benchmark, client: FlaskClient, valid_header
+):
+    response = benchmark(
+        client.get,
+        "/time-entries?user_id=*",
+        headers=valid_header,
+        follow_redirects=True,
+    )
+
+    assert HTTPStatus.OK == response.status_code
+    assert len(response.json) > 0
+
+
+def test_list_time_entries_paginated(
+    benchmark, client: FlaskClient, valid_header
+):
+    now = datetime.utcnow()
+    query = "length=50&start_date=%s&end_date=%s" % (
+        (now - timedelta(days=30)).isoformat(),
+        now.isoformat(),
+    )
+
+    response = benchmark(
+        client.get,
+        "/time-entries/paginated?" + query,
+        headers=valid_header,
+        follow_redirects=True,
+    )
+
+    assert HTTPStatus.OK == response.status_code
+    assert response.json['records_total'] > 0
+
+
+def test_latest_time_entry_of_each_project(
+    benchmark, client: FlaskClient, valid_header
+):
+    response = benchmark(
+        client.get,
+        "/time-entries/latest",
+        headers=valid_header,
+        follow_redirects=True,
+    )
+
+    assert HTTPStatus.OK == response.status_code
+    assert len(response.json) > 0
+
+
+def test_summary_of_worked_time(benchmark, client: FlaskClient, valid_header):
+    response = benchmark(
+        client.get,
+        "/time-entries/summary",
+        headers=valid_header,
+        follow_redirects=True,
+    )
+
+    assert HTTPStatus.OK == response.status_code
+
+
+def test_create_time_entry(benchmark, client: FlaskClient, valid_header):
+    # Every entry starts an hour after the previous one, so they never
+    # overlap with each other nor with the entries of the data set
+    start_dates = (
+        datetime(2015, 1, 1) + timedelta(hours=hours) for hours in count()
+    )
+
+    def create_time_entry():
+        start_date = next(start_dates)
+        return client.post(
+            "/time-entries",
+            json={
+                'project_id': projects[0]['id'],
+                'activity_id': activities[0]['id'],
+                'description': 'Benchmark',
+                'start_date': start_date.isoformat() + 'Z',
+                'end_date': (start_date + timedelta(minutes=30)).isoformat()
+                + 'Z',
+            },
+            headers=valid_header,
+            follow_redirects=True,
+        )
+
+    response = benchmark(create_time_entry)
+
+    assert HTTPStatus.CREATED == response.status_code, response.json
@@ -0,0 +1,108 @@
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.time import datetime_str, str_to_datetime
+from utils.worked_time import (
+    DayDateRange,
+    MonthDateRange,
+    WeekDateRange,
+    WorkedTime,
+    summary,
+)
+
+now = datetime.now(timezone.utc)
+
+
+class TimeEntry:
+    def __init__(self, start_date: str, end_date: str = None):
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @property
+    def elapsed_time(self) -> timedelta:
+        return str_to_datetime(self.end_date) - str_to_datetime(
+            self.start_date
+        )
+
+
+# One entry of 45 minutes every 2 hours of the last 40 days, and the running
+# one
+time_entries = [
+    TimeEntry(
+        datetime_str(now - timedelta(hours=hours)),
+        datetime_str(now - timedelta(hours=hours, minutes=-45)),
+    )
+    for hours in range(2, 24 * 40, 2)
+] + [TimeEntry(datetime_str(now - timedelta(minutes=30)))]
+
+
+def baseline_summary(time_entries, time_offset):
+    # utils.worked_time.summary before the time entries were parsed once
+    offset_in_minutes = time_offset if time_offset else 300
+    tz = timezone(timedelta(minutes=-offset_in_minutes))
+
+    for t in time_entries:
+        if t.end_date is None:
+            t.end_date = datetime_str(datetime.now(tz))
+    for t in time_entries:
+        t.start_date = datetime_str(
+            str_to_datetime(t.start_date).astimezone(tz)
+        )
+        t.end_date = datetime_str(str_to_datetime(t.end_date).astimezone(tz))
+
+    def worked_time_in(dr):
+        start, end = dr.start(), dr.end()
+        range_time_entries = []
+        for t in time_entries:
+            te_start = str_to_datetime(t.start_date)
+            te_end = str_to_datetime(t.end_date)
+            if start <= te_start <= end or start <= te_end <= end:
+                range_time_entries.append(deepcopy(t))
+        for t in range_time_entries:
+            if str_to_datetime(t.start_date) < start:
+                t.start_date = datetime_str(start)
+            if end < str_to_datetime(t.end_date):
+                t.end_date = datetime_str(end)
+        return WorkedTime(range_time_entries).summary()
+
+    return {
+        'day': worked_time_in(DayDateRange(tz)),
+        'week': worked_time_in(WeekDateRange(tz)),
+        'month': worked_time_in(MonthDateRange(tz)),
+    }
+
+
+def copy_time_entries():
+    # The summary before parsing once rewrote the dates of the entries
+    return (deepcopy(time_entries), 300), {}
+
+
+def total_seconds(result: dict) -> dict:
+    return {
+        key: worked['hours'] * 3600
+        + worked['minutes'] * 60
+        + worked['seconds']
+        for key, worked in result.items()
+    }
+
+
+@pytest.mark.benchmark(group='worked_time_summary')
+def test_summary_of_worked_time_before_parsing_once(benchmark):
+    result = benchmark.pedantic(
+        baseline_summary, setup=copy_time_entries, rounds=50
+    )
+
+    assert result['month']['hours'] > 0
+
+
+@pytest.mark.benchmark(group='worked_time_summary')
+def test_summary_of_worked_time_from_intervals(benchmark):
+    result = benchmark.pedantic(summary, setup=copy_time_entries, rounds=50)
+
+    expected = baseline_summary(*copy_time_entries()[0])
+    # The running entry ends a bit later on each call
+    assert total_seconds(result) == pytest.approx(
+        total_seconds(expected), abs=1
+    )
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import os
+import time
 
 from flask import json
 from flask_script import Manager
@@ -46,6 +47,64 @@ def gen_postman_collection(filename='timetracker-api-postman-collection.json',
     save_data(parsed_json, filename)
 
 
+@cli_manager.command
+@cli_manager.option('-b', '--from-beginning',
+                    dest='from_beginning',
+                    action='store_true',
+                    help='Replay the whole feed of the containers without a '
+                         'lease. By default they start from now')
+def process_change_feed(from_beginning=False):
+    """ Processes the change feed of the containers until it is stopped """
+    from commons.data_access_layer import change_feed
+
+    processors = change_feed.create_processors(
+        app, start_from_beginning=from_beginning)
+    for processor in processors:
+        processor.start()
+    print("Processing the change feed of %s" %
+          ", ".join(processor.container.id for processor in processors))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for processor in processors:
+            processor.stop()
+
+
+@cli_manager.command
+@cli_manager.option('-f', '--filename',
+                    dest='filename',
+                    help='Path of the slow query log. By default the '
+                         'SLOW_QUERY_LOG_FILE of the configuration')
+@cli_manager.option('-n', '--top',
+                    dest='top',
+                    help='Amount of queries to show. By default 20')
+def summarize_slow_queries(filename=None, top=20):
+    """ Summarizes the slow query log, the most expensive queries first """
+    from commons.data_access_layer.slow_query_log import (
+        read_entries,
+        summarize,
+    )
+
+    filename = filename or app.config.get('SLOW_QUERY_LOG_FILE')
+    summary = summarize(read_entries(filename))
+    if not summary:
+        print("There are no slow queries in %s" % filename)
+        return
+    for query in summary[:int(top)]:
+        print("%s  %d times, %.2f RU (%.2f avg), %.1f ms avg, %.1f ms max" % (
+            query['container_id'], query['count'], query['request_charge'],
+            query['avg_request_charge'], query['avg_duration_ms'],
+            query['max_duration_ms']))
+        print("  %s" % query['query'])
+        print("  parameters: %s" % (", ".join(query['parameters']) or "-"))
+        print("  DAO methods: %s" % (", ".join(query['dao_methods']) or "-"))
+        print("  documents retrieved/returned: %s/%d%s" % (
+            query['retrieved_document_count'], query['item_count'],
+            ", cross partition" if query['cross_partition'] else ""))
+        print()
+
+
 def save_data(data: str, filename: str) -> None:
     """ Save text content to a file """
     if filename:
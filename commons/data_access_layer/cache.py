@@ -0,0 +1,192 @@
+"""
+Read-through cache for the containers that rarely change, like customers or
+projects, which are read on almost every request about time entries.
+
+The entries of a container are cached per tenant. Every write through the
+repository increments the version of its tenant, so the entries cached with
+the previous version are not read again and expire with their TTL. When the
+backend is shared by all the workers, like Redis, a write in any of them is
+seen by the others.
+"""
+import abc
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from flask import Flask
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Marks the entries with a None value, like a missing item
+NOT_FOUND = {'__not_found__': True}
+
+
+class CacheBackend(abc.ABC):
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError  # pragma: no cover
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str, ttl: int):
+        raise NotImplementedError  # pragma: no cover
+
+    @abc.abstractmethod
+    def incr(self, key: str) -> int:
+        """
+        Increment the counter of the key, which never expires
+        """
+        raise NotImplementedError  # pragma: no cover
+
+
+class LocalCacheBackend(CacheBackend):
+    """
+    Cache of the current process, limited to max_entries values. The
+    counters are kept apart, so they are never evicted.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.entries = LRUCache(maxsize=max_entries)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self.counters:
+                return str(self.counters[key])
+        return self.entries.get(key)
+
+    def set(self, key: str, value: str, ttl: int):
+        self.entries.put(key, value, ttl=ttl)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache shared by all the processes, through a client with the interface
+    of redis-py, like redis.Redis
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str):
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=1))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.client.set(key, value, ex=ttl)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+
+
+class CacheScope:
+    """
+    Entries of a container and tenant, with the version read when the
+    scope was opened
+    """
+
+    def __init__(self, cache, prefix: str, version: str):
+        self.cache = cache
+        self.prefix = prefix
+        self.version = version
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        :param key: JSON serializable value that identifies the entry
+        :param load: reads the value from the database on a miss
+        """
+        entry_key = '{}:{}:{}'.format(self.prefix, self.version, digest(key))
+        value = self.cache.backend_call('get', entry_key)
+        if value is not None:
+            value = json.loads(value)
+            return None if value == NOT_FOUND else value
+
+        value = load()
+        serialized_value = json.dumps(NOT_FOUND if value is None else value)
+        if len(serialized_value) <= self.cache.max_entry_bytes:
+            self.cache.backend_call(
+                'set', entry_key, serialized_value, self.cache.ttl
+            )
+        return value
+
+
+class RepositoryCache:
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: int = 300,
+        max_entry_bytes: int = 1024 * 1024,
+    ):
+        """
+        :param ttl: seconds that the entries are kept
+        :param max_entry_bytes: values bigger than this, once serialized,
+        are not cached
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+
+    def scope(self, container_id: str, tenant_id: str) -> CacheScope:
+        prefix = 'time-tracker:{}:{}'.format(container_id, tenant_id)
+        version = self.backend_call('get', prefix + ':version') or '0'
+        return CacheScope(self, prefix, version)
+
+    def invalidate(self, container_id: str, tenant_id: str):
+        prefix = 'time-tracker:{}:{}'.format(container_id, tenant_id)
+        self.backend_call('incr', prefix + ':version')
+
+    def backend_call(self, method: str, *args):
+        """
+        A failure of the backend is logged and taken as a miss, so the
+        requests are still served from the database
+        """
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            logger.warning(f"The cache backend failed on {method}: {e}")
+            return None
+
+
+def digest(key: Hashable) -> str:
+    serialized_key = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha1(serialized_key.encode('utf-8')).hexdigest()
+
+
+repository_cache: RepositoryCache = None
+
+
+def init_app(app: Flask) -> None:
+    global repository_cache
+    if not app.config.get('REFERENCE_CACHE_ENABLED', False):
+        repository_cache = None
+        return
+
+    redis_url = app.config.get('REFERENCE_CACHE_REDIS_URL')
+    if redis_url:
+        backend = RedisCacheBackend.from_url(redis_url)
+    else:
+        backend = LocalCacheBackend(
+            max_entries=app.config.get('REFERENCE_CACHE_MAX_ENTRIES', 1024)
+        )
+    repository_cache = RepositoryCache(
+        backend,
+        ttl=app.config.get('REFERENCE_CACHE_TTL_SECONDS', 300),
+        max_entry_bytes=app.config.get(
+            'REFERENCE_CACHE_MAX_ENTRY_BYTES', 1024 * 1024
+        ),
+    )
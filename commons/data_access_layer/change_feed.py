@@ -0,0 +1,334 @@
+"""
+Processor of the change feed of Cosmos DB containers, to react to the writes
+done by any process: other API workers, the functions or the migrations.
+
+The processor polls the feed of each partition key range and passes every
+page of changed items to its handlers. The continuation of each range is
+saved in a lease store after the handlers succeed, so a restarted processor
+with the same name goes on where it stopped and a page whose handlers failed
+is read again.
+Handlers must therefore tolerate seeing an item more than once. Without a
+lease, a processor starts from the end of the feed unless it is asked to
+replay it from the beginning.
+"""
+import abc
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import azure.cosmos.exceptions as exceptions
+from azure.core.paging import ItemPaged
+from azure.cosmos import ContainerProxy, PartitionKey
+from flask import Flask
+
+from commons.data_access_layer import resilience
+from commons.data_access_layer.resilience import ResilientContainerProxy
+
+# Receives the id of the container and the items that changed
+ChangeFeedHandler = Callable[[str, List[dict]], None]
+
+lease_container_definition = {
+    'id': 'change-feed-lease',
+    'partition_key': PartitionKey(path='/id'),
+}
+
+# Continuation that reads the changes made from now on
+START_FROM_NOW = '*'
+
+
+class LeaseStore(abc.ABC):
+    @abc.abstractmethod
+    def get(self, lease_id: str) -> Optional[str]:
+        raise NotImplementedError  # pragma: no cover
+
+    @abc.abstractmethod
+    def set(self, lease_id: str, continuation: str):
+        raise NotImplementedError  # pragma: no cover
+
+
+class InMemoryLeaseStore(LeaseStore):
+    """
+    Leases of the current process, which are lost after every restart
+    """
+
+    def __init__(self):
+        self.leases = {}
+
+    def get(self, lease_id: str) -> Optional[str]:
+        return self.leases.get(lease_id)
+
+    def set(self, lease_id: str, continuation: str):
+        self.leases[lease_id] = continuation
+
+
+class CosmosDBLeaseStore(LeaseStore):
+    """
+    Leases kept in a container, see lease_container_definition
+    """
+
+    def __init__(self, container: ContainerProxy):
+        self.container = container
+
+    def get(self, lease_id: str) -> Optional[str]:
+        try:
+            return self.container.read_item(lease_id, lease_id)['continuation']
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    def set(self, lease_id: str, continuation: str):
+        self.container.upsert_item(
+            {
+                'id': lease_id,
+                'continuation': continuation,
+                'updated_at': datetime.utcnow().isoformat(),
+            }
+        )
+
+
+def partition_key_range_ids(container: ContainerProxy) -> list:
+    """
+    :return: the ids of the partition key ranges of the container, or
+    [None] to read the feed of the whole container at once
+    """
+    client_connection = getattr(container, 'client_connection', None)
+    if client_connection is None:
+        return [None]
+
+    def read_partition_key_range_ids():
+        partition_key_ranges = client_connection._ReadPartitionKeyRanges(
+            container.container_link
+        )
+        return [
+            partition_key_range['id']
+            for partition_key_range in partition_key_ranges
+        ]
+
+    return resilience.retry_policy.call(read_partition_key_range_ids)
+
+
+class ChangeFeedProcessor:
+    def __init__(
+        self,
+        container: ContainerProxy,
+        lease_store: LeaseStore,
+        name: str,
+        handlers: List[ChangeFeedHandler] = None,
+        max_item_count: int = 100,
+        poll_interval_seconds: float = 5,
+        start_from_beginning: bool = False,
+        logger=None,
+    ):
+        """
+        :param name: identifies the consumer in the lease store. Processors
+        with the same name share the checkpoints, so only one of them
+        should run at a time.
+        :param start_from_beginning: read the whole feed of the ranges
+        without a lease, instead of the changes made from now on
+        """
+        self.container = container
+        self.lease_store = lease_store
+        self.name = name
+        self.handlers = list(handlers) if handlers else []
+        self.max_item_count = max_item_count
+        self.poll_interval_seconds = poll_interval_seconds
+        self.start_from_beginning = start_from_beginning
+        self.logger = logger or logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread = None
+
+    def lease_id(self, partition_key_range_id: str = None) -> str:
+        return '{}.{}.{}'.format(
+            self.name, self.container.id, partition_key_range_id or 'all'
+        )
+
+    def process_once(self) -> int:
+        """
+        Read the pending changes of every partition key range
+        :return: the number of items handled
+        """
+        processed = 0
+        for range_id in partition_key_range_ids(self.container):
+            processed += self.process_range(range_id)
+        return processed
+
+    def process_range(self, partition_key_range_id: str = None) -> int:
+        lease_id = self.lease_id(partition_key_range_id)
+        continuation = self.lease_store.get(lease_id)
+        if continuation is None and not self.start_from_beginning:
+            continuation = self.current_continuation(partition_key_range_id)
+            if continuation is None:
+                continuation = START_FROM_NOW
+            else:
+                self.lease_store.set(lease_id, continuation)
+        pages = self.container.query_items_change_feed(
+            partition_key_range_id=partition_key_range_id,
+            is_start_from_beginning=continuation is None,
+            continuation=continuation,
+            max_item_count=self.max_item_count,
+        ).by_page()
+
+        processed = 0
+        for page in pages:
+            items = list(page)
+            for handler in self.handlers:
+                handler(self.container.id, items)
+            # The continuation of the iterator is None when nothing changed
+            if pages.continuation_token:
+                self.lease_store.set(lease_id, pages.continuation_token)
+            processed += len(items)
+        return processed
+
+    def current_continuation(
+        self, partition_key_range_id: str = None
+    ) -> Optional[str]:
+        """
+        Continuation of the end of the feed, taken from the etag of a read
+        that starts from now
+        """
+        etags = []
+
+        def keep_etag(headers, result):
+            # The SDK calls the hook once before reading, with the headers of
+            # a previous call and the lazy result as arguments
+            if not isinstance(result, ItemPaged) and headers.get('etag'):
+                etags.append(headers['etag'])
+
+        pages = self.container.query_items_change_feed(
+            partition_key_range_id=partition_key_range_id,
+            continuation=START_FROM_NOW,
+            max_item_count=self.max_item_count,
+            response_hook=keep_etag,
+        ).by_page()
+        next(pages, None)
+        return etags[-1] if etags else None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.process_once()
+            except Exception as e:
+                self.logger.warning(
+                    f"The change feed of {self.container.id} failed: {e}"
+                )
+            self._stop_event.wait(self.poll_interval_seconds)
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self.run,
+            name=f'change-feed-{self.container.id}',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class CacheInvalidationHandler:
+    """
+    Discard the cached entries of the tenants of the changed items
+    """
+
+    def __init__(self, repository_cache, partition_key_attribute: str):
+        self.repository_cache = repository_cache
+        self.partition_key_attribute = partition_key_attribute
+
+    def __call__(self, container_id: str, items: List[dict]):
+        tenant_ids = {item.get(self.partition_key_attribute) for item in items}
+        for tenant_id in tenant_ids:
+            self.repository_cache.invalidate(container_id, tenant_id)
+
+
+# Handlers of the change feed of each container, besides the invalidation
+# of the cached repositories
+change_feed_handlers: Dict[str, List[ChangeFeedHandler]] = defaultdict(list)
+
+
+def register_handler(container_id: str, handler: ChangeFeedHandler):
+    change_feed_handlers[container_id].append(handler)
+
+
+processors: List[ChangeFeedProcessor] = []
+
+
+def create_processors(
+    app: Flask, start_from_beginning: bool = False
+) -> List[ChangeFeedProcessor]:
+    """
+    One processor per container with handlers: the registered ones and the
+    invalidation of the repositories that are cached
+    :param start_from_beginning: replay the whole feed of the containers
+    without a lease
+    """
+    from commons.data_access_layer import cosmos_db
+
+    handlers = defaultdict(list)
+    for repository in cosmos_db.repository_registry.all():
+        if repository.cache is not None:
+            handlers[repository.container.id].append(
+                CacheInvalidationHandler(
+                    repository.cache, repository.partition_key_attribute
+                )
+            )
+    for container_id, container_handlers in change_feed_handlers.items():
+        handlers[container_id].extend(container_handlers)
+
+    name = app.config.get('CHANGE_FEED_NAME')
+    lease_container_id = app.config.get('CHANGE_FEED_LEASE_CONTAINER')
+    if lease_container_id:
+        # The leases are found again by the name, which must outlive the
+        # process to go on where it stopped after a restart
+        if not name:
+            raise ValueError(
+                "CHANGE_FEED_NAME is required with CHANGE_FEED_LEASE_CONTAINER"
+            )
+        lease_store = CosmosDBLeaseStore(
+            ResilientContainerProxy(
+                cosmos_db.cosmos_helper.create_container_if_not_exists(
+                    dict(lease_container_definition, id=lease_container_id)
+                )
+            )
+        )
+    else:
+        lease_store = InMemoryLeaseStore()
+        name = name or '{}-{}'.format(socket.gethostname(), os.getpid())
+    return [
+        ChangeFeedProcessor(
+            ResilientContainerProxy(
+                cosmos_db.cosmos_helper.db.get_container_client(container_id)
+            ),
+            lease_store,
+            name,
+            handlers=container_handlers,
+            poll_interval_seconds=app.config.get(
+                'CHANGE_FEED_POLL_INTERVAL_SECONDS', 5
+            ),
+            start_from_beginning=start_from_beginning,
+            logger=app.logger,
+        )
+        for container_id, container_handlers in handlers.items()
+    ]
+
+
+def start(app: Flask) -> None:
+    global processors
+    stop()
+    if app.config.get('CHANGE_FEED_ENABLED', False):
+        processors = create_processors(app)
+        for processor in processors:
+            processor.start()
+
+
+def stop() -> None:
+    global processors
+    for processor in processors:
+        processor.stop()
+    processors = []
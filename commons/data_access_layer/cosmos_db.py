@@ -1,15 +1,45 @@
+import base64
+import binascii
 import dataclasses
 import logging
-from typing import Callable
+import threading
+from http import HTTPStatus
+from typing import Callable, Dict, Iterator, List, Tuple
 
 import azure.cosmos.cosmos_client as cosmos_client
+from azure.core import MatchConditions
 import azure.cosmos.exceptions as exceptions
 from azure.cosmos import ContainerProxy, PartitionKey
+from azure.cosmos._retry_options import RetryOptions
 from flask import Flask
 from werkzeug.exceptions import HTTPException
 
+from commons.data_access_layer import cache
+from commons.data_access_layer.cache import CacheScope
 from commons.data_access_layer.database import CRUDDao, EventContext
-from utils.query_builder import CosmosDBQueryBuilder
+from commons.data_access_layer.in_memory_cosmos_db import InMemoryCosmosClient
+from commons.data_access_layer.metrics import (
+    InstrumentedContainerProxy,
+    tag_dao_method,
+)
+from commons.data_access_layer import resilience
+from commons.data_access_layer.resilience import ResilientContainerProxy
+from utils.concurrency import map_concurrently
+from utils.query_builder import CosmosDBQueryBuilder, Order
+
+
+# Database URI of the in-process stand-in of Cosmos DB, for benchmarks and
+# offline development. Its containers live in memory and start empty.
+IN_MEMORY_DATABASE_URI = 'memory://'
+
+
+def no_throttling_retry_options() -> RetryOptions:
+    """
+    The throttled calls are retried by the resilience module, which also
+    adapts the concurrency, instead of by the client. Any call to Cosmos DB
+    must therefore go through it.
+    """
+    return RetryOptions(max_retry_attempt_count=0)
 
 
 class CosmosDBFacade:
@@ -45,9 +75,16 @@ class CosmosDBFacade:
                 {'masterKey': master_key},
                 user_agent="TimeTrackerAPI",
                 user_agent_overwrite=True,
+                retry_options=no_throttling_retry_options(),
+            )
+        elif db_uri == IN_MEMORY_DATABASE_URI:
+            client = InMemoryCosmosClient(
+                latency_ms=app.config.get('COSMOS_DATABASE_LATENCY_MS', 0)
             )
         else:
-            client = cosmos_client.CosmosClient.from_connection_string(db_uri)
+            client = cosmos_client.CosmosClient.from_connection_string(
+                db_uri, retry_options=no_throttling_retry_options()
+            )
 
         db_id = app.config.get('DATABASE_NAME')
         if db_id is None:
@@ -58,17 +95,32 @@ class CosmosDBFacade:
         return cls(client, db_id, logger=app.logger)
 
     def create_container(self, container_definition: dict):
-        return self.db.create_container(**container_definition)
+        return resilience.retry_policy.call(
+            lambda: self.db.create_container(**container_definition)
+        )
 
     def create_container_if_not_exists(self, container_definition: dict):
-        return self.db.create_container_if_not_exists(**container_definition)
+        return resilience.retry_policy.call(
+            lambda: self.db.create_container_if_not_exists(
+                **container_definition
+            )
+        )
 
     def delete_container(self, container_id: str):
-        return self.db.delete_container(container_id)
+        return resilience.retry_policy.call(
+            lambda: self.db.delete_container(container_id)
+        )
 
 
 cosmos_helper: CosmosDBFacade = None
 
+# Hard limit for the pages served through continuation tokens, whatever the
+# client asks for.
+MAX_PAGE_SIZE = 100
+
+# Writes sent at the same time by create_many and upsert_many
+BULK_MAX_CONCURRENCY = 10
+
 
 class CosmosDBModel:
     def __init__(self, data):
@@ -83,6 +135,17 @@ class CosmosDBModel:
         return False
 
 
+@dataclasses.dataclass()
+class BulkOperationResult:
+    status_code: int
+    item: object = None
+    message: str = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status_code < HTTPStatus.BAD_REQUEST
+
+
 def partition_key_attribute(pk: PartitionKey) -> str:
     return pk.path.strip('/')
 
@@ -95,17 +158,30 @@ class CosmosDBRepository:
         mapper: Callable = None,
         order_fields: list = None,
         custom_cosmos_helper: CosmosDBFacade = None,
+        required_fields: list = None,
+        cached: bool = False,
     ):
+        """
+        :param required_fields: attributes that are always read, even when
+        only some fields are selected, because the mapper or the DAO need them
+        :param cached: keep the results of find_all and find_many in the
+        repository cache, when it is enabled. Only for containers that are
+        written through this repository and rarely change.
+        """
         global cosmos_helper
         self.cosmos_helper = custom_cosmos_helper or cosmos_helper
         if self.cosmos_helper is None:  # pragma: no cover
             raise ValueError("The cosmos_db module has not been initialized!")
         self.mapper = mapper
         self.order_fields = order_fields if order_fields else []
-        self.container: ContainerProxy = (
-            self.cosmos_helper.db.get_container_client(container_id)
+        self.container: ContainerProxy = InstrumentedContainerProxy(
+            ResilientContainerProxy(
+                self.cosmos_helper.db.get_container_client(container_id)
+            )
         )
         self.partition_key_attribute = partition_key_attribute
+        self.required_fields = required_fields if required_fields else []
+        self.cache = cache.repository_cache if cached else None
 
     @classmethod
     def from_definition(
@@ -113,6 +189,7 @@ class CosmosDBRepository:
         container_definition: dict,
         mapper: Callable = None,
         custom_cosmos_helper: CosmosDBFacade = None,
+        cached: bool = False,
     ):
         pk_attrib = partition_key_attribute(
             container_definition['partition_key']
@@ -122,7 +199,66 @@ class CosmosDBRepository:
             pk_attrib,
             mapper=mapper,
             custom_cosmos_helper=custom_cosmos_helper,
+            cached=cached,
+        )
+
+    def cache_scope(self, event_context: EventContext) -> CacheScope:
+        """
+        :return: the cached entries of the tenant, None when the repository
+        is not cached
+        """
+        if self.cache is None:
+            return None
+        return self.cache.scope(
+            self.container.id, self.find_partition_key_value(event_context)
+        )
+
+    def query_cached(
+        self,
+        query_builder: CosmosDBQueryBuilder,
+        event_context: EventContext,
+    ) -> list:
+        """
+        :return: the raw items of the query, from the cache when possible
+        """
+        query_str = query_builder.get_query()
+        params = query_builder.get_parameters()
+        partition_key_value = self.find_partition_key_value(event_context)
+
+        def query() -> list:
+            return list(
+                self.container.query_items(
+                    query=query_str,
+                    parameters=params,
+                    partition_key=partition_key_value,
+                )
+            )
+
+        scope = self.cache_scope(event_context)
+        if scope is None:
+            return query()
+        return scope.get_or_load(('query', query_str, params), query)
+
+    def invalidate_cache(self, event_context: EventContext):
+        if self.cache is not None:
+            self.cache.invalidate(
+                self.container.id,
+                self.find_partition_key_value(event_context),
+            )
+
+    def get_select_columns(self, fields: List[str] = None) -> List[str]:
+        """
+        :param fields: attributes requested, None or empty for all of them
+        :return: the columns to select, None for all of them
+        """
+        if not fields:
+            return None
+        names = dict.fromkeys(
+            ['id', self.partition_key_attribute]
+            + self.required_fields
+            + list(fields)
         )
+        return [f"c.{name}" for name in names]
 
     @staticmethod
     def generate_params(conditions: dict) -> list:
@@ -146,6 +282,13 @@ class CosmosDBRepository:
             if isinstance(v, str) and len(v) == 0:
                 item_data[k] = None
 
+    @staticmethod
+    def if_not_modified_options(item_data: dict) -> dict:
+        etag = item_data.get('_etag')
+        if etag is None:
+            return {}
+        return {'etag': etag, 'match_condition': MatchConditions.IfNotModified}
+
     @staticmethod
     def attach_context(data: dict, event_context: EventContext):
         data["_last_event_ctx"] = {
@@ -163,7 +306,67 @@ class CosmosDBRepository:
         self.on_create(data, event_context)
         function_mapper = self.get_mapper_or_dict(mapper)
         self.attach_context(data, event_context)
-        return function_mapper(self.container.create_item(body=data))
+        created_item = self.container.create_item(body=data)
+        self.invalidate_cache(event_context)
+        return function_mapper(created_item)
+
+    def upsert(
+        self, data: dict, event_context: EventContext, mapper: Callable = None
+    ):
+        self.on_create(data, event_context)
+        function_mapper = self.get_mapper_or_dict(mapper)
+        self.attach_context(data, event_context)
+        upserted_item = self.container.upsert_item(body=data)
+        self.invalidate_cache(event_context)
+        return function_mapper(upserted_item)
+
+    def create_many(
+        self,
+        items: List[dict],
+        event_context: EventContext,
+        mapper: Callable = None,
+    ) -> List[BulkOperationResult]:
+        return self.bulk_write(
+            items, event_context, self.create, HTTPStatus.CREATED, mapper
+        )
+
+    def upsert_many(
+        self,
+        items: List[dict],
+        event_context: EventContext,
+        mapper: Callable = None,
+    ) -> List[BulkOperationResult]:
+        return self.bulk_write(
+            items, event_context, self.upsert, HTTPStatus.OK, mapper
+        )
+
+    def bulk_write(
+        self,
+        items: List[dict],
+        event_context: EventContext,
+        write: Callable,
+        success_status: int,
+        mapper: Callable = None,
+    ) -> List[BulkOperationResult]:
+        """
+        Send the writes in parallel, at most BULK_MAX_CONCURRENCY at a time.
+        All of them go to the partition of the event context. A failed item
+        does not stop the others.
+        :return: one result per item, in the same order of the items
+        """
+
+        def write_item(item: dict) -> BulkOperationResult:
+            try:
+                written_item = write(item, event_context, mapper=mapper)
+                return BulkOperationResult(success_status, item=written_item)
+            except CustomError as e:
+                return BulkOperationResult(e.code, message=e.description)
+            except exceptions.CosmosHttpResponseError as e:
+                return BulkOperationResult(e.status_code, message=e.message)
+
+        return map_concurrently(
+            write_item, items, max_workers=BULK_MAX_CONCURRENCY
+        )
 
     def on_create(self, new_item_data: dict, event_context: EventContext):
         if new_item_data.get('id') is None:
@@ -187,6 +390,44 @@ class CosmosDBRepository:
         function_mapper = self.get_mapper_or_dict(mapper)
         return function_mapper(self.check_visibility(found_item, visible_only))
 
+    def find_many(
+        self,
+        ids: List[str],
+        event_context: EventContext,
+        visible_only=True,
+        mapper: Callable = None,
+    ) -> list:
+        """
+        Read the items with the given ids using parallel point reads. The
+        repeated ids are read once and the missing items are left out.
+        :return (list): the items found, in the same order of the ids
+        """
+        unique_ids = list(dict.fromkeys(id for id in ids if id))
+        partition_key_value = self.find_partition_key_value(event_context)
+        scope = self.cache_scope(event_context)
+
+        def read_item(id):
+            try:
+                return self.container.read_item(id, partition_key_value)
+            except exceptions.CosmosResourceNotFoundError:
+                return None
+
+        def read(id):
+            if scope is None:
+                return read_item(id)
+            return scope.get_or_load(('item', id), lambda: read_item(id))
+
+        items = map_concurrently(
+            read, unique_ids, max_workers=BULK_MAX_CONCURRENCY
+        )
+        function_mapper = self.get_mapper_or_dict(mapper)
+        return [
+            function_mapper(item)
+            for item in items
+            if item is not None
+            and not (visible_only and item.get('deleted') is not None)
+        ]
+
     def find_all(
         self,
         event_context: EventContext,
@@ -196,6 +437,7 @@ class CosmosDBRepository:
         max_count=None,
         offset=0,
         mapper: Callable = None,
+        fields: List[str] = None,
     ):
         conditions = conditions if conditions else {}
         max_count: int = self.get_page_size_or(max_count)
@@ -207,33 +449,143 @@ class CosmosDBRepository:
         date_range = date_range if date_range else {}
 
         query_builder = (
-            CosmosDBQueryBuilder()
+            CosmosDBQueryBuilder(parameterize_lists=True)
+            .add_select_conditions(self.get_select_columns(fields))
             .add_sql_where_equal_condition(conditions)
             .add_sql_active_condition(status_value)
             .add_sql_date_range_condition(date_range)
             .add_sql_visibility_condition(visible_only)
             .add_sql_limit_condition(max_count)
             .add_sql_offset_condition(offset)
+        )
+
+        self.add_sql_order_fields_condition(query_builder)
+
+        result = self.query_cached(query_builder.build(), event_context)
+        function_mapper = self.get_mapper_or_dict(mapper)
+        return list(map(function_mapper, result))
+
+    def find_all_by_page(
+        self,
+        event_context: EventContext,
+        conditions: dict = None,
+        date_range: dict = None,
+        visible_only=True,
+        page_size: int = None,
+        continuation_token: str = None,
+        mapper: Callable = None,
+    ) -> Tuple[list, str]:
+        conditions = conditions if conditions else {}
+
+        status_value = conditions.get('status')
+        if status_value:
+            conditions.pop('status')
+
+        query_builder = (
+            CosmosDBQueryBuilder(parameterize_lists=True)
+            .add_sql_where_equal_condition(conditions)
+            .add_sql_active_condition(status_value)
+            .add_sql_date_range_condition(date_range)
+            .add_sql_visibility_condition(visible_only)
+        )
+
+        self.add_sql_order_fields_condition(query_builder)
+
+        return self.query_page(
+            query_builder.build(),
+            event_context,
+            page_size=page_size,
+            continuation_token=continuation_token,
+            mapper=mapper,
+        )
+
+    def iter_all(
+        self,
+        event_context: EventContext,
+        conditions: dict = None,
+        date_range: dict = None,
+        visible_only=True,
+        page_size: int = None,
+        mapper: Callable = None,
+    ) -> Iterator:
+        conditions = conditions if conditions else {}
+
+        status_value = conditions.get('status')
+        if status_value:
+            conditions.pop('status')
+
+        query_builder = (
+            CosmosDBQueryBuilder(parameterize_lists=True)
+            .add_sql_where_equal_condition(conditions)
+            .add_sql_active_condition(status_value)
+            .add_sql_date_range_condition(date_range)
+            .add_sql_visibility_condition(visible_only)
             .build()
         )
 
-        if len(self.order_fields) > 1:
-            attribute = self.order_fields[0]
-            order = self.order_fields[1]
-            query_builder.add_sql_order_by_condition(attribute, order)
+        return self.iter_query(
+            query_builder, event_context, page_size=page_size, mapper=mapper
+        )
 
-        query_str = query_builder.get_query()
-        params = query_builder.get_parameters()
+    def iter_query(
+        self,
+        query_builder: CosmosDBQueryBuilder,
+        event_context: EventContext,
+        page_size: int = None,
+        mapper: Callable = None,
+    ) -> Iterator:
+        """
+        Lazily yield the mapped items of the query, requesting one page at a
+        time to Cosmos, so only a page is held in memory.
+        """
+        page_size = self.get_cursor_page_size(page_size)
+        partition_key_value = self.find_partition_key_value(event_context)
+        function_mapper = self.get_mapper_or_dict(mapper)
+
+        result = self.container.query_items(
+            query=query_builder.get_query(),
+            parameters=query_builder.get_parameters(),
+            partition_key=partition_key_value,
+            max_item_count=page_size,
+        )
+        for page in result.by_page():
+            for item in page:
+                yield function_mapper(item)
+
+    def query_page(
+        self,
+        query_builder: CosmosDBQueryBuilder,
+        event_context: EventContext,
+        page_size: int = None,
+        continuation_token: str = None,
+        mapper: Callable = None,
+    ) -> Tuple[list, str]:
+        """
+        Fetch a single page of the query using the continuation token of the
+        Cosmos query iterator instead of OFFSET/LIMIT, so the cost of a page
+        does not depend on how deep it is.
+        :return: the mapped items of the page and the opaque token of the
+        next one, None when there are no more pages
+        """
+        page_size = self.get_cursor_page_size(page_size)
         partition_key_value = self.find_partition_key_value(event_context)
 
         result = self.container.query_items(
-            query=query_str,
-            parameters=params,
+            query=query_builder.get_query(),
+            parameters=query_builder.get_parameters(),
             partition_key=partition_key_value,
+            max_item_count=page_size,
         )
+        pages = result.by_page(decode_continuation_token(continuation_token))
+
+        try:
+            page = list(next(pages))
+        except StopIteration:
+            page = []
 
         function_mapper = self.get_mapper_or_dict(mapper)
-        return list(map(function_mapper, result))
+        next_token = encode_continuation_token(pages.continuation_token)
+        return list(map(function_mapper, page)), next_token
 
     def partial_update(
         self,
@@ -242,13 +594,21 @@ class CosmosDBRepository:
         event_context: EventContext,
         visible_only=True,
         mapper: Callable = None,
+        current_item: dict = None,
     ):
-        item_data = self.find(
-            id,
-            event_context,
-            visible_only=visible_only,
-            mapper=dict,
-        )
+        """
+        Merge the changes into the stored item and replace it. Pass the raw
+        item as current_item when it was already read to save the round trip.
+        The replace fails if the item changed after it was read.
+        """
+        if current_item is None:
+            current_item = self.find(
+                id,
+                event_context,
+                visible_only=visible_only,
+                mapper=dict,
+            )
+        item_data = dict(current_item)
         item_data.update(changes)
         return self.update(id, item_data, event_context, mapper=mapper)
 
@@ -262,13 +622,18 @@ class CosmosDBRepository:
         self.on_update(item_data, event_context)
         function_mapper = self.get_mapper_or_dict(mapper)
         self.attach_context(item_data, event_context)
-        return function_mapper(self.container.replace_item(id, body=item_data))
+        updated_item = self.container.replace_item(
+            id, body=item_data, **self.if_not_modified_options(item_data)
+        )
+        self.invalidate_cache(event_context)
+        return function_mapper(updated_item)
 
     def delete(
         self,
         id: str,
         event_context: EventContext,
         mapper: Callable = None,
+        current_item: dict = None,
     ):
         return self.partial_update(
             id,
@@ -276,11 +641,13 @@ class CosmosDBRepository:
             event_context,
             visible_only=True,
             mapper=mapper,
+            current_item=current_item,
         )
 
     def delete_permanently(self, id: str, event_context: EventContext) -> None:
         partition_key_value = self.find_partition_key_value(event_context)
         self.container.delete_item(id, partition_key_value)
+        self.invalidate_cache(event_context)
 
     def find_partition_key_value(self, event_context: EventContext):
         return getattr(event_context, self.partition_key_attribute)
@@ -293,14 +660,96 @@ class CosmosDBRepository:
         # or any other repository for the settings
         return custom_page_size or 9999
 
+    def get_cursor_page_size(self, custom_page_size: int) -> int:
+        if not custom_page_size or custom_page_size < 1:
+            return MAX_PAGE_SIZE
+        return min(custom_page_size, MAX_PAGE_SIZE)
+
     def on_update(self, update_item_data: dict, event_context: EventContext):
         pass
 
+    def add_sql_order_fields_condition(
+        self, query_builder: CosmosDBQueryBuilder
+    ) -> CosmosDBQueryBuilder:
+        """
+        Order the query by the first of the order_fields, written as
+        'attribute' or 'attribute DESC'
+        """
+        if self.order_fields:
+            attribute, _, order = self.order_fields[0].partition(' ')
+            query_builder.add_sql_order_by_condition(
+                attribute, Order[order.strip().upper() or Order.ASC.name]
+            )
+        return query_builder
+
     def create_sql_order_clause(self):
         if len(self.order_fields) > 0:
             return "ORDER BY c.{}".format(", c.".join(self.order_fields))
         return ""
 
+    def warm_up(self):
+        """
+        Read the metadata of the container and run a trivial query, so the
+        connection and the routing map are ready for the first request
+        """
+        self.container.read()
+        next(
+            iter(
+                self.container.query_items(
+                    query="SELECT TOP 1 c.id FROM c",
+                    enable_cross_partition_query=True,
+                    max_item_count=1,
+                )
+            ),
+            None,
+        )
+
+
+class RepositoryRegistry:
+    """
+    Keeps one repository per container for the whole process, so the
+    DAO factories reuse the same container proxy instead of building
+    a new one each time they are called.
+    """
+
+    def __init__(self):
+        self._repositories: Dict[str, CosmosDBRepository] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, container_id: str, factory: Callable[[], CosmosDBRepository]
+    ) -> CosmosDBRepository:
+        repository = self._repositories.get(container_id)
+        if repository is None:
+            with self._lock:
+                repository = self._repositories.get(container_id)
+                if repository is None:
+                    repository = factory()
+                    self._repositories[container_id] = repository
+        return repository
+
+    def all(self) -> List[CosmosDBRepository]:
+        with self._lock:
+            return list(self._repositories.values())
+
+    def clear(self):
+        with self._lock:
+            self._repositories = {}
+
+    def warm_up(self, logger=logging):
+        for repository in self.all():
+            container_id = repository.container.id
+            try:
+                repository.warm_up()
+                logger.info(f"Container {container_id} is warmed up")
+            except Exception as e:
+                logger.warning(
+                    f"The warm up of container {container_id} failed: {e}"
+                )
+
+
+repository_registry = RepositoryRegistry()
+
 
 class CosmosDBDao(CRUDDao):
     def __init__(self, repository: CosmosDBRepository):
@@ -317,6 +766,10 @@ class CosmosDBDao(CRUDDao):
         event_ctx = self.create_event_context("read")
         return self.repository.find(id, event_ctx)
 
+    def get_many(self, ids: List[str], **kwargs) -> list:
+        event_ctx = self.create_event_context("read-many")
+        return self.repository.find_many(ids, event_ctx, **kwargs)
+
     def create(self, data: dict):
         event_ctx = self.create_event_context("create")
         return self.repository.create(data, event_ctx)
@@ -329,9 +782,18 @@ class CosmosDBDao(CRUDDao):
         event_ctx = self.create_event_context("delete")
         self.repository.delete(id, event_ctx)
 
+    def create_many(self, data_list: list) -> list:
+        event_ctx = self.create_event_context("create-many")
+        return self.repository.create_many(data_list, event_ctx)
+
+    def upsert_many(self, data_list: list) -> list:
+        event_ctx = self.create_event_context("upsert-many")
+        return self.repository.upsert_many(data_list, event_ctx)
+
     def create_event_context(
         self, action: str = None, description: str = None
     ):
+        tag_dao_method(self)
         return EventContext(
             self.repository.container.id, action, description=description
         )
@@ -346,6 +808,30 @@ class CustomError(HTTPException):
 def init_app(app: Flask) -> None:
     global cosmos_helper
     cosmos_helper = CosmosDBFacade.from_flask_config(app)
+    repository_registry.clear()
+
+
+def warm_up(app: Flask) -> None:
+    if app.config.get('COSMOS_DATABASE_WARM_UP', False):
+        repository_registry.warm_up(app.logger)
+
+
+def encode_continuation_token(token: str) -> str:
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def decode_continuation_token(token: str) -> str:
+    if not token:
+        return None
+    try:
+        return base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8')
+    except (binascii.Error, UnicodeError, ValueError):
+        raise CustomError(
+            HTTPStatus.BAD_REQUEST,
+            description="The continuation token is not valid",
+        )
 
 
 def generate_uuid4() -> str:
@@ -0,0 +1,812 @@
+"""
+In-process stand-in for the Cosmos DB client, to run and benchmark the API
+without a Cosmos DB account or the emulator.
+
+It understands the SQL subset written by CosmosDBQueryBuilder and
+TimeEntryQueryBuilder: projections, VALUE COUNT(1), TOP, WHERE with
+AND/OR/NOT, comparisons, BETWEEN, IN, IS_DEFINED, ARRAY_CONTAINS, ORDER BY
+and OFFSET/LIMIT. Each call can wait a fixed latency and reports a
+simulated request charge in the x-ms-request-charge header.
+"""
+import copy
+import json
+import re
+import threading
+import time
+import uuid
+from typing import Callable, List
+
+from azure.core import MatchConditions
+from azure.core.paging import ItemPaged
+from azure.cosmos import PartitionKey
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+# Rough request charges of Cosmos DB, in request units (RU)
+POINT_READ_CHARGE_PER_KB = 1.0
+WRITE_CHARGE_PER_KB = 5.5
+DELETE_CHARGE = 5.0
+QUERY_BASE_CHARGE = 2.3
+QUERY_CHARGE_PER_SCANNED_DOCUMENT = 0.02
+QUERY_CHARGE_PER_RETURNED_DOCUMENT = 0.3
+
+DEFAULT_QUERY_PAGE_SIZE = 100
+
+
+class _Undefined:
+    def __repr__(self):
+        return 'undefined'
+
+
+# Value of missing attributes, which is different from null
+UNDEFINED = _Undefined()
+
+
+class InMemoryCosmosClient:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def get_database_client(self, database_id: str):
+        with self._lock:
+            if database_id not in self._databases:
+                self._databases[database_id] = InMemoryDatabaseProxy(
+                    database_id, latency_ms=self.latency_ms
+                )
+            return self._databases[database_id]
+
+
+class InMemoryDatabaseProxy:
+    def __init__(self, database_id: str, latency_ms: float = 0.0):
+        self.id = database_id
+        self.latency_ms = latency_ms
+        self._containers = {}
+        self._lock = threading.Lock()
+
+    def get_container_client(self, container_id: str):
+        with self._lock:
+            if container_id not in self._containers:
+                self._containers[container_id] = InMemoryContainerProxy(
+                    container_id, latency_ms=self.latency_ms
+                )
+            return self._containers[container_id]
+
+    def create_container(self, id: str, partition_key: PartitionKey, **kwargs):
+        container = self.get_container_client(id)
+        if container.partition_key is not None:
+            raise CosmosResourceExistsError(
+                status_code=409, message=f"The container {id} already exists"
+            )
+        container.define(partition_key, kwargs.get('unique_key_policy'))
+        return container
+
+    def create_container_if_not_exists(
+        self, id: str, partition_key: PartitionKey, **kwargs
+    ):
+        container = self.get_container_client(id)
+        if container.partition_key is None:
+            container.define(partition_key, kwargs.get('unique_key_policy'))
+        return container
+
+    def delete_container(self, container_id: str):
+        with self._lock:
+            container = self._containers.pop(container_id, None)
+        if container is None or container.partition_key is None:
+            raise CosmosResourceNotFoundError(
+                status_code=404,
+                message=f"The container {container_id} does not exist",
+            )
+
+
+class InMemoryContainerProxy:
+    def __init__(self, container_id: str, latency_ms: float = 0.0):
+        self.id = container_id
+        self.latency_ms = latency_ms
+        self.partition_key = None
+        self.unique_keys = []
+        self._items = {}
+        self._lsn = 0
+        self._lock = threading.Lock()
+
+    def define(self, partition_key: PartitionKey, unique_key_policy=None):
+        self.partition_key = partition_key
+        unique_key_policy = unique_key_policy or {}
+        self.unique_keys = [
+            [path.strip('/') for path in key['paths']]
+            for key in unique_key_policy.get('uniqueKeys', [])
+        ]
+
+    @property
+    def partition_key_attribute(self) -> str:
+        return self.partition_key['paths'][0].strip('/')
+
+    def read(self, **kwargs) -> dict:
+        self._start_call()
+        return {
+            'id': self.id,
+            'partitionKey': {'paths': self.partition_key['paths']},
+        }
+
+    def read_item(self, item, partition_key, response_hook=None, **kwargs):
+        self._start_call()
+        with self._lock:
+            stored_item = self._items.get((partition_key, item))
+            if stored_item is None:
+                raise self._not_found(item)
+            result = copy.deepcopy(stored_item)
+        self._call_hook(
+            response_hook,
+            result,
+            size_charge(result, POINT_READ_CHARGE_PER_KB),
+        )
+        return result
+
+    def create_item(self, body: dict, response_hook=None, **kwargs):
+        self._start_call()
+        with self._lock:
+            key = self._key_of(body)
+            if key in self._items:
+                raise CosmosResourceExistsError(
+                    status_code=409,
+                    message="Entity with the specified id already exists",
+                )
+            result = self._store(key, body)
+        self._call_hook(
+            response_hook, result, size_charge(result, WRITE_CHARGE_PER_KB)
+        )
+        return result
+
+    def upsert_item(self, body: dict, response_hook=None, **kwargs):
+        self._start_call()
+        with self._lock:
+            result = self._store(self._key_of(body), body)
+        self._call_hook(
+            response_hook, result, size_charge(result, WRITE_CHARGE_PER_KB)
+        )
+        return result
+
+    def replace_item(
+        self,
+        item,
+        body: dict,
+        etag: str = None,
+        match_condition: MatchConditions = None,
+        response_hook=None,
+        **kwargs,
+    ):
+        self._start_call()
+        item_id = item['id'] if isinstance(item, dict) else item
+        with self._lock:
+            key = (body.get(self.partition_key_attribute), item_id)
+            stored_item = self._items.get(key)
+            if stored_item is None:
+                raise self._not_found(item_id)
+            if (
+                match_condition == MatchConditions.IfNotModified
+                and stored_item['_etag'] != etag
+            ):
+                raise CosmosAccessConditionFailedError(
+                    status_code=412,
+                    message="The item was modified by another request",
+                )
+            # Like Cosmos DB, an id in the body renames the item
+            new_key = (key[0], body.get('id', item_id))
+            if new_key != key:
+                if new_key in self._items:
+                    raise CosmosResourceExistsError(
+                        status_code=409,
+                        message="Entity with the specified id already exists",
+                    )
+                del self._items[key]
+            try:
+                result = self._store(new_key, dict(body, id=new_key[1]))
+            except CosmosResourceExistsError:
+                self._items[key] = stored_item
+                raise
+        self._call_hook(
+            response_hook, result, size_charge(result, WRITE_CHARGE_PER_KB)
+        )
+        return result
+
+    def delete_item(self, item, partition_key, response_hook=None, **kwargs):
+        self._start_call()
+        item_id = item['id'] if isinstance(item, dict) else item
+        with self._lock:
+            if self._items.pop((partition_key, item_id), None) is None:
+                raise self._not_found(item_id)
+        self._call_hook(response_hook, None, DELETE_CHARGE)
+
+    def query_items(
+        self,
+        query: str,
+        parameters: List[dict] = None,
+        partition_key=None,
+        enable_cross_partition_query: bool = None,
+        max_item_count: int = None,
+        populate_query_metrics: bool = None,
+        response_hook: Callable = None,
+        **kwargs,
+    ) -> ItemPaged:
+        if self.partition_key is None:
+            raise self._not_found(self.id)
+        if partition_key is None and not enable_cross_partition_query:
+            raise ValueError(
+                "Cross partition query is required but disabled. Please set "
+                "enable_cross_partition_query to True, or specify the "
+                "partition key."
+            )
+
+        sql_query = parse_query(query)
+        parameter_values = {p['name']: p['value'] for p in parameters or []}
+        page_size = (
+            max_item_count
+            if max_item_count and max_item_count > 0
+            else DEFAULT_QUERY_PAGE_SIZE
+        )
+        results = None
+
+        def get_next(continuation_token):
+            nonlocal results
+            self._start_call()
+            scanned_count = 0
+            if results is None:
+                # The whole query runs on the first page, which may be one
+                # requested with the token of another query call
+                with self._lock:
+                    items = [
+                        item
+                        for (
+                            item_partition_key,
+                            _,
+                        ), item in self._items.items()
+                        if partition_key is None
+                        or item_partition_key == partition_key
+                    ]
+                    results = sql_query.run(items, parameter_values)
+                scanned_count = len(items)
+            return int(continuation_token or 0), scanned_count
+
+        def extract_data(response):
+            start, scanned_count = response
+            page = copy.deepcopy(results[start : start + page_size])
+            end = start + len(page)
+            next_token = str(end) if end < len(results) else None
+            request_charge = (
+                QUERY_BASE_CHARGE
+                + QUERY_CHARGE_PER_SCANNED_DOCUMENT * scanned_count
+                + QUERY_CHARGE_PER_RETURNED_DOCUMENT * len(page)
+            )
+            query_metrics = (
+                'retrievedDocumentCount=%d;outputDocumentCount=%d'
+                % (scanned_count, len(page))
+                if populate_query_metrics
+                else None
+            )
+            self._call_hook(response_hook, page, request_charge, query_metrics)
+            return next_token, page
+
+        return ItemPaged(get_next, extract_data)
+
+    def query_items_change_feed(
+        self,
+        partition_key_range_id: str = None,
+        is_start_from_beginning: bool = False,
+        continuation: str = None,
+        max_item_count: int = None,
+        response_hook: Callable = None,
+        **kwargs,
+    ) -> ItemPaged:
+        """
+        Latest version of the items written after the continuation, in the
+        order they were written. As in Cosmos DB, the deleted items are not
+        in the feed, the continuation stays the same when there are no
+        changes, a continuation of '*' starts from now and the etag header
+        passed to the response_hook of every read is its continuation.
+        """
+        page_size = max_item_count or DEFAULT_QUERY_PAGE_SIZE
+        with self._lock:
+            start_lsn = self._lsn if not is_start_from_beginning else 0
+        if continuation == '*':
+            continuation = str(start_lsn)
+
+        def get_next(continuation_token):
+            self._start_call()
+            last_lsn = int(continuation_token or continuation or start_lsn)
+            with self._lock:
+                changes = sorted(
+                    (
+                        item
+                        for item in self._items.values()
+                        if item['_lsn'] > last_lsn
+                    ),
+                    key=lambda item: item['_lsn'],
+                )[:page_size]
+                changes = copy.deepcopy(changes)
+            self._call_hook(
+                response_hook,
+                changes,
+                QUERY_BASE_CHARGE
+                + QUERY_CHARGE_PER_RETURNED_DOCUMENT * len(changes),
+                etag=str(changes[-1]['_lsn'] if changes else last_lsn),
+            )
+            if not changes:
+                raise StopIteration
+            return changes
+
+        def extract_data(changes):
+            return str(changes[-1]['_lsn']), changes
+
+        return ItemPaged(get_next, extract_data)
+
+    def _start_call(self):
+        if self.partition_key is None:
+            raise self._not_found(self.id)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    @staticmethod
+    def _call_hook(
+        response_hook: Callable,
+        result,
+        request_charge: float,
+        query_metrics: str = None,
+        etag: str = None,
+    ):
+        if response_hook:
+            item_count = len(result) if isinstance(result, list) else 1
+            headers = {
+                'x-ms-request-charge': '%.2f' % request_charge,
+                'x-ms-item-count': str(item_count),
+            }
+            if query_metrics:
+                headers['x-ms-documentdb-query-metrics'] = query_metrics
+            if etag:
+                headers['etag'] = etag
+            response_hook(headers, result)
+
+    def _key_of(self, body: dict) -> tuple:
+        if not body.get('id'):
+            raise ValueError("The item must have an id")
+        return body.get(self.partition_key_attribute), body['id']
+
+    def _store(self, key: tuple, body: dict) -> dict:
+        self._check_unique_keys(key, body)
+        item = copy.deepcopy(body)
+        item['_etag'] = f'"{uuid.uuid4()}"'
+        item['_ts'] = int(time.time())
+        self._lsn += 1
+        item['_lsn'] = self._lsn
+        self._items[key] = item
+        return copy.deepcopy(item)
+
+    def _check_unique_keys(self, key: tuple, body: dict):
+        partition_key, _ = key
+        for paths in self.unique_keys:
+            values = [body.get(path, UNDEFINED) for path in paths]
+            for (other_partition_key, other_id), other in self._items.items():
+                if (
+                    other_partition_key == partition_key
+                    and (other_partition_key, other_id) != key
+                    and [other.get(path, UNDEFINED) for path in paths]
+                    == values
+                ):
+                    raise CosmosResourceExistsError(
+                        status_code=409,
+                        message="Unique index constraint violation",
+                    )
+
+    @staticmethod
+    def _not_found(id: str):
+        return CosmosResourceNotFoundError(
+            status_code=404, message=f"Entity with the id {id} does not exist"
+        )
+
+
+def size_charge(item: dict, charge_per_kb: float) -> float:
+    size_kb = len(json.dumps(item, default=str)) / 1024
+    return charge_per_kb * max(1.0, size_kb)
+
+
+# SQL subset
+
+TOKEN_REGEX = re.compile(
+    r"""\s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+        |(?P<number>-?\d+(?:\.\d+)?)
+        |(?P<parameter>@\w+)
+        |(?P<name>[A-Za-z_]\w*)
+        |(?P<operator>!=|<>|<=|>=|=|<|>|\(|\)|,|\.|\*)
+    )""",
+    re.VERBOSE,
+)
+
+KEYWORDS = {
+    'SELECT',
+    'TOP',
+    'VALUE',
+    'FROM',
+    'WHERE',
+    'AND',
+    'OR',
+    'NOT',
+    'IN',
+    'BETWEEN',
+    'ORDER',
+    'BY',
+    'ASC',
+    'DESC',
+    'OFFSET',
+    'LIMIT',
+}
+
+
+def tokenize(query: str) -> List[tuple]:
+    tokens = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = TOKEN_REGEX.match(query, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unexpected SQL at: {query[position:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.upper() in KEYWORDS:
+            kind, value = 'keyword', value.upper()
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class SQLQuery:
+    def __init__(self):
+        self.top = None
+        self.count = False
+        self.columns = None
+        self.where = None
+        self.order_by = []
+        self.offset = None
+        self.limit = None
+
+    def run(self, items: list, parameters: dict) -> list:
+        def value_of(expression):
+            return expression(None, parameters) if expression else None
+
+        results = [
+            item
+            for item in items
+            if self.where is None or self.where(item, parameters) is True
+        ]
+
+        if self.count:
+            return [len(results)]
+
+        for path, descending in reversed(self.order_by):
+            results.sort(
+                key=lambda item: sort_key(get_path(item, path)),
+                reverse=descending,
+            )
+
+        offset = value_of(self.offset) or 0
+        limit = value_of(self.limit)
+        top = value_of(self.top)
+        results = results[offset:]
+        if limit is not None:
+            results = results[:limit]
+        if top is not None:
+            results = results[:top]
+
+        if self.columns:
+            return [self.project(item) for item in results]
+        return results
+
+    def project(self, item: dict) -> dict:
+        projection = {}
+        for path in self.columns:
+            value = get_path(item, path)
+            if value is not UNDEFINED:
+                projection[path[-1]] = value
+        return projection
+
+
+class QueryParser:
+    def __init__(self, query: str):
+        self.tokens = tokenize(query)
+        self.position = 0
+
+    def parse(self) -> SQLQuery:
+        sql_query = SQLQuery()
+        self.expect('keyword', 'SELECT')
+        if self.accept('keyword', 'TOP'):
+            sql_query.top = self.parse_operand()
+        if self.accept('keyword', 'VALUE'):
+            self.expect('name', 'COUNT', ignore_case=True)
+            self.expect('operator', '(')
+            self.parse_operand()
+            self.expect('operator', ')')
+            sql_query.count = True
+        elif not self.accept('operator', '*'):
+            sql_query.columns = [self.parse_path()]
+            while self.accept('operator', ','):
+                sql_query.columns.append(self.parse_path())
+
+        self.expect('keyword', 'FROM')
+        self.expect('name', 'c')
+        if self.accept('keyword', 'WHERE'):
+            sql_query.where = self.parse_or()
+        if self.accept('keyword', 'ORDER'):
+            self.expect('keyword', 'BY')
+            sql_query.order_by.append(self.parse_order_item())
+            while self.accept('operator', ','):
+                sql_query.order_by.append(self.parse_order_item())
+        if self.accept('keyword', 'OFFSET'):
+            sql_query.offset = self.parse_operand()
+            self.expect('keyword', 'LIMIT')
+            sql_query.limit = self.parse_operand()
+        elif self.accept('keyword', 'LIMIT'):
+            sql_query.limit = self.parse_operand()
+
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected SQL: {self.tokens[self.position:]}")
+        return sql_query
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def accept(self, kind: str, value: str = None, ignore_case=False):
+        token_kind, token_value = self.peek()
+        if token_kind != kind:
+            return None
+        if value is not None:
+            if ignore_case:
+                token_value, value = token_value.upper(), value.upper()
+            if token_value != value:
+                return None
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def expect(self, kind: str, value: str = None, ignore_case=False):
+        token_value = self.accept(kind, value, ignore_case)
+        if token_value is None:
+            raise ValueError(
+                f"Expected {value or kind} but found {self.peek()[1]!r}"
+            )
+        return token_value
+
+    def parse_path(self) -> tuple:
+        self.expect('name', 'c')
+        path = []
+        while self.accept('operator', '.'):
+            path.append(self.expect('name'))
+        return tuple(path)
+
+    def parse_order_item(self) -> tuple:
+        path = self.parse_path()
+        descending = bool(self.accept('keyword', 'DESC'))
+        if not descending:
+            self.accept('keyword', 'ASC')
+        return path, descending
+
+    def parse_or(self):
+        expressions = [self.parse_and()]
+        while self.accept('keyword', 'OR'):
+            expressions.append(self.parse_and())
+        if len(expressions) == 1:
+            return expressions[0]
+        return lambda item, params: logical_or(
+            e(item, params) for e in expressions
+        )
+
+    def parse_and(self):
+        expressions = [self.parse_not()]
+        while self.accept('keyword', 'AND'):
+            expressions.append(self.parse_not())
+        if len(expressions) == 1:
+            return expressions[0]
+        return lambda item, params: logical_and(
+            e(item, params) for e in expressions
+        )
+
+    def parse_not(self):
+        if self.accept('keyword', 'NOT'):
+            expression = self.parse_not()
+            return lambda item, params: logical_not(expression(item, params))
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_operand()
+        negate = bool(self.accept('keyword', 'NOT'))
+
+        if self.accept('keyword', 'BETWEEN'):
+            low = self.parse_operand()
+            self.expect('keyword', 'AND')
+            high = self.parse_operand()
+            expression = lambda item, params: between(
+                left(item, params), low(item, params), high(item, params)
+            )
+        elif self.accept('keyword', 'IN'):
+            self.expect('operator', '(')
+            options = [self.parse_operand()]
+            while self.accept('operator', ','):
+                options.append(self.parse_operand())
+            self.expect('operator', ')')
+            expression = lambda item, params: is_in(
+                left(item, params), [o(item, params) for o in options]
+            )
+        elif negate:
+            raise ValueError("Expected BETWEEN or IN after NOT")
+        else:
+            operator = None
+            for symbol in ('=', '!=', '<>', '<=', '>=', '<', '>'):
+                if self.accept('operator', symbol):
+                    operator = symbol
+                    break
+            if operator is None:
+                return left
+            right = self.parse_operand()
+            return lambda item, params: compare(
+                operator, left(item, params), right(item, params)
+            )
+
+        if negate:
+            return lambda item, params: logical_not(expression(item, params))
+        return expression
+
+    def parse_operand(self):
+        kind, value = self.peek()
+        if self.accept('operator', '('):
+            expression = self.parse_or()
+            self.expect('operator', ')')
+            return expression
+        if kind == 'string':
+            self.position += 1
+            literal = bytes(value[1:-1], 'utf-8').decode('unicode_escape')
+            return lambda item, params: literal
+        if kind == 'number':
+            self.position += 1
+            number = float(value) if '.' in value else int(value)
+            return lambda item, params: number
+        if kind == 'parameter':
+            self.position += 1
+            return lambda item, params: params.get(value, UNDEFINED)
+        if kind == 'name' and value == 'c':
+            path = self.parse_path()
+            return lambda item, params: get_path(item, path)
+        if kind == 'name':
+            self.position += 1
+            constant = {'null': None, 'true': True, 'false': False}
+            if value.lower() in constant:
+                literal = constant[value.lower()]
+                return lambda item, params: literal
+            return self.parse_function(value.upper())
+        raise ValueError(f"Unexpected SQL token: {value!r}")
+
+    def parse_function(self, name: str):
+        self.expect('operator', '(')
+        arguments = [self.parse_operand()]
+        while self.accept('operator', ','):
+            arguments.append(self.parse_operand())
+        self.expect('operator', ')')
+
+        if name == 'IS_DEFINED':
+            [argument] = arguments
+            return lambda item, params: argument(item, params) is not UNDEFINED
+        if name == 'ARRAY_CONTAINS':
+            array, value = arguments[:2]
+            return lambda item, params: array_contains(
+                array(item, params), value(item, params)
+            )
+        raise ValueError(f"The SQL function {name} is not supported")
+
+
+_parsed_queries = {}
+
+
+def parse_query(query: str) -> SQLQuery:
+    sql_query = _parsed_queries.get(query)
+    if sql_query is None:
+        sql_query = QueryParser(query).parse()
+        _parsed_queries[query] = sql_query
+    return sql_query
+
+
+def get_path(item, path: tuple):
+    value = item
+    for name in path:
+        if not isinstance(value, dict) or name not in value:
+            return UNDEFINED
+        value = value[name]
+    return value
+
+
+def logical_and(values) -> object:
+    result = True
+    for value in values:
+        if value is False:
+            return False
+        if value is not True:
+            result = UNDEFINED
+    return result
+
+
+def logical_or(values) -> object:
+    result = False
+    for value in values:
+        if value is True:
+            return True
+        if value is not False:
+            result = UNDEFINED
+    return result
+
+
+def logical_not(value) -> object:
+    if isinstance(value, bool):
+        return not value
+    return UNDEFINED
+
+
+def comparable(left, right) -> bool:
+    if left is UNDEFINED or right is UNDEFINED:
+        return False
+    if left is None or right is None:
+        return left is None and right is None
+    numbers = (int, float)
+    if isinstance(left, numbers) and not isinstance(left, bool):
+        return isinstance(right, numbers) and not isinstance(right, bool)
+    return type(left) is type(right)
+
+
+def compare(operator: str, left, right) -> object:
+    if not comparable(left, right):
+        if operator in ('=', '!=', '<>') and UNDEFINED not in (left, right):
+            # Values of different types are never equal
+            return operator != '='
+        return UNDEFINED
+    if operator == '=':
+        return left == right
+    if operator in ('!=', '<>'):
+        return left != right
+    if left is None:
+        return operator in ('<=', '>=')
+    return {
+        '<': left < right,
+        '>': left > right,
+        '<=': left <= right,
+        '>=': left >= right,
+    }[operator]
+
+
+def between(value, low, high) -> object:
+    return logical_and([compare('>=', value, low), compare('<=', value, high)])
+
+
+def is_in(value, options: list) -> object:
+    if value is UNDEFINED:
+        return UNDEFINED
+    return any(compare('=', value, option) is True for option in options)
+
+
+def array_contains(array, value) -> bool:
+    if not isinstance(array, list) or value is UNDEFINED:
+        return False
+    return value in array
+
+
+def sort_key(value) -> tuple:
+    # Cosmos DB sorts undefined, null, booleans, numbers and strings
+    if value is UNDEFINED:
+        return (0, 0)
+    if value is None:
+        return (1, 0)
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, (int, float)):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    return (5, str(value))
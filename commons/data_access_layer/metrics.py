@@ -0,0 +1,342 @@
+"""
+Request unit (RU) and latency metrics of every call sent to Cosmos DB.
+
+Each call is tagged with the Flask endpoint and the DAO method that issued
+it. The metrics are aggregated for the whole process and also summed per
+request, to be returned in the X-RU-Charge and Server-Timing headers.
+"""
+import dataclasses
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, List
+
+from azure.core.paging import ItemPaged
+from flask import Flask, has_request_context, request
+
+from commons.data_access_layer import slow_query_log
+from commons.data_access_layer.slow_query_log import (
+    get_retrieved_document_count,
+)
+
+REQUEST_CHARGE_HEADER = 'x-ms-request-charge'
+RU_CHARGE_RESPONSE_HEADER = 'X-RU-Charge'
+
+current_dao_method: ContextVar = ContextVar('dao_method', default=None)
+current_request_metrics: ContextVar = ContextVar(
+    'request_metrics', default=None
+)
+
+
+@dataclasses.dataclass()
+class CosmosDBCallMetric:
+    container_id: str
+    operation: str
+    request_charge: float
+    duration_ms: float
+    item_count: int
+    endpoint: str = None
+    dao_method: str = None
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aggregates = {}
+
+    def record(self, metric: CosmosDBCallMetric):
+        key = (
+            metric.endpoint,
+            metric.dao_method,
+            metric.container_id,
+            metric.operation,
+        )
+        with self._lock:
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = {
+                    'endpoint': metric.endpoint,
+                    'dao_method': metric.dao_method,
+                    'container_id': metric.container_id,
+                    'operation': metric.operation,
+                    'calls': 0,
+                    'request_charge': 0.0,
+                    'duration_ms': 0.0,
+                    'max_duration_ms': 0.0,
+                    'item_count': 0,
+                }
+                self._aggregates[key] = aggregate
+            aggregate['calls'] += 1
+            aggregate['request_charge'] += metric.request_charge
+            aggregate['duration_ms'] += metric.duration_ms
+            aggregate['max_duration_ms'] = max(
+                aggregate['max_duration_ms'], metric.duration_ms
+            )
+            aggregate['item_count'] += metric.item_count
+
+    def snapshot(self) -> List[dict]:
+        """
+        :return: the aggregates sorted by their total request charge,
+        the most expensive first
+        """
+        with self._lock:
+            aggregates = [dict(a) for a in self._aggregates.values()]
+        return sorted(
+            aggregates, key=lambda a: a['request_charge'], reverse=True
+        )
+
+    def reset(self):
+        with self._lock:
+            self._aggregates = {}
+
+
+metrics_registry = MetricsRegistry()
+
+
+def tag_dao_method(dao, depth: int = 2):
+    """
+    Tag the following Cosmos DB calls with the DAO method that is running,
+    taken from the call stack. depth is the frame of that method, counting
+    from the caller of this function.
+    """
+    method_name = sys._getframe(depth).f_code.co_name
+    current_dao_method.set(f"{type(dao).__name__}.{method_name}")
+
+
+def record_call(
+    container_id: str,
+    operation: str,
+    request_charge: float,
+    duration_ms: float,
+    item_count: int,
+):
+    metric = CosmosDBCallMetric(
+        container_id=container_id,
+        operation=operation,
+        request_charge=request_charge,
+        duration_ms=duration_ms,
+        item_count=item_count,
+        endpoint=request.endpoint if has_request_context() else None,
+        dao_method=current_dao_method.get(),
+    )
+    metrics_registry.record(metric)
+
+    request_metrics = current_request_metrics.get()
+    if request_metrics is not None:
+        request_metrics.append(metric)
+
+
+def get_request_charge(headers) -> float:
+    if not headers:
+        return 0.0
+    try:
+        return float(headers.get(REQUEST_CHARGE_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ChargeCollector:
+    """response_hook for the Cosmos SDK that sums the charge of the calls"""
+
+    def __init__(self):
+        self.request_charge = 0.0
+        self.retrieved_document_count = None
+
+    def __call__(self, headers, result):
+        # query_items calls the hook once before running the query, with the
+        # headers of a previous call and the lazy result as arguments
+        if isinstance(result, ItemPaged):
+            return
+        self.request_charge += get_request_charge(headers)
+        retrieved_document_count = get_retrieved_document_count(headers)
+        if retrieved_document_count is not None:
+            self.retrieved_document_count = (
+                self.retrieved_document_count or 0
+            ) + retrieved_document_count
+
+    def pop(self) -> float:
+        request_charge, self.request_charge = self.request_charge, 0.0
+        return request_charge
+
+    def pop_retrieved_document_count(self) -> int:
+        retrieved_document_count = self.retrieved_document_count
+        self.retrieved_document_count = None
+        return retrieved_document_count
+
+
+class InstrumentedPageIterator:
+    def __init__(self, pages, on_page: Callable, on_end: Callable = None):
+        self._pages = pages
+        self._on_page = on_page
+        self._on_end = on_end
+
+    @property
+    def continuation_token(self):
+        return self._pages.continuation_token
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            page = list(next(self._pages))
+        except StopIteration:
+            self._end()
+            raise
+        self._on_page((time.perf_counter() - start) * 1000, len(page))
+        return iter(page)
+
+    next = __next__
+
+    def _end(self):
+        on_end, self._on_end = self._on_end, None
+        if on_end is not None:
+            on_end()
+
+    def __del__(self):
+        # The callers that read only some pages never reach StopIteration
+        try:
+            self._end()
+        except Exception:  # pragma: no cover
+            pass
+
+
+class InstrumentedItemPaged(ItemPaged):
+    def __init__(
+        self,
+        item_paged: ItemPaged,
+        on_page: Callable,
+        on_end: Callable = None,
+    ):
+        super(InstrumentedItemPaged, self).__init__()
+        self._item_paged = item_paged
+        self._on_page = on_page
+        self._on_end = on_end
+
+    def by_page(self, continuation_token=None):
+        return InstrumentedPageIterator(
+            self._item_paged.by_page(continuation_token),
+            self._on_page,
+            self._on_end,
+        )
+
+
+class InstrumentedContainerProxy:
+    """
+    Wrapper of a ContainerProxy that records the metrics of the calls.
+    Any other attribute is taken from the wrapped container.
+    """
+
+    def __init__(self, container):
+        self._container = container
+
+    def __getattr__(self, name):
+        return getattr(self._container, name)
+
+    def query_items(self, *args, **kwargs):
+        charge_collector = ChargeCollector()
+        kwargs['response_hook'] = charge_collector
+        query_execution = self._start_query_execution(*args, **kwargs)
+        if query_execution is not None:
+            kwargs['populate_query_metrics'] = True
+
+        def on_page(duration_ms, item_count):
+            request_charge = charge_collector.pop()
+            record_call(
+                self._container.id,
+                'query_items',
+                request_charge,
+                duration_ms,
+                item_count,
+            )
+            if query_execution is not None:
+                query_execution.add_page(
+                    request_charge,
+                    duration_ms,
+                    item_count,
+                    charge_collector.pop_retrieved_document_count(),
+                )
+
+        result = self._container.query_items(*args, **kwargs)
+        return InstrumentedItemPaged(
+            result,
+            on_page,
+            query_execution.finish if query_execution is not None else None,
+        )
+
+    def _start_query_execution(
+        self, query: str, parameters=None, partition_key=None, **kwargs
+    ):
+        if slow_query_log.slow_query_log is None:
+            return None
+        return slow_query_log.slow_query_log.start(
+            self._container.id,
+            query,
+            parameters=parameters,
+            partition_key=partition_key,
+            dao_method=current_dao_method.get(),
+            endpoint=request.endpoint if has_request_context() else None,
+        )
+
+    def read_item(self, *args, **kwargs):
+        return self._call('read_item', *args, **kwargs)
+
+    def create_item(self, *args, **kwargs):
+        return self._call('create_item', *args, **kwargs)
+
+    def replace_item(self, *args, **kwargs):
+        return self._call('replace_item', *args, **kwargs)
+
+    def upsert_item(self, *args, **kwargs):
+        return self._call('upsert_item', *args, **kwargs)
+
+    def delete_item(self, *args, **kwargs):
+        return self._call('delete_item', *args, **kwargs)
+
+    def _call(self, operation: str, *args, **kwargs):
+        charge_collector = ChargeCollector()
+        kwargs['response_hook'] = charge_collector
+        start = time.perf_counter()
+        try:
+            result = getattr(self._container, operation)(*args, **kwargs)
+        finally:
+            record_call(
+                self._container.id,
+                operation,
+                charge_collector.pop(),
+                (time.perf_counter() - start) * 1000,
+                0 if operation == 'delete_item' else 1,
+            )
+        return result
+
+
+def start_request_metrics():
+    current_request_metrics.set([])
+    current_dao_method.set(None)
+
+
+def add_request_metrics_headers(response):
+    request_metrics = current_request_metrics.get()
+    if request_metrics:
+        request_charge = sum(m.request_charge for m in request_metrics)
+        duration_ms = sum(m.duration_ms for m in request_metrics)
+        response.headers[RU_CHARGE_RESPONSE_HEADER] = '%.2f' % request_charge
+        response.headers.add(
+            'Server-Timing',
+            'cosmos;dur=%.1f;desc="%d calls, %.2f RU"'
+            % (duration_ms, len(request_metrics), request_charge),
+        )
+    return response
+
+
+def end_request_metrics(error=None):
+    current_request_metrics.set(None)
+    current_dao_method.set(None)
+
+
+def init_app(app: Flask) -> None:
+    app.before_request(start_request_metrics)
+    app.after_request(add_request_metrics_headers)
+    app.teardown_request(end_request_metrics)
@@ -0,0 +1,345 @@
+"""
+Handling of the throttling of Cosmos DB (status 429). The client doesn't
+retry the throttled calls itself, so every call goes through this module:
+the ones of the repositories and the change feed through their container
+proxies and the ones on the database, like creating containers, through
+retry_policy.
+
+Throttled calls are retried after the time requested by Cosmos DB in the
+x-ms-retry-after-ms header plus a random exponential backoff, so the
+retries of concurrent requests do not arrive together. Besides, the calls
+in flight to each container are limited by an adaptive limit: it grows by
+one after a window of successful calls and it is halved when a call is
+throttled (AIMD). The calls over the limit wait in a queue, so a burst
+turns into some more latency instead of errors.
+"""
+import random
+import threading
+import time
+from http import HTTPStatus
+from typing import Callable, Dict, List
+
+from azure.core.paging import ItemPaged
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from flask import Flask
+from werkzeug.exceptions import ServiceUnavailable
+
+RETRY_AFTER_HEADER = 'x-ms-retry-after-ms'
+
+
+def is_throttled(error: Exception) -> bool:
+    return (
+        isinstance(error, CosmosHttpResponseError)
+        and error.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+def retry_after_seconds(error: CosmosHttpResponseError) -> float:
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get(RETRY_AFTER_HEADER, 0)) / 1000
+    except ValueError:
+        return 0
+
+
+class ThrottlingRetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = 9,
+        max_wait_seconds: float = 30,
+        base_delay_seconds: float = 0.05,
+        max_delay_seconds: float = 2,
+        random: Callable[[], float] = random.random,
+        sleep: Callable[[float], None] = time.sleep,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_retries: retries of a throttled call before failing
+        :param max_wait_seconds: total time that a call can wait for retries
+        """
+        self.max_retries = max_retries
+        self.max_wait_seconds = max_wait_seconds
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.random = random
+        self.sleep = sleep
+        self.timer = timer
+
+    def delay(self, attempt: int, error: CosmosHttpResponseError) -> float:
+        backoff = min(
+            self.max_delay_seconds, self.base_delay_seconds * 2 ** attempt
+        )
+        return retry_after_seconds(error) + self.random() * backoff
+
+    def call(
+        self,
+        func: Callable,
+        on_throttle: Callable[[], None] = None,
+        on_retry: Callable[[], None] = None,
+    ):
+        start = self.timer()
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except CosmosHttpResponseError as e:
+                if not is_throttled(e):
+                    raise
+                if on_throttle:
+                    on_throttle()
+                delay = self.delay(attempt, e)
+                waited = self.timer() - start
+                if (
+                    attempt >= self.max_retries
+                    or waited + delay > self.max_wait_seconds
+                ):
+                    raise
+                self.sleep(delay)
+                attempt += 1
+                if on_retry:
+                    on_retry()
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        queue_timeout_seconds: float = 10,
+        decrease_cooldown_seconds: float = 1,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param queue_timeout_seconds: time that a call can wait for a slot
+        :param decrease_cooldown_seconds: the limit is decreased at most once
+        in this time, because the calls in flight are throttled together
+        """
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.timer = timer
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.throttled_count = 0
+        self._successes = 0
+        self._last_decrease = None
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        deadline = self.timer() + self.queue_timeout_seconds
+        with self._condition:
+            self.queue_depth += 1
+            try:
+                while self.in_flight >= self.limit:
+                    remaining = deadline - self.timer()
+                    if remaining <= 0:
+                        raise ServiceUnavailable(
+                            "The database is busy. Please try again."
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self.queue_depth -= 1
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self._successes = 0
+                self.limit += 1
+                self._condition.notify()
+
+    def on_throttle(self):
+        with self._condition:
+            self.throttled_count += 1
+            now = self.timer()
+            if (
+                self._last_decrease is not None
+                and now - self._last_decrease < self.decrease_cooldown_seconds
+            ):
+                return
+            self._last_decrease = now
+            self._successes = 0
+            self.limit = max(
+                self.min_limit, int(self.limit * self.decrease_factor)
+            )
+
+    def run(self, func: Callable):
+        self.acquire()
+        try:
+            result = func()
+        finally:
+            self.release()
+        self.on_success()
+        return result
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queue_depth,
+                'throttled_count': self.throttled_count,
+            }
+
+
+class LimiterRegistry:
+    """
+    One limiter per container, shared by all the proxies of the container
+    """
+
+    def __init__(self, factory: Callable[[], AdaptiveConcurrencyLimiter]):
+        self.factory = factory
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, container_id: str) -> AdaptiveConcurrencyLimiter:
+        with self._lock:
+            if container_id not in self._limiters:
+                self._limiters[container_id] = self.factory()
+            return self._limiters[container_id]
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return [
+            dict(container_id=container_id, **limiter.snapshot())
+            for container_id, limiter in sorted(limiters.items())
+        ]
+
+
+retry_policy = ThrottlingRetryPolicy()
+limiter_registry = LimiterRegistry(AdaptiveConcurrencyLimiter)
+
+
+class ResilientPageIterator:
+    def __init__(
+        self, query: Callable[[], ItemPaged], continuation_token, run
+    ):
+        self._query = query
+        self._run = run
+        self._last_token = continuation_token
+        self._pages = query().by_page(continuation_token)
+
+    @property
+    def continuation_token(self):
+        return self._pages.continuation_token
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        def fetch_page():
+            try:
+                return list(next(self._pages))
+            except CosmosHttpResponseError:
+                # The iterators of the SDK can't fetch again a failed page,
+                # the query is sent again from the last page read
+                self._pages = self._query().by_page(self._last_token)
+                raise
+
+        page = self._run(fetch_page)
+        self._last_token = self._pages.continuation_token
+        return iter(page)
+
+    next = __next__
+
+
+class ResilientItemPaged(ItemPaged):
+    def __init__(self, query: Callable[[], ItemPaged], run: Callable):
+        super(ResilientItemPaged, self).__init__()
+        self._query = query
+        self._run = run
+
+    def by_page(self, continuation_token=None):
+        return ResilientPageIterator(
+            self._query, continuation_token, self._run
+        )
+
+
+class ResilientContainerProxy:
+    """
+    Wrapper of a ContainerProxy that retries the throttled calls and limits
+    the calls in flight. Any other attribute is taken from the wrapped
+    container.
+    """
+
+    def __init__(self, container):
+        self._container = container
+        self.limiter = limiter_registry.get(container.id)
+
+    def __getattr__(self, name):
+        return getattr(self._container, name)
+
+    def query_items(self, *args, **kwargs):
+        return ResilientItemPaged(
+            lambda: self._container.query_items(*args, **kwargs), self._run
+        )
+
+    def query_items_change_feed(self, *args, **kwargs):
+        return ResilientItemPaged(
+            lambda: self._container.query_items_change_feed(*args, **kwargs),
+            self._run,
+        )
+
+    def read(self, *args, **kwargs):
+        return self._call('read', *args, **kwargs)
+
+    def read_item(self, *args, **kwargs):
+        return self._call('read_item', *args, **kwargs)
+
+    def create_item(self, *args, **kwargs):
+        return self._call('create_item', *args, **kwargs)
+
+    def replace_item(self, *args, **kwargs):
+        return self._call('replace_item', *args, **kwargs)
+
+    def upsert_item(self, *args, **kwargs):
+        return self._call('upsert_item', *args, **kwargs)
+
+    def delete_item(self, *args, **kwargs):
+        return self._call('delete_item', *args, **kwargs)
+
+    def _call(self, operation: str, *args, **kwargs):
+        return self._run(
+            lambda: getattr(self._container, operation)(*args, **kwargs)
+        )
+
+    def _run(self, func: Callable):
+        return retry_policy.call(
+            lambda: self.limiter.run(func),
+            on_throttle=self.limiter.on_throttle,
+        )
+
+
+def init_app(app: Flask) -> None:
+    global retry_policy, limiter_registry
+    retry_policy = ThrottlingRetryPolicy(
+        max_retries=app.config.get('COSMOS_THROTTLING_MAX_RETRIES', 9),
+        max_wait_seconds=app.config.get(
+            'COSMOS_THROTTLING_MAX_WAIT_SECONDS', 30
+        ),
+    )
+
+    def create_limiter() -> AdaptiveConcurrencyLimiter:
+        return AdaptiveConcurrencyLimiter(
+            initial_limit=app.config.get(
+                'COSMOS_CONCURRENCY_INITIAL_LIMIT', 16
+            ),
+            max_limit=app.config.get('COSMOS_CONCURRENCY_MAX_LIMIT', 64),
+            queue_timeout_seconds=app.config.get(
+                'COSMOS_QUEUE_TIMEOUT_SECONDS', 10
+            ),
+        )
+
+    limiter_registry = LimiterRegistry(create_limiter)
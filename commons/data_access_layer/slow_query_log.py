@@ -0,0 +1,262 @@
+"""
+Log of the Cosmos DB queries that exceed a duration or request unit (RU)
+threshold, to choose the changes of the indexing policies from data.
+
+Each entry is a JSON line with the normalized query text, the names of its
+parameters (never their values), the partition key, the RU, the items
+returned and the documents retrieved by the query engine, which Cosmos DB
+reports in the query metrics. A query that retrieves many more documents
+than it returns is missing an index. The entries are written to a rotating
+file and can be summarized with `python cli.py summarize_slow_queries`.
+"""
+import dataclasses
+import glob
+import json
+import logging
+import random
+import re
+from collections import defaultdict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from flask import Flask
+
+QUERY_METRICS_HEADER = 'x-ms-documentdb-query-metrics'
+
+_string_literal = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_number_literal = re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?\b")
+_literal_list = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Query text without its literal values, so the executions of a query
+    with different values are grouped together
+    """
+    query = _string_literal.sub('?', query)
+    query = _number_literal.sub('?', query)
+    query = _literal_list.sub('(?)', query)
+    return _whitespace.sub(' ', query).strip()
+
+
+def get_retrieved_document_count(headers) -> Optional[int]:
+    """
+    :return: the retrievedDocumentCount of the query metrics header, which is
+    only returned when the query is sent with populate_query_metrics
+    """
+    query_metrics = headers.get(QUERY_METRICS_HEADER) if headers else None
+    if not query_metrics:
+        return None
+    for metric in query_metrics.split(';'):
+        name, _, value = metric.partition('=')
+        if name.strip() == 'retrievedDocumentCount':
+            try:
+                return int(float(value))
+            except ValueError:
+                return None
+    return None
+
+
+@dataclasses.dataclass()
+class SlowQuery:
+    container_id: str
+    query: str
+    parameters: List[str]
+    partition_key: Optional[str]
+    request_charge: float = 0.0
+    duration_ms: float = 0.0
+    item_count: int = 0
+    retrieved_document_count: Optional[int] = None
+    page_count: int = 0
+    dao_method: str = None
+    endpoint: str = None
+    timestamp: str = None
+
+
+class QueryExecution:
+    """
+    Totals of the pages of one query, which are checked against the
+    thresholds once the query stops being read
+    """
+
+    def __init__(self, slow_query_log: 'SlowQueryLog', entry: SlowQuery):
+        self.slow_query_log = slow_query_log
+        self.entry = entry
+        self.finished = False
+
+    def add_page(
+        self,
+        request_charge: float,
+        duration_ms: float,
+        item_count: int,
+        retrieved_document_count: Optional[int],
+    ):
+        self.entry.page_count += 1
+        self.entry.request_charge += request_charge
+        self.entry.duration_ms += duration_ms
+        self.entry.item_count += item_count
+        if retrieved_document_count is not None:
+            self.entry.retrieved_document_count = (
+                self.entry.retrieved_document_count or 0
+            ) + retrieved_document_count
+
+    def finish(self):
+        if self.finished or self.entry.page_count == 0:
+            return
+        self.finished = True
+        self.slow_query_log.record(self.entry)
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        logger: logging.Logger,
+        duration_threshold_ms: float = 100,
+        request_charge_threshold: float = 50,
+        sample_rate: float = 1.0,
+        random: Callable[[], float] = random.random,
+    ):
+        """
+        :param sample_rate: fraction of the slow queries that are written
+        """
+        self.logger = logger
+        self.duration_threshold_ms = duration_threshold_ms
+        self.request_charge_threshold = request_charge_threshold
+        self.sample_rate = sample_rate
+        self.random = random
+
+    def start(
+        self,
+        container_id: str,
+        query: str,
+        parameters: List[dict] = None,
+        partition_key=None,
+        dao_method: str = None,
+        endpoint: str = None,
+    ) -> QueryExecution:
+        return QueryExecution(
+            self,
+            SlowQuery(
+                container_id=container_id,
+                query=normalize_query(query),
+                parameters=[p['name'] for p in parameters or []],
+                partition_key=partition_key,
+                dao_method=dao_method,
+                endpoint=endpoint,
+            ),
+        )
+
+    def is_slow(self, entry: SlowQuery) -> bool:
+        return (
+            entry.duration_ms >= self.duration_threshold_ms
+            or entry.request_charge >= self.request_charge_threshold
+        )
+
+    def record(self, entry: SlowQuery):
+        if not self.is_slow(entry) or self.random() >= self.sample_rate:
+            return
+        entry.timestamp = datetime.utcnow().isoformat()
+        entry.request_charge = round(entry.request_charge, 2)
+        entry.duration_ms = round(entry.duration_ms, 1)
+        self.logger.info(json.dumps(dataclasses.asdict(entry)))
+
+
+def read_entries(filename: str) -> Iterator[dict]:
+    """
+    Entries of the log file and of its rotated backups
+    """
+    for path in sorted(glob.glob(glob.escape(filename) + '*')):
+        if path != filename and not path[len(filename) + 1 :].isdigit():
+            continue
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries: Iterable[dict]) -> List[dict]:
+    """
+    Aggregates of the entries of each query of each container, the ones
+    that consumed the most request units first
+    """
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[(entry['container_id'], entry['query'])].append(entry)
+
+    summary = []
+    for (container_id, query), group in groups.items():
+        retrieved = [
+            e['retrieved_document_count']
+            for e in group
+            if e.get('retrieved_document_count') is not None
+        ]
+        returned = sum(e['item_count'] for e in group)
+        summary.append(
+            {
+                'container_id': container_id,
+                'query': query,
+                'parameters': sorted(
+                    {p for e in group for p in e['parameters']}
+                ),
+                'dao_methods': sorted(
+                    {e['dao_method'] for e in group if e.get('dao_method')}
+                ),
+                'cross_partition': any(
+                    e.get('partition_key') is None for e in group
+                ),
+                'count': len(group),
+                'request_charge': round(
+                    sum(e['request_charge'] for e in group), 2
+                ),
+                'avg_request_charge': round(
+                    sum(e['request_charge'] for e in group) / len(group), 2
+                ),
+                'max_duration_ms': max(e['duration_ms'] for e in group),
+                'avg_duration_ms': round(
+                    sum(e['duration_ms'] for e in group) / len(group), 1
+                ),
+                'item_count': returned,
+                'retrieved_document_count': (
+                    sum(retrieved) if retrieved else None
+                ),
+            }
+        )
+    return sorted(summary, key=lambda s: s['request_charge'], reverse=True)
+
+
+slow_query_log: Optional[SlowQueryLog] = None
+
+
+def init_app(app: Flask) -> None:
+    global slow_query_log
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', False):
+        slow_query_log = None
+        return
+
+    logger = logging.getLogger('time_tracker_api.slow_queries')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.addHandler(
+        RotatingFileHandler(
+            app.config.get('SLOW_QUERY_LOG_FILE', 'slow_queries.log'),
+            maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10485760),
+            backupCount=app.config.get('SLOW_QUERY_LOG_BACKUP_COUNT', 5),
+        )
+    )
+    slow_query_log = SlowQueryLog(
+        logger,
+        duration_threshold_ms=app.config.get(
+            'SLOW_QUERY_LOG_DURATION_MS', 100
+        ),
+        request_charge_threshold=app.config.get(
+            'SLOW_QUERY_LOG_REQUEST_CHARGE', 50
+        ),
+        sample_rate=app.config.get('SLOW_QUERY_LOG_SAMPLE_RATE', 1.0),
+    )
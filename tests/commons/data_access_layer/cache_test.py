@@ -0,0 +1,200 @@
+from unittest.mock import Mock
+
+import pytest
+from azure.cosmos import PartitionKey
+from flask import Flask
+
+from commons.data_access_layer import cache
+from commons.data_access_layer.cache import (
+    LocalCacheBackend,
+    RedisCacheBackend,
+    RepositoryCache,
+)
+from commons.data_access_layer.cosmos_db import (
+    CosmosDBFacade,
+    CosmosDBRepository,
+)
+from commons.data_access_layer.database import EventContext
+from commons.data_access_layer.in_memory_cosmos_db import InMemoryCosmosClient
+
+
+class RedisStandIn:
+    """
+    Keeps the values as bytes, like the Redis client does
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode('utf-8')
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, b'0')) + 1).encode()
+        return int(self.values[key])
+
+
+@pytest.fixture(params=['local', 'redis'])
+def repository_cache(request) -> RepositoryCache:
+    if request.param == 'local':
+        return RepositoryCache(LocalCacheBackend(max_entries=10))
+    return RepositoryCache(RedisCacheBackend(RedisStandIn()))
+
+
+def test_get_or_load_reads_the_database_only_on_a_miss(repository_cache):
+    load = Mock(return_value=[{'id': '1'}])
+
+    first = repository_cache.scope('project', 'a').get_or_load('key', load)
+    second = repository_cache.scope('project', 'a').get_or_load('key', load)
+
+    assert first == second == [{'id': '1'}]
+    load.assert_called_once()
+
+
+def test_get_or_load_keeps_the_entries_of_each_tenant_apart(repository_cache):
+    repository_cache.scope('project', 'a').get_or_load('key', lambda: 'a')
+
+    value = repository_cache.scope('project', 'b').get_or_load(
+        'key', lambda: 'b'
+    )
+
+    assert value == 'b'
+
+
+def test_get_or_load_caches_missing_values(repository_cache):
+    load = Mock(return_value=None)
+
+    repository_cache.scope('project', 'a').get_or_load('key', load)
+    value = repository_cache.scope('project', 'a').get_or_load('key', load)
+
+    assert value is None
+    load.assert_called_once()
+
+
+def test_invalidate_discards_the_entries_of_the_tenant(repository_cache):
+    repository_cache.scope('project', 'a').get_or_load('key', lambda: 1)
+    repository_cache.scope('project', 'b').get_or_load('key', lambda: 1)
+
+    repository_cache.invalidate('project', 'a')
+
+    assert (
+        repository_cache.scope('project', 'a').get_or_load('key', lambda: 2)
+        == 2
+    )
+    assert (
+        repository_cache.scope('project', 'b').get_or_load('key', lambda: 2)
+        == 1
+    )
+
+
+def test_values_bigger_than_the_limit_are_not_cached():
+    repository_cache = RepositoryCache(LocalCacheBackend(), max_entry_bytes=10)
+    load = Mock(return_value=['a value bigger than ten bytes'])
+
+    repository_cache.scope('project', 'a').get_or_load('key', load)
+    repository_cache.scope('project', 'a').get_or_load('key', load)
+
+    assert load.call_count == 2
+
+
+def test_local_backend_never_evicts_the_versions():
+    backend = LocalCacheBackend(max_entries=1)
+    backend.incr('version')
+    backend.set('a', 'value', ttl=10)
+    backend.set('b', 'value', ttl=10)
+
+    assert backend.get('version') == '1'
+    assert backend.get('a') is None
+    assert backend.get('b') == 'value'
+
+
+def test_a_failing_backend_is_taken_as_a_miss():
+    backend = Mock(**{'get.side_effect': ConnectionError('down')})
+    repository_cache = RepositoryCache(backend)
+
+    value = repository_cache.scope('project', 'a').get_or_load(
+        'key', lambda: 1
+    )
+
+    assert value == 1
+
+
+@pytest.mark.parametrize(
+    'config,expected_backend',
+    [
+        ({'REFERENCE_CACHE_ENABLED': False}, None),
+        ({'REFERENCE_CACHE_ENABLED': True}, LocalCacheBackend),
+    ],
+)
+def test_init_app_creates_the_configured_cache(config, expected_backend):
+    app = Flask(__name__)
+    app.config.update(config)
+
+    cache.init_app(app)
+
+    if expected_backend is None:
+        assert cache.repository_cache is None
+    else:
+        assert isinstance(cache.repository_cache.backend, expected_backend)
+    cache.repository_cache = None
+
+
+@pytest.fixture
+def cached_repository(mocker, repository_cache) -> CosmosDBRepository:
+    facade = CosmosDBFacade(InMemoryCosmosClient(), 'test')
+    facade.create_container(
+        {'id': 'customer', 'partition_key': PartitionKey(path='/tenant_id')}
+    )
+    mocker.patch.object(cache, 'repository_cache', repository_cache)
+    return CosmosDBRepository(
+        'customer',
+        'tenant_id',
+        custom_cosmos_helper=facade,
+        cached=True,
+    )
+
+
+@pytest.fixture
+def tenant_event_context() -> EventContext:
+    return EventContext(
+        'customer', 'create', user_id='user', tenant_id='tenant'
+    )
+
+
+def test_find_all_reads_the_cache_until_a_write(
+    mocker, cached_repository, tenant_event_context
+):
+    cached_repository.create({'name': 'ioet'}, tenant_event_context)
+    query_items = mocker.spy(cached_repository.container, 'query_items')
+
+    cached_repository.find_all(tenant_event_context)
+    result = cached_repository.find_all(tenant_event_context)
+
+    assert [item['name'] for item in result] == ['ioet']
+    assert query_items.call_count == 1
+
+    cached_repository.create({'name': 'other'}, tenant_event_context)
+    result = cached_repository.find_all(tenant_event_context)
+
+    assert len(result) == 2
+    assert query_items.call_count == 2
+
+
+def test_find_many_reads_the_cache_until_a_write(
+    mocker, cached_repository, tenant_event_context
+):
+    item = cached_repository.create({'name': 'ioet'}, tenant_event_context)
+    read_item = mocker.spy(cached_repository.container, 'read_item')
+
+    cached_repository.find_many([item['id']], tenant_event_context)
+    cached_repository.find_many([item['id']], tenant_event_context)
+
+    assert read_item.call_count == 1
+
+    cached_repository.delete(item['id'], tenant_event_context)
+    result = cached_repository.find_many([item['id']], tenant_event_context)
+
+    assert result == []
@@ -0,0 +1,245 @@
+import time
+from unittest.mock import Mock, call
+
+import pytest
+from azure.cosmos import PartitionKey
+from flask import Flask
+
+from commons.data_access_layer import change_feed, cosmos_db
+from commons.data_access_layer.cache import LocalCacheBackend, RepositoryCache
+from commons.data_access_layer.change_feed import (
+    CacheInvalidationHandler,
+    ChangeFeedProcessor,
+    CosmosDBLeaseStore,
+    InMemoryLeaseStore,
+    lease_container_definition,
+)
+from commons.data_access_layer.cosmos_db import (
+    CosmosDBFacade,
+    CosmosDBRepository,
+    RepositoryRegistry,
+)
+from commons.data_access_layer.in_memory_cosmos_db import InMemoryCosmosClient
+
+
+@pytest.fixture
+def facade() -> CosmosDBFacade:
+    facade = CosmosDBFacade(InMemoryCosmosClient(), 'test')
+    facade.create_container(
+        {'id': 'customer', 'partition_key': PartitionKey(path='/tenant_id')}
+    )
+    return facade
+
+
+@pytest.fixture
+def container(facade: CosmosDBFacade):
+    return facade.db.get_container_client('customer')
+
+
+def create_items(container, *ids, tenant_id='tenant'):
+    for id in ids:
+        container.upsert_item({'id': id, 'tenant_id': tenant_id})
+
+
+def handled_ids(handler: Mock) -> list:
+    return [
+        item['id']
+        for (container_id, items), _ in handler.call_args_list
+        for item in items
+    ]
+
+
+def test_process_once_handles_the_changes_since_the_last_checkpoint(
+    container,
+):
+    handler = Mock()
+    processor = ChangeFeedProcessor(
+        container, InMemoryLeaseStore(), 'test', handlers=[handler]
+    )
+    processor.max_item_count = 2
+    processor.process_once()
+    create_items(container, '1', '2', '3')
+
+    assert processor.process_once() == 3
+    assert handled_ids(handler) == ['1', '2', '3']
+    assert handler.call_args[0][0] == 'customer'
+
+    handler.reset_mock()
+    assert processor.process_once() == 0
+    handler.assert_not_called()
+
+    create_items(container, '2')
+    assert processor.process_once() == 1
+    assert handled_ids(handler) == ['2']
+
+
+def test_a_page_is_read_again_when_a_handler_fails(container):
+    handler = Mock(side_effect=[ValueError('failed'), None])
+    processor = ChangeFeedProcessor(
+        container,
+        InMemoryLeaseStore(),
+        'test',
+        handlers=[handler],
+        start_from_beginning=True,
+    )
+    create_items(container, '1')
+
+    with pytest.raises(ValueError):
+        processor.process_once()
+    processor.process_once()
+
+    assert handled_ids(handler) == ['1', '1']
+
+
+def test_processors_with_other_names_keep_their_own_checkpoints(container):
+    lease_store = InMemoryLeaseStore()
+    first, second = Mock(), Mock()
+    create_items(container, '1')
+
+    ChangeFeedProcessor(
+        container,
+        lease_store,
+        'first',
+        handlers=[first],
+        start_from_beginning=True,
+    ).process_once()
+    ChangeFeedProcessor(
+        container,
+        lease_store,
+        'second',
+        handlers=[second],
+        start_from_beginning=True,
+    ).process_once()
+
+    assert handled_ids(first) == handled_ids(second) == ['1']
+
+
+def test_a_processor_without_lease_starts_from_now(container):
+    handler = Mock()
+    lease_store = InMemoryLeaseStore()
+    processor = ChangeFeedProcessor(
+        container, lease_store, 'test', handlers=[handler]
+    )
+    create_items(container, '1')
+
+    assert processor.process_once() == 0
+    assert lease_store.get(processor.lease_id()) is not None
+
+    create_items(container, '2')
+    assert processor.process_once() == 1
+    assert handled_ids(handler) == ['2']
+
+
+def test_a_processor_started_from_the_beginning_replays_the_feed(container):
+    handler = Mock()
+    create_items(container, '1', '2')
+    processor = ChangeFeedProcessor(
+        container,
+        InMemoryLeaseStore(),
+        'test',
+        handlers=[handler],
+        start_from_beginning=True,
+    )
+
+    assert processor.process_once() == 2
+    assert handled_ids(handler) == ['1', '2']
+
+
+def test_cosmos_db_lease_store_keeps_the_continuations(facade):
+    lease_store = CosmosDBLeaseStore(
+        facade.create_container(lease_container_definition)
+    )
+
+    assert lease_store.get('lease') is None
+    lease_store.set('lease', '10')
+    lease_store.set('lease', '20')
+
+    assert lease_store.get('lease') == '20'
+
+
+def test_cache_invalidation_handler_invalidates_each_tenant_once():
+    repository_cache = Mock()
+    handler = CacheInvalidationHandler(repository_cache, 'tenant_id')
+
+    handler(
+        'customer',
+        [
+            {'id': '1', 'tenant_id': 'a'},
+            {'id': '2', 'tenant_id': 'a'},
+            {'id': '3', 'tenant_id': 'b'},
+        ],
+    )
+
+    assert sorted(repository_cache.invalidate.call_args_list) == [
+        call('customer', 'a'),
+        call('customer', 'b'),
+    ]
+
+
+def test_create_processors_follows_the_cached_and_registered_containers(
+    mocker, facade
+):
+    facade.create_container(
+        {'id': 'time_entry', 'partition_key': PartitionKey(path='/tenant_id')}
+    )
+    registry = RepositoryRegistry()
+    cached_repository = CosmosDBRepository(
+        'customer', 'tenant_id', custom_cosmos_helper=facade
+    )
+    cached_repository.cache = RepositoryCache(LocalCacheBackend())
+    registry.get('customer', lambda: cached_repository)
+    registry.get(
+        'time_entry',
+        lambda: CosmosDBRepository(
+            'time_entry', 'tenant_id', custom_cosmos_helper=facade
+        ),
+    )
+    mocker.patch.object(cosmos_db, 'repository_registry', registry)
+    mocker.patch.object(cosmos_db, 'cosmos_helper', facade)
+    handler = Mock()
+    mocker.patch.dict(
+        change_feed.change_feed_handlers, {'time_entry': [handler]}, clear=True
+    )
+    app = Flask(__name__)
+    app.config.update(
+        CHANGE_FEED_LEASE_CONTAINER='lease', CHANGE_FEED_NAME='api'
+    )
+
+    processors = change_feed.create_processors(app)
+
+    handlers = {p.container.id: p.handlers for p in processors}
+    assert isinstance(handlers['customer'][0], CacheInvalidationHandler)
+    assert handlers['time_entry'] == [handler]
+    assert isinstance(processors[0].lease_store, CosmosDBLeaseStore)
+    assert processors[0].name == 'api'
+
+
+def test_create_processors_needs_a_name_with_a_lease_container(mocker, facade):
+    mocker.patch.object(cosmos_db, 'cosmos_helper', facade)
+    app = Flask(__name__)
+    app.config.update(CHANGE_FEED_LEASE_CONTAINER='lease')
+
+    with pytest.raises(ValueError):
+        change_feed.create_processors(app)
+
+
+def test_start_runs_the_processors_in_background_until_stop(mocker, container):
+    processor = ChangeFeedProcessor(
+        container, InMemoryLeaseStore(), 'test', poll_interval_seconds=60
+    )
+    mocker.patch.object(
+        change_feed, 'create_processors', return_value=[processor]
+    )
+    process_once = mocker.spy(processor, 'process_once')
+    app = Flask(__name__)
+    app.config.update(CHANGE_FEED_ENABLED=True)
+
+    change_feed.start(app)
+    for _ in range(100):
+        if process_once.called:
+            break
+        time.sleep(0.01)
+    change_feed.stop()
+
+    assert process_once.call_count == 1
+    assert change_feed.processors == []
@@ -4,6 +4,7 @@ from typing import Callable
 from faker import Faker
 
 import pytest
+from azure.core import MatchConditions
 from pytest import fail
 
 from azure.cosmos.exceptions import (
@@ -13,8 +14,14 @@ from azure.cosmos.exceptions import (
 
 from commons.data_access_layer.database import EventContext
 from commons.data_access_layer.cosmos_db import (
+    BulkOperationResult,
     CosmosDBRepository,
     CosmosDBModel,
+    CustomError,
+    MAX_PAGE_SIZE,
+    RepositoryRegistry,
+    decode_continuation_token,
+    encode_continuation_token,
 )
 
 from utils.time import datetime_str, current_datetime
@@ -728,3 +735,331 @@ def test_attach_context_should_create_last_event_context_attrib(
     assert data["_last_event_ctx"]["description"] == None
     assert data["_last_event_ctx"]["user_id"] == owner_id
     assert data["_last_event_ctx"]["tenant_id"] == tenant_id
+
+
+def test_continuation_token_encoding_is_reversible():
+    raw_token = (
+        '{"token":"+RID:~abc==#RT:1#TRC:5","range":{"min":"","max":"FF"}}'
+    )
+
+    encoded_token = encode_continuation_token(raw_token)
+
+    assert '+' not in encoded_token and '/' not in encoded_token
+    assert decode_continuation_token(encoded_token) == raw_token
+    assert encode_continuation_token(None) is None
+    assert decode_continuation_token(None) is None
+
+
+def test_decode_continuation_token_should_fail_with_invalid_token():
+    try:
+        decode_continuation_token('not-a-valid-token')
+
+        fail('It should have failed')
+    except Exception as e:
+        assert type(e) is CustomError
+        assert e.code == 400
+
+
+@pytest.mark.parametrize(
+    "page_size,expected_page_size",
+    [
+        (None, MAX_PAGE_SIZE),
+        (0, MAX_PAGE_SIZE),
+        (-1, MAX_PAGE_SIZE),
+        (10, 10),
+        (MAX_PAGE_SIZE + 1, MAX_PAGE_SIZE),
+        (9999, MAX_PAGE_SIZE),
+    ],
+)
+def test_get_cursor_page_size_never_exceeds_the_max_page_size(
+    cosmos_db_repository: CosmosDBRepository, page_size, expected_page_size
+):
+    assert (
+        cosmos_db_repository.get_cursor_page_size(page_size)
+        == expected_page_size
+    )
+
+
+def test_find_all_by_page_returns_items_and_next_token(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    pages = mocker.Mock()
+    pages.__next__ = mocker.Mock(return_value=iter([{'id': '1'}, {'id': '2'}]))
+    pages.continuation_token = 'next-page'
+    query_items_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'query_items'
+    )
+    query_items_mock.return_value.by_page.return_value = pages
+
+    items, next_token = cosmos_db_repository.find_all_by_page(
+        event_context,
+        page_size=2,
+        continuation_token=encode_continuation_token('current-page'),
+    )
+
+    _, kwargs = query_items_mock.call_args
+    assert kwargs['max_item_count'] == 2
+    assert 'OFFSET' not in kwargs['query']
+    query_items_mock.return_value.by_page.assert_called_once_with(
+        'current-page'
+    )
+    assert items == [{'id': '1'}, {'id': '2'}]
+    assert decode_continuation_token(next_token) == 'next-page'
+
+
+def test_iter_all_yields_mapped_items_page_by_page(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    query_items_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'query_items'
+    )
+    query_items_mock.return_value.by_page.return_value = iter(
+        [[{'id': '1'}, {'id': '2'}], [{'id': '3'}]]
+    )
+
+    result = cosmos_db_repository.iter_all(
+        event_context, page_size=2, mapper=lambda item: item['id']
+    )
+
+    query_items_mock.assert_not_called()
+    assert list(result) == ['1', '2', '3']
+    _, kwargs = query_items_mock.call_args
+    assert kwargs['max_item_count'] == 2
+    assert 'LIMIT' not in kwargs['query']
+
+
+def test_create_many_returns_a_result_per_item(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    def create_item(body):
+        if body['name'] == 'duplicated':
+            raise CosmosResourceExistsError(
+                message='Conflict', status_code=409
+            )
+        return body
+
+    mocker.patch.object(
+        cosmos_db_repository.container, 'create_item', side_effect=create_item
+    )
+    items = [{'name': 'first'}, {'name': 'duplicated'}, {'name': 'last'}]
+
+    results = cosmos_db_repository.create_many(items, event_context)
+
+    assert [result.status_code for result in results] == [201, 409, 201]
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert results[0].item['name'] == 'first'
+    assert results[0].item['id'] is not None
+    assert results[2].item['name'] == 'last'
+
+
+def test_partial_update_with_current_item_does_not_read_it_again(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    read_item_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'read_item'
+    )
+    replace_item_mock = mocker.patch.object(
+        cosmos_db_repository.container,
+        'replace_item',
+        side_effect=lambda id, body, **kwargs: body,
+    )
+    current_item = {'id': 'id', 'name': 'old name', '_etag': '"etag-1"'}
+
+    updated_item = cosmos_db_repository.partial_update(
+        'id', {'name': 'new name'}, event_context, current_item=current_item
+    )
+
+    read_item_mock.assert_not_called()
+    assert updated_item['name'] == 'new name'
+    assert current_item['name'] == 'old name'
+    _, kwargs = replace_item_mock.call_args
+    assert kwargs['etag'] == '"etag-1"'
+    assert kwargs['match_condition'] == MatchConditions.IfNotModified
+
+
+def test_update_without_etag_replaces_unconditionally(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    replace_item_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'replace_item'
+    )
+
+    cosmos_db_repository.update('id', {'id': 'id'}, event_context)
+
+    _, kwargs = replace_item_mock.call_args
+    assert 'etag' not in kwargs
+    assert 'match_condition' not in kwargs
+
+
+@pytest.mark.parametrize(
+    "fields,expected_columns",
+    [
+        (None, None),
+        ([], None),
+        (['name'], ['c.id', 'c.tenant_id', 'c.name']),
+        (
+            ['id', 'name', 'email'],
+            ['c.id', 'c.tenant_id', 'c.name', 'c.email'],
+        ),
+    ],
+)
+def test_get_select_columns(
+    cosmos_db_repository: CosmosDBRepository, fields, expected_columns
+):
+    assert cosmos_db_repository.get_select_columns(fields) == expected_columns
+
+
+def test_find_all_only_selects_the_requested_fields(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    query_items_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'query_items', return_value=[]
+    )
+    mocker.patch.object(cosmos_db_repository, 'required_fields', ['age'])
+
+    cosmos_db_repository.find_all(event_context, fields=['name'])
+
+    _, kwargs = query_items_mock.call_args
+    assert 'SELECT c.id,c.tenant_id,c.age,c.name FROM c' in kwargs['query']
+
+
+@pytest.mark.parametrize(
+    "order_fields,expected_order_by",
+    [
+        (['start_date DESC'], 'ORDER BY c.start_date DESC'),
+        (['name'], 'ORDER BY c.name ASC'),
+    ],
+)
+def test_find_all_orders_by_the_order_fields(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    order_fields,
+    expected_order_by,
+    mocker,
+):
+    query_items_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'query_items', return_value=[]
+    )
+    mocker.patch.object(cosmos_db_repository, 'order_fields', order_fields)
+
+    cosmos_db_repository.find_all(event_context)
+
+    _, kwargs = query_items_mock.call_args
+    assert expected_order_by in kwargs['query']
+
+
+def test_find_all_by_page_orders_by_the_order_fields(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    query_items_mock = mocker.patch.object(
+        cosmos_db_repository.container,
+        'query_items',
+        wraps=cosmos_db_repository.container.query_items,
+    )
+    mocker.patch.object(
+        cosmos_db_repository, 'order_fields', ['start_date DESC']
+    )
+
+    cosmos_db_repository.find_all_by_page(event_context)
+
+    _, kwargs = query_items_mock.call_args
+    assert 'ORDER BY c.start_date DESC' in kwargs['query']
+
+
+def test_repository_registry_creates_one_repository_per_container(mocker):
+    registry = RepositoryRegistry()
+    factory = mocker.Mock(side_effect=lambda: mocker.Mock())
+
+    first = registry.get('project', factory)
+    second = registry.get('project', factory)
+    other = registry.get('customer', factory)
+
+    assert first is second
+    assert first is not other
+    assert factory.call_count == 2
+
+
+def test_repository_registry_warm_up_continues_after_a_failure(mocker):
+    registry = RepositoryRegistry()
+    failing_repository = registry.get('project', mocker.Mock)
+    failing_repository.warm_up.side_effect = Exception('Unavailable')
+    repository = registry.get('customer', mocker.Mock)
+
+    registry.warm_up(logger=mocker.Mock())
+
+    failing_repository.warm_up.assert_called_once()
+    repository.warm_up.assert_called_once()
+
+
+def test_warm_up_reads_the_container_and_runs_a_query(
+    cosmos_db_repository: CosmosDBRepository, mocker
+):
+    read_mock = mocker.patch.object(cosmos_db_repository.container, 'read')
+    query_items_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'query_items', return_value=[]
+    )
+
+    cosmos_db_repository.warm_up()
+
+    read_mock.assert_called_once()
+    _, kwargs = query_items_mock.call_args
+    assert kwargs['enable_cross_partition_query']
+
+
+def test_find_many_reads_each_id_once_and_skips_the_missing_items(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    items = {
+        '1': {'id': '1'},
+        '2': {'id': '2', 'deleted': fake.uuid4()},
+        '3': {'id': '3'},
+    }
+
+    def read_item(id, partition_key):
+        if id not in items:
+            raise CosmosResourceNotFoundError(status_code=404)
+        return items[id]
+
+    read_item_mock = mocker.patch.object(
+        cosmos_db_repository.container, 'read_item', side_effect=read_item
+    )
+
+    result = cosmos_db_repository.find_many(
+        ['3', '1', '3', 'missing', None, '2'], event_context
+    )
+
+    assert result == [{'id': '3'}, {'id': '1'}]
+    assert read_item_mock.call_count == 4
+
+
+def test_find_many_includes_the_deleted_items_if_not_visible_only(
+    cosmos_db_repository: CosmosDBRepository,
+    event_context: EventContext,
+    mocker,
+):
+    deleted_item = {'id': '1', 'deleted': fake.uuid4()}
+    mocker.patch.object(
+        cosmos_db_repository.container, 'read_item', return_value=deleted_item
+    )
+
+    result = cosmos_db_repository.find_many(
+        ['1'], event_context, visible_only=False
+    )
+
+    assert result == [deleted_item]
@@ -0,0 +1,299 @@
+from unittest.mock import Mock
+
+import pytest
+from azure.core import MatchConditions
+from azure.cosmos import PartitionKey
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+from commons.data_access_layer.in_memory_cosmos_db import (
+    InMemoryCosmosClient,
+    parse_query,
+)
+from time_tracker_api.time_entries.time_entries_query_builder import (
+    TimeEntryQueryBuilder,
+)
+from utils.query_builder import CosmosDBQueryBuilder, Order
+
+tenant_id = 'tenant'
+
+
+@pytest.fixture
+def container():
+    database = InMemoryCosmosClient().get_database_client('test')
+    return database.create_container(
+        id='items',
+        partition_key=PartitionKey(path='/tenant_id'),
+        unique_key_policy={'uniqueKeys': [{'paths': ['/name', '/deleted']}]},
+    )
+
+
+@pytest.fixture
+def entries(container):
+    items = [
+        {
+            'id': '1',
+            'name': 'a',
+            'owner_id': 'jon',
+            'start_date': '2021-01-01T10:00:00.000Z',
+            'end_date': '2021-01-01T12:00:00.000Z',
+        },
+        {
+            'id': '2',
+            'name': 'b',
+            'owner_id': 'jon',
+            'start_date': '2021-01-02T10:00:00.000Z',
+        },
+        {
+            'id': '3',
+            'name': 'c',
+            'owner_id': 'ana',
+            'start_date': '2021-01-03T10:00:00.000Z',
+            'end_date': None,
+            'deleted': 'x',
+        },
+    ]
+    for item in items:
+        container.create_item(dict(item, tenant_id=tenant_id))
+    return items
+
+
+def query_ids(container, query, parameters=None, **kwargs):
+    return [
+        item['id'] if isinstance(item, dict) else item
+        for item in container.query_items(
+            query,
+            parameters=parameters,
+            partition_key=tenant_id,
+            **kwargs,
+        )
+    ]
+
+
+def test_point_operations(container):
+    hook = Mock()
+    created = container.create_item(
+        {'id': '1', 'tenant_id': tenant_id, 'name': 'a'}, response_hook=hook
+    )
+
+    assert created['_etag']
+    assert container.read_item('1', tenant_id)['name'] == 'a'
+    headers, result = hook.call_args[0]
+    assert float(headers['x-ms-request-charge']) > 0
+
+    container.delete_item('1', tenant_id)
+    with pytest.raises(CosmosResourceNotFoundError):
+        container.read_item('1', tenant_id)
+
+
+def test_create_item_fails_on_duplicated_id_or_unique_key(container):
+    container.create_item({'id': '1', 'tenant_id': tenant_id, 'name': 'a'})
+
+    with pytest.raises(CosmosResourceExistsError):
+        container.create_item({'id': '1', 'tenant_id': tenant_id})
+    with pytest.raises(CosmosResourceExistsError):
+        container.create_item({'id': '2', 'tenant_id': tenant_id, 'name': 'a'})
+    container.create_item({'id': '2', 'tenant_id': 'other', 'name': 'a'})
+
+
+def test_replace_item_checks_the_etag(container):
+    item = container.create_item({'id': '1', 'tenant_id': tenant_id})
+    container.replace_item(
+        '1',
+        dict(item, name='b'),
+        etag=item['_etag'],
+        match_condition=MatchConditions.IfNotModified,
+    )
+
+    with pytest.raises(CosmosAccessConditionFailedError):
+        container.replace_item(
+            '1',
+            dict(item, name='c'),
+            etag=item['_etag'],
+            match_condition=MatchConditions.IfNotModified,
+        )
+
+
+def test_stored_items_are_not_shared_with_the_caller(container):
+    body = {'id': '1', 'tenant_id': tenant_id, 'tags': []}
+    container.create_item(body)
+    body['tags'].append('x')
+    container.read_item('1', tenant_id)['tags'].append('y')
+
+    assert container.read_item('1', tenant_id)['tags'] == []
+
+
+def test_operations_on_a_missing_container_fail():
+    database = InMemoryCosmosClient().get_database_client('test')
+    container = database.get_container_client('missing')
+
+    with pytest.raises(CosmosResourceNotFoundError):
+        container.read_item('1', tenant_id)
+
+
+@pytest.mark.parametrize(
+    'query,parameters,expected_ids',
+    [
+        ('SELECT * FROM c', None, ['1', '2', '3']),
+        (
+            'SELECT * FROM c WHERE c.owner_id = @owner_id',
+            [{'name': '@owner_id', 'value': 'jon'}],
+            ['1', '2'],
+        ),
+        ("SELECT * FROM c WHERE c.owner_id != 'jon'", None, ['3']),
+        ("SELECT * FROM c WHERE c.id IN ('1', '3')", None, ['1', '3']),
+        ("SELECT * FROM c WHERE c.id NOT IN ('1', '3')", None, ['2']),
+        (
+            'SELECT * FROM c WHERE ARRAY_CONTAINS(@ids, c.id)',
+            [{'name': '@ids', 'value': ['2', '3']}],
+            ['2', '3'],
+        ),
+        ('SELECT * FROM c WHERE NOT IS_DEFINED(c.deleted)', None, ['1', '2']),
+        (
+            'SELECT * FROM c WHERE NOT IS_DEFINED(c.end_date) '
+            'OR c.end_date = null',
+            None,
+            ['2', '3'],
+        ),
+        (
+            'SELECT * FROM c WHERE c.end_date BETWEEN @start AND @end',
+            [
+                {'name': '@start', 'value': '2021-01-01T00:00:00.000Z'},
+                {'name': '@end', 'value': '2021-01-01T23:59:59.999Z'},
+            ],
+            ['1'],
+        ),
+        ('SELECT * FROM c WHERE c.end_date > c.start_date', None, ['1']),
+        ('SELECT * FROM c ORDER BY c.start_date DESC', None, ['3', '2', '1']),
+        ('SELECT TOP 2 * FROM c ORDER BY c.name', None, ['1', '2']),
+        (
+            'SELECT * FROM c ORDER BY c.name OFFSET @offset LIMIT @limit',
+            [{'name': '@offset', 'value': 1}, {'name': '@limit', 'value': 1}],
+            ['2'],
+        ),
+    ],
+)
+def test_query_items(container, entries, query, parameters, expected_ids):
+    assert query_ids(container, query, parameters) == expected_ids
+
+
+def test_query_items_count_and_projection(container, entries):
+    assert query_ids(container, 'SELECT VALUE COUNT(1) FROM c') == [3]
+    assert (
+        list(
+            container.query_items(
+                'SELECT c.id, c.end_date FROM c WHERE c.id = "2"',
+                partition_key=tenant_id,
+            )
+        )
+        == [{'id': '2'}]
+    )
+
+
+def test_query_items_understands_the_query_builders(container, entries):
+    query_builder = (
+        TimeEntryQueryBuilder(parameterize_lists=True)
+        .add_select_conditions(['c.id', 'c.owner_id'])
+        .add_sql_in_condition('owner_id', ['jon', 'ana'])
+        .add_sql_date_range_condition(
+            {
+                'start_date': '2021-01-01T11:00:00.000Z',
+                'end_date': '2021-01-02T11:00:00.000Z',
+            }
+        )
+        .add_sql_visibility_condition(True)
+        .add_sql_order_by_condition('start_date', Order.DESC)
+        .add_sql_offset_condition(0)
+        .add_sql_limit_condition(10)
+        .build()
+    )
+
+    assert query_ids(
+        container, query_builder.get_query(), query_builder.get_parameters()
+    ) == ['2', '1']
+
+
+def test_query_items_pages_with_continuation_tokens(container, entries):
+    query_builder = CosmosDBQueryBuilder().build()
+    pages = container.query_items(
+        query_builder.get_query(), partition_key=tenant_id, max_item_count=2
+    ).by_page()
+
+    assert [item['id'] for item in next(pages)] == ['1', '2']
+    token = pages.continuation_token
+    assert token is not None
+
+    resumed = container.query_items(
+        query_builder.get_query(), partition_key=tenant_id, max_item_count=2
+    ).by_page(token)
+    assert [item['id'] for item in next(resumed)] == ['3']
+    assert resumed.continuation_token is None
+
+
+def test_query_items_requires_a_partition_or_cross_partition(container):
+    with pytest.raises(ValueError):
+        container.query_items('SELECT * FROM c')
+
+    assert (
+        list(
+            container.query_items(
+                'SELECT * FROM c', enable_cross_partition_query=True
+            )
+        )
+        == []
+    )
+
+
+def test_parse_query_rejects_unsupported_sql():
+    with pytest.raises(ValueError):
+        parse_query('SELECT * FROM c JOIN t IN c.tags')
+    with pytest.raises(ValueError):
+        parse_query('SELECT * FROM c WHERE STARTSWITH(c.name, "a")')
+
+
+def test_calls_wait_the_injected_latency(mocker):
+    sleep_mock = mocker.patch(
+        'commons.data_access_layer.in_memory_cosmos_db.time.sleep'
+    )
+    database = InMemoryCosmosClient(latency_ms=20).get_database_client('db')
+    container = database.create_container(
+        id='items', partition_key=PartitionKey(path='/tenant_id')
+    )
+
+    container.create_item({'id': '1', 'tenant_id': tenant_id})
+
+    sleep_mock.assert_called_once_with(0.02)
+
+
+def test_from_flask_config_uses_the_in_memory_client_for_its_uri():
+    from flask import Flask
+
+    from commons.data_access_layer.cosmos_db import (
+        IN_MEMORY_DATABASE_URI,
+        CosmosDBFacade,
+    )
+
+    app = Flask(__name__)
+    app.config.update(
+        COSMOS_DATABASE_URI=IN_MEMORY_DATABASE_URI,
+        DATABASE_NAME='test',
+        COSMOS_DATABASE_LATENCY_MS=5,
+    )
+
+    facade = CosmosDBFacade.from_flask_config(app)
+
+    assert isinstance(facade.client, InMemoryCosmosClient)
+    assert facade.client.latency_ms == 5
+
+
+def test_replace_item_with_another_id_renames_the_item(container):
+    item = container.create_item({'id': '1', 'tenant_id': tenant_id})
+
+    container.replace_item('1', dict(item, id='2'))
+
+    assert container.read_item('2', tenant_id)['id'] == '2'
+    with pytest.raises(CosmosResourceNotFoundError):
+        container.read_item('1', tenant_id)
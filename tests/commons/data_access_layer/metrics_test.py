@@ -0,0 +1,152 @@
+from unittest.mock import Mock
+
+import pytest
+from azure.core.paging import ItemPaged
+from flask import Flask
+
+from commons.data_access_layer import metrics
+from commons.data_access_layer.metrics import (
+    ChargeCollector,
+    CosmosDBCallMetric,
+    InstrumentedContainerProxy,
+    MetricsRegistry,
+    current_dao_method,
+    metrics_registry,
+    tag_dao_method,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics_registry.reset()
+    yield
+    metrics_registry.reset()
+
+
+def fake_container(**operations):
+    container = Mock(id='time_entry')
+
+    def answer(result, charge):
+        def operation(*args, response_hook=None, **kwargs):
+            response_hook({'x-ms-request-charge': str(charge)}, result)
+            return result
+
+        return operation
+
+    for name, (result, charge) in operations.items():
+        setattr(container, name, answer(result, charge))
+    return container
+
+
+def test_registry_aggregates_the_calls_by_endpoint_method_and_operation():
+    registry = MetricsRegistry()
+    for charge, container_id in [(1.0, 'a'), (2.0, 'a'), (10.0, 'b')]:
+        registry.record(
+            CosmosDBCallMetric(
+                container_id=container_id,
+                operation='read_item',
+                request_charge=charge,
+                duration_ms=charge,
+                item_count=1,
+            )
+        )
+
+    snapshot = registry.snapshot()
+
+    assert [a['container_id'] for a in snapshot] == ['b', 'a']
+    assert snapshot[1]['calls'] == 2
+    assert snapshot[1]['request_charge'] == 3.0
+    assert snapshot[1]['max_duration_ms'] == 2.0
+
+
+def test_charge_collector_ignores_the_lazy_result_of_queries():
+    collector = ChargeCollector()
+
+    collector({'x-ms-request-charge': '5'}, ItemPaged())
+    collector({'x-ms-request-charge': '2.5'}, [])
+
+    assert collector.pop() == 2.5
+    assert collector.pop() == 0.0
+
+
+def test_point_operations_are_recorded():
+    container = InstrumentedContainerProxy(
+        fake_container(read_item=({'id': 1}, 1.0))
+    )
+    current_dao_method.set('ProjectCosmosDBDao.get')
+
+    result = container.read_item(item='1', partition_key='tenant')
+
+    assert result == {'id': 1}
+    [aggregate] = metrics_registry.snapshot()
+    assert aggregate['operation'] == 'read_item'
+    assert aggregate['container_id'] == 'time_entry'
+    assert aggregate['dao_method'] == 'ProjectCosmosDBDao.get'
+    assert aggregate['request_charge'] == 1.0
+    current_dao_method.set(None)
+
+
+def test_failed_operations_are_recorded_too():
+    container = Mock(id='time_entry')
+    container.create_item.side_effect = ValueError
+    instrumented_container = InstrumentedContainerProxy(container)
+
+    with pytest.raises(ValueError):
+        instrumented_container.create_item(body={})
+
+    [aggregate] = metrics_registry.snapshot()
+    assert aggregate['operation'] == 'create_item'
+
+
+def test_queries_are_recorded_per_page():
+    pages = Mock(continuation_token='token')
+    pages.__next__ = Mock(side_effect=[iter([1, 2]), iter([3])])
+    item_paged = Mock()
+    item_paged.by_page.return_value = pages
+    container = Mock(id='time_entry')
+    container.query_items.return_value = item_paged
+
+    result = InstrumentedContainerProxy(container).query_items(query='')
+    page_iterator = result.by_page('previous')
+
+    assert list(next(page_iterator)) == [1, 2]
+    assert page_iterator.continuation_token == 'token'
+    assert list(next(page_iterator)) == [3]
+    item_paged.by_page.assert_called_once_with('previous')
+    [aggregate] = metrics_registry.snapshot()
+    assert aggregate['calls'] == 2
+    assert aggregate['item_count'] == 3
+
+
+def test_tag_dao_method_uses_the_name_of_the_calling_method():
+    class DummyDao:
+        def create_event_context(self):
+            tag_dao_method(self)
+
+        def get_all(self):
+            self.create_event_context()
+
+    DummyDao().get_all()
+
+    assert current_dao_method.get() == 'DummyDao.get_all'
+    current_dao_method.set(None)
+
+
+def test_responses_include_the_request_charge_headers():
+    app = Flask(__name__)
+    metrics.init_app(app)
+    container = InstrumentedContainerProxy(
+        fake_container(read_item=({}, 2.0), create_item=({}, 5.5))
+    )
+
+    @app.route('/')
+    def index():
+        container.read_item(item='1', partition_key='tenant')
+        container.create_item(body={})
+        return ''
+
+    response = app.test_client().get('/')
+
+    assert response.headers['X-RU-Charge'] == '7.50'
+    assert 'desc="2 calls, 7.50 RU"' in response.headers['Server-Timing']
+    assert metrics_registry.snapshot()[0]['endpoint'] == 'index'
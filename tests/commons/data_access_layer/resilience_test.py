@@ -0,0 +1,272 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from azure.cosmos import PartitionKey
+from azure.cosmos.exceptions import (
+    CosmosHttpResponseError,
+    CosmosResourceNotFoundError,
+)
+from flask import Flask
+from werkzeug.exceptions import ServiceUnavailable
+
+from commons.data_access_layer import resilience
+from commons.data_access_layer.in_memory_cosmos_db import InMemoryCosmosClient
+from commons.data_access_layer.resilience import (
+    AdaptiveConcurrencyLimiter,
+    LimiterRegistry,
+    ResilientContainerProxy,
+    ThrottlingRetryPolicy,
+)
+
+
+def throttled(retry_after_ms: int = 100) -> CosmosHttpResponseError:
+    error = CosmosHttpResponseError(status_code=429, message='throttled')
+    error.headers = {'x-ms-retry-after-ms': str(retry_after_ms)}
+    return error
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def timer() -> FakeTimer:
+    return FakeTimer()
+
+
+@pytest.fixture
+def retry_policy(timer) -> ThrottlingRetryPolicy:
+    return ThrottlingRetryPolicy(
+        max_retries=3,
+        max_wait_seconds=5,
+        base_delay_seconds=0.1,
+        random=lambda: 0.5,
+        sleep=Mock(side_effect=timer.sleep),
+        timer=timer,
+    )
+
+
+def test_throttled_calls_wait_the_retry_after_plus_the_jitter(retry_policy):
+    func = Mock(side_effect=[throttled(200), throttled(200), 'result'])
+    on_throttle = Mock()
+
+    result = retry_policy.call(func, on_throttle=on_throttle)
+
+    assert result == 'result'
+    assert [c[0][0] for c in retry_policy.sleep.call_args_list] == [
+        pytest.approx(0.2 + 0.5 * 0.1),
+        pytest.approx(0.2 + 0.5 * 0.2),
+    ]
+    assert on_throttle.call_count == 2
+
+
+def test_other_errors_are_not_retried(retry_policy):
+    func = Mock(side_effect=CosmosResourceNotFoundError(status_code=404))
+
+    with pytest.raises(CosmosResourceNotFoundError):
+        retry_policy.call(func)
+
+    func.assert_called_once()
+
+
+def test_the_error_is_raised_after_the_max_retries(retry_policy):
+    func = Mock(side_effect=throttled())
+
+    with pytest.raises(CosmosHttpResponseError):
+        retry_policy.call(func)
+
+    assert func.call_count == 4
+
+
+def test_the_error_is_raised_when_the_wait_would_be_too_long(retry_policy):
+    func = Mock(side_effect=[throttled(3000), throttled(3000), 'result'])
+
+    with pytest.raises(CosmosHttpResponseError):
+        retry_policy.call(func)
+
+    assert func.call_count == 2
+
+
+def test_the_limit_grows_by_one_after_a_window_of_successes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+    for _ in range(4):
+        limiter.run(lambda: None)
+
+    assert limiter.snapshot()['limit'] == 5
+
+
+def test_the_limit_is_halved_once_per_cooldown_when_throttled(timer):
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=16, decrease_cooldown_seconds=1, timer=timer
+    )
+
+    limiter.on_throttle()
+    limiter.on_throttle()
+    timer.now = 2
+    limiter.on_throttle()
+
+    assert limiter.snapshot() == {
+        'limit': 4,
+        'in_flight': 0,
+        'queue_depth': 0,
+        'throttled_count': 3,
+    }
+
+
+def test_the_calls_over_the_limit_wait_in_the_queue():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    waiting = threading.Thread(target=lambda: limiter.run(lambda: None))
+    waiting.start()
+    for _ in range(100):
+        if limiter.snapshot()['queue_depth'] == 1:
+            break
+        time.sleep(0.01)
+
+    assert limiter.snapshot()['queue_depth'] == 1
+
+    limiter.release()
+    waiting.join(1)
+
+    assert limiter.snapshot()['queue_depth'] == 0
+    assert limiter.snapshot()['in_flight'] == 0
+
+
+def test_a_call_that_waits_too_long_in_the_queue_fails():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=1, queue_timeout_seconds=0.01
+    )
+    limiter.acquire()
+
+    with pytest.raises(ServiceUnavailable):
+        limiter.acquire()
+
+    assert limiter.snapshot()['queue_depth'] == 0
+
+
+@pytest.fixture
+def container(mocker):
+    mocker.patch.object(
+        resilience,
+        'limiter_registry',
+        LimiterRegistry(AdaptiveConcurrencyLimiter),
+    )
+    mocker.patch.object(
+        resilience,
+        'retry_policy',
+        ThrottlingRetryPolicy(random=lambda: 0, sleep=Mock()),
+    )
+    container = (
+        InMemoryCosmosClient()
+        .get_database_client('test')
+        .create_container('customer', PartitionKey(path='/tenant_id'))
+    )
+    for id in range(5):
+        container.upsert_item({'id': str(id), 'tenant_id': 'tenant'})
+    return container
+
+
+def test_point_operations_are_retried_when_throttled(mocker, container):
+    mocker.patch.object(
+        container, '_start_call', side_effect=[throttled(), None]
+    )
+    proxy = ResilientContainerProxy(container)
+
+    item = proxy.read_item('1', partition_key='tenant')
+
+    assert item['id'] == '1'
+    assert proxy.limiter.snapshot()['throttled_count'] == 1
+
+
+def test_a_throttled_page_is_read_again_from_the_last_continuation(
+    mocker, container
+):
+    # The second page is throttled once
+    mocker.patch.object(
+        container, '_start_call', side_effect=[None, throttled(), None, None]
+    )
+    proxy = ResilientContainerProxy(container)
+
+    items = proxy.query_items(
+        'SELECT * FROM c ORDER BY c.id',
+        partition_key='tenant',
+        max_item_count=3,
+    )
+
+    assert [item['id'] for item in items] == ['0', '1', '2', '3', '4']
+    assert proxy.limiter.snapshot()['throttled_count'] == 1
+
+
+def test_a_throttled_change_feed_page_is_read_again(mocker, container):
+    mocker.patch.object(
+        container, '_start_call', side_effect=[throttled(), None, None]
+    )
+    proxy = ResilientContainerProxy(container)
+
+    items = proxy.query_items_change_feed(is_start_from_beginning=True)
+
+    assert [item['id'] for item in items] == ['0', '1', '2', '3', '4']
+    assert proxy.limiter.snapshot()['throttled_count'] == 1
+
+
+def test_the_containers_are_created_with_retries_when_throttled(mocker):
+    from commons.data_access_layer.cosmos_db import CosmosDBFacade
+
+    mocker.patch.object(
+        resilience,
+        'retry_policy',
+        ThrottlingRetryPolicy(random=lambda: 0, sleep=Mock()),
+    )
+    facade = CosmosDBFacade(InMemoryCosmosClient(), 'test')
+    errors = [throttled()]
+    create_container_if_not_exists = facade.db.create_container_if_not_exists
+
+    def throttled_once(**kwargs):
+        if errors:
+            raise errors.pop()
+        return create_container_if_not_exists(**kwargs)
+
+    mocker.patch.object(
+        facade.db,
+        'create_container_if_not_exists',
+        side_effect=throttled_once,
+    )
+
+    container = facade.create_container_if_not_exists(
+        {'id': 'customer', 'partition_key': PartitionKey(path='/tenant_id')}
+    )
+
+    assert container.id == 'customer'
+    assert facade.db.create_container_if_not_exists.call_count == 2
+
+
+def test_the_containers_share_one_limiter(container):
+    first = ResilientContainerProxy(container)
+    second = ResilientContainerProxy(container)
+
+    assert first.limiter is second.limiter
+    assert first.id == 'customer'
+
+
+def test_init_app_configures_the_retries_and_the_limiters(mocker):
+    mocker.patch.object(resilience, 'retry_policy')
+    mocker.patch.object(resilience, 'limiter_registry')
+    app = Flask(__name__)
+    app.config.update(
+        COSMOS_THROTTLING_MAX_RETRIES=2, COSMOS_CONCURRENCY_INITIAL_LIMIT=3
+    )
+
+    resilience.init_app(app)
+
+    assert resilience.retry_policy.max_retries == 2
+    assert resilience.limiter_registry.get('customer').limit == 3
@@ -0,0 +1,218 @@
+import json
+import logging
+from unittest.mock import Mock
+
+import pytest
+from azure.cosmos import PartitionKey
+from flask import Flask
+
+from commons.data_access_layer import slow_query_log
+from commons.data_access_layer.in_memory_cosmos_db import InMemoryCosmosClient
+from commons.data_access_layer.metrics import (
+    InstrumentedContainerProxy,
+    current_dao_method,
+)
+from commons.data_access_layer.slow_query_log import (
+    SlowQuery,
+    SlowQueryLog,
+    get_retrieved_document_count,
+    normalize_query,
+    read_entries,
+    summarize,
+)
+
+
+@pytest.mark.parametrize(
+    'query,expected',
+    [
+        (
+            "SELECT * FROM c\n   WHERE c.id = @id",
+            "SELECT * FROM c WHERE c.id = @id",
+        ),
+        (
+            "SELECT * FROM c WHERE c.status = 'active' OFFSET 0 LIMIT 10",
+            "SELECT * FROM c WHERE c.status = ? OFFSET ? LIMIT ?",
+        ),
+        (
+            "SELECT * FROM c WHERE c.id IN ('a', 'b', 'c')",
+            "SELECT * FROM c WHERE c.id IN (?)",
+        ),
+        (
+            "SELECT TOP 5 c.id_2 FROM c WHERE c.x = @not_in_id_2",
+            "SELECT TOP ? c.id_2 FROM c WHERE c.x = @not_in_id_2",
+        ),
+    ],
+)
+def test_normalize_query_removes_the_literal_values(query, expected):
+    assert normalize_query(query) == expected
+
+
+def test_get_retrieved_document_count_reads_the_query_metrics():
+    headers = {
+        'x-ms-documentdb-query-metrics': (
+            'totalExecutionTimeInMs=1.5;retrievedDocumentCount=120;'
+            'outputDocumentCount=3'
+        )
+    }
+
+    assert get_retrieved_document_count(headers) == 120
+    assert get_retrieved_document_count({}) is None
+
+
+@pytest.fixture
+def log_records() -> list:
+    return []
+
+
+@pytest.fixture
+def query_log(log_records) -> SlowQueryLog:
+    logger = Mock(spec=logging.Logger)
+    logger.info.side_effect = lambda line: log_records.append(json.loads(line))
+    return SlowQueryLog(
+        logger, duration_threshold_ms=10_000, request_charge_threshold=4
+    )
+
+
+@pytest.fixture
+def container(mocker, query_log):
+    mocker.patch.object(slow_query_log, 'slow_query_log', query_log)
+    container = (
+        InMemoryCosmosClient()
+        .get_database_client('test')
+        .create_container('time_entry', PartitionKey(path='/tenant_id'))
+    )
+    for id in range(40):
+        container.upsert_item(
+            {'id': str(id), 'tenant_id': 'tenant', 'owner_id': str(id % 4)}
+        )
+    return InstrumentedContainerProxy(container)
+
+
+def test_the_queries_over_a_threshold_are_logged(container, log_records):
+    current_dao_method.set('TimeEntriesCosmosDBDao.get_all')
+
+    items = container.query_items(
+        query="SELECT * FROM c WHERE c.owner_id = @owner_id OFFSET 0 LIMIT 5",
+        parameters=[{'name': '@owner_id', 'value': '1'}],
+        partition_key='tenant',
+        max_item_count=2,
+    )
+    list(items)
+    current_dao_method.set(None)
+
+    [entry] = log_records
+    assert entry['query'] == (
+        "SELECT * FROM c WHERE c.owner_id = @owner_id OFFSET ? LIMIT ?"
+    )
+    assert entry['parameters'] == ['@owner_id']
+    assert entry['partition_key'] == 'tenant'
+    assert entry['item_count'] == 5
+    assert entry['page_count'] == 3
+    assert entry['retrieved_document_count'] == 40
+    assert entry['dao_method'] == 'TimeEntriesCosmosDBDao.get_all'
+    assert entry['request_charge'] >= 4
+
+
+def test_a_query_read_partially_is_logged_when_it_is_released(
+    container, log_records
+):
+    pages = container.query_items(
+        query="SELECT * FROM c",
+        partition_key='tenant',
+        max_item_count=5,
+    ).by_page()
+    next(pages)
+
+    assert log_records == []
+    del pages
+    assert [e['item_count'] for e in log_records] == [5]
+
+
+def test_the_cheap_queries_are_not_logged(container, log_records):
+    list(
+        container.query_items(
+            query="SELECT TOP 1 * FROM c", enable_cross_partition_query=True
+        )
+    )
+
+    list(
+        container.query_items(
+            query="SELECT * FROM c WHERE c.id = @id",
+            parameters=[{'name': '@id', 'value': '1'}],
+            partition_key='other',
+        )
+    )
+
+    assert log_records == []
+
+
+def test_only_a_sample_of_the_slow_queries_is_logged(log_records):
+    logger = Mock(spec=logging.Logger)
+    query_log = SlowQueryLog(
+        logger,
+        request_charge_threshold=1,
+        sample_rate=0.5,
+        random=Mock(side_effect=[0.2, 0.7]),
+    )
+    entry = SlowQuery('time_entry', 'SELECT * FROM c', [], None, 5.0)
+
+    query_log.record(entry)
+    query_log.record(entry)
+
+    assert logger.info.call_count == 1
+
+
+def entry(container_id='time_entry', query='SELECT * FROM c', **values):
+    return {
+        'container_id': container_id,
+        'query': query,
+        'parameters': [],
+        'partition_key': 'tenant',
+        'request_charge': 10.0,
+        'duration_ms': 100.0,
+        'item_count': 1,
+        'retrieved_document_count': 50,
+        'dao_method': 'TimeEntriesCosmosDBDao.get_all',
+        **values,
+    }
+
+
+def test_summarize_groups_the_entries_by_query():
+    summary = summarize(
+        [
+            entry(),
+            entry(request_charge=30.0, duration_ms=300.0, partition_key=None),
+            entry(container_id='project', request_charge=100.0),
+        ]
+    )
+
+    assert [(s['container_id'], s['count']) for s in summary] == [
+        ('project', 1),
+        ('time_entry', 2),
+    ]
+    assert summary[1]['request_charge'] == 40.0
+    assert summary[1]['avg_duration_ms'] == 200.0
+    assert summary[1]['max_duration_ms'] == 300.0
+    assert summary[1]['retrieved_document_count'] == 100
+    assert summary[1]['cross_partition'] is True
+    assert summary[1]['dao_methods'] == ['TimeEntriesCosmosDBDao.get_all']
+
+
+def test_init_app_writes_the_entries_to_a_rotating_file(mocker, tmpdir):
+    filename = str(tmpdir.join('slow_queries.log'))
+    mocker.patch.object(slow_query_log, 'slow_query_log')
+    app = Flask(__name__)
+    app.config.update(
+        SLOW_QUERY_LOG_ENABLED=True,
+        SLOW_QUERY_LOG_FILE=filename,
+        SLOW_QUERY_LOG_REQUEST_CHARGE=1,
+    )
+
+    slow_query_log.init_app(app)
+    slow_query_log.slow_query_log.record(
+        SlowQuery('time_entry', 'SELECT * FROM c', [], 'tenant', 5.0)
+    )
+    for handler in slow_query_log.slow_query_log.logger.handlers:
+        handler.flush()
+
+    assert [e['query'] for e in read_entries(filename)] == ['SELECT * FROM c']
@@ -87,4 +87,23 @@ def test__find_all_from_blob_storage__return_empty_list__when_send_event_context
       event_context=event_context,
       file_name="incorrect.json"
     )
-    assert result == []
\ No newline at end of file
+    assert result == []
+
+@patch('commons.data_access_layer.file.FileStream.get_file_stream')
+def test__find_all_from_blob_storage__downloads_the_file_once(
+    get_file_stream_mock,
+    event_context: EventContext,
+    activity_repository: ActivityCosmosDBRepository,
+):
+    get_file_stream_mock.return_value = (
+        '[{"id": "1", "name": "activity", "status": "active"}]'
+    )
+    activity_repository.files.clear()
+
+    for _ in range(2):
+        result = activity_repository.find_all_from_blob_storage(
+            event_context=event_context, file_name="cached.json"
+        )
+
+    assert [activity.id for activity in result] == ['1']
+    get_file_stream_mock.assert_called_once_with("cached.json")
@@ -84,3 +84,60 @@ def test_add_update_last_entry_if_overlap():
         'update_last_entry_if_overlap'
     )
     assert update_last_entry_if_overlap is not None
+
+
+def test_add_fields_argument_parses_the_attributes_of_the_model(app):
+    from time_tracker_api.api import add_fields_argument
+    from time_tracker_api.projects.projects_namespace import project, ns
+
+    parser = add_fields_argument(ns.parser(), project)
+
+    with app.test_request_context('/?fields=id, name,,customer_id'):
+        assert parser.parse_args() == {'fields': ['id', 'name', 'customer_id']}
+
+    with app.test_request_context('/'):
+        assert parser.parse_args() == {}
+
+
+def test_add_fields_argument_rejects_unknown_attributes(app):
+    from time_tracker_api.api import add_fields_argument
+    from time_tracker_api.projects.projects_namespace import project, ns
+    from werkzeug.exceptions import BadRequest
+
+    parser = add_fields_argument(ns.parser(), project)
+
+    with app.test_request_context('/?fields=name,password'):
+        try:
+            parser.parse_args()
+
+            fail("It was expected to fail")
+        except Exception as e:
+            assert type(e) is BadRequest
+
+
+def test_select_fields_keeps_the_id_and_the_requested_attributes(app):
+    from time_tracker_api.api import select_fields
+
+    @select_fields
+    def get():
+        return [{'id': '1', 'name': 'a', 'description': 'b'}]
+
+    with app.test_request_context('/?fields=name'):
+        assert get() == [{'id': '1', 'name': 'a'}]
+
+    with app.test_request_context('/'):
+        assert get() == [{'id': '1', 'name': 'a', 'description': 'b'}]
+
+
+def test_throttled_cosmos_errors_are_returned_as_too_many_requests(app):
+    from azure.cosmos.exceptions import CosmosHttpResponseError
+    from time_tracker_api.api import handle_cosmos_http_response_error
+
+    error = CosmosHttpResponseError(status_code=429, message='throttled')
+    error.headers = {'x-ms-retry-after-ms': '1500'}
+
+    with app.app_context():
+        body, status, headers = handle_cosmos_http_response_error(error)
+
+    assert status == 429
+    assert headers == {'Retry-After': '2'}
@@ -305,7 +305,32 @@ def test_list_all_active_customers(
     json_data = json.loads(response.data)
     assert [] == json_data
 
-    repository_find_all_mock.assert_called_once_with(ANY, conditions={})
+    repository_find_all_mock.assert_called_once_with(
+        ANY, conditions={}, fields=None
+    )
+
+
+def test_list_customers_with_fields_only_returns_those_attributes(
+    client: FlaskClient, mocker: MockFixture, valid_header: dict
+):
+    from time_tracker_api.customers.customers_namespace import customer_dao
+
+    repository_find_all_mock = mocker.patch.object(
+        customer_dao.repository,
+        'find_all',
+        return_value=[{'id': fake.uuid4(), 'name': fake.company()}],
+    )
+
+    response = client.get(
+        "/customers?fields=name", headers=valid_header, follow_redirects=True
+    )
+
+    assert HTTPStatus.OK == response.status_code
+    [json_customer] = json.loads(response.data)
+    assert set(json_customer) == {'id', 'name'}
+    repository_find_all_mock.assert_called_once_with(
+        ANY, conditions={}, fields=['name']
+    )
 
 
 # def test_list_only_active_customers(
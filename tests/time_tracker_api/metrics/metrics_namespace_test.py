@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from flask import Flask, json
+from flask.testing import FlaskClient
+from flask_restplus._http import HTTPStatus
+
+from commons.data_access_layer.metrics import (
+    CosmosDBCallMetric,
+    metrics_registry,
+)
+from time_tracker_api.security import get_or_generate_dev_secret_key
+
+
+@pytest.fixture
+def admin_header(app: Flask, tenant_id: str, owner_id: str) -> dict:
+    with app.app_context():
+        admin_jwt = jwt.encode(
+            {
+                "iss": "https://ioetec.b2clogin.com/%s/v2.0/" % tenant_id,
+                "oid": owner_id,
+                "extension_role": "time-tracker-admin",
+                'exp': datetime.utcnow() + timedelta(seconds=3600),
+            },
+            key=get_or_generate_dev_secret_key(),
+        ).decode("UTF-8")
+    return {'Authorization': "Bearer %s" % admin_jwt}
+
+
+def test_list_cosmos_db_metrics_returns_the_aggregates(
+    client: FlaskClient, admin_header: dict
+):
+    metrics_registry.reset()
+    metrics_registry.record(
+        CosmosDBCallMetric(
+            container_id='time_entry',
+            operation='query_items',
+            request_charge=3.5,
+            duration_ms=12.0,
+            item_count=10,
+            endpoint='time-entries_time_entries',
+            dao_method='TimeEntriesCosmosDBDao.get_all',
+        )
+    )
+
+    response = client.get("/metrics/cosmos-db", headers=admin_header)
+
+    assert HTTPStatus.OK == response.status_code
+    [aggregate] = json.loads(response.data)
+    assert aggregate['container_id'] == 'time_entry'
+    assert aggregate['calls'] == 1
+    assert aggregate['request_charge'] == 3.5
+    metrics_registry.reset()
+
+
+@pytest.mark.parametrize(
+    'url', ["/metrics/cosmos-db", "/metrics/cosmos-db/concurrency"]
+)
+def test_the_metrics_are_only_for_the_admins(
+    client: FlaskClient, valid_header: dict, url: str
+):
+    assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+    assert (
+        client.get(url, headers=valid_header).status_code
+        == HTTPStatus.FORBIDDEN
+    )
+
+
+def test_list_cosmos_db_concurrency_returns_the_limiters(
+    client: FlaskClient, admin_header: dict, mocker
+):
+    from commons.data_access_layer import resilience
+    from commons.data_access_layer.resilience import (
+        AdaptiveConcurrencyLimiter,
+        LimiterRegistry,
+    )
+
+    registry = LimiterRegistry(lambda: AdaptiveConcurrencyLimiter(8))
+    registry.get('time_entry')
+    mocker.patch.object(resilience, 'limiter_registry', registry)
+
+    response = client.get(
+        "/metrics/cosmos-db/concurrency", headers=admin_header
+    )
+
+    assert HTTPStatus.OK == response.status_code
+    assert json.loads(response.data) == [
+        {
+            'container_id': 'time_entry',
+            'limit': 8,
+            'in_flight': 0,
+            'queue_depth': 0,
+            'throttled_count': 0,
+        }
+    ]
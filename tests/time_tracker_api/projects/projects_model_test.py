@@ -138,14 +138,23 @@ def test_get_all_projects_with_customers(
     )
     projects_repository_find_all_mock.return_value = [expected_project]
 
-    project_type_dao_get_all_mock = mocker.patch.object(
-        ProjectTypeCosmosDBDao, 'get_all'
+    customer_dao_get_many_mock = mocker.patch.object(
+        CustomerCosmosDBDao, 'get_many'
     )
-    project_type_dao_get_all_mock.return_value = [expected_project_type]
+    customer_dao_get_many_mock.return_value = [expected_customer]
+
+    project_type_dao_get_many_mock = mocker.patch.object(
+        ProjectTypeCosmosDBDao, 'get_many'
+    )
+    project_type_dao_get_many_mock.return_value = [expected_project_type]
     projects = create_dao().get_all()
 
+    customer_dao_get_many_mock.assert_called_once_with([customer_id])
+    project_type_dao_get_many_mock.assert_called_once_with([project_type_id])
     assert isinstance(projects[0], ProjectCosmosDBModel)
     assert projects[0].__dict__['customer_name'] == customer_data['name']
+    assert projects[0].__dict__['customer'] is expected_customer
+    assert projects[0].__dict__['project_type'] is expected_project_type
     assert len(projects) == 1
 
 
@@ -0,0 +1,74 @@
+from unittest.mock import Mock
+
+import pytest
+
+from commons.data_access_layer.cache import LocalCacheBackend, RepositoryCache
+from time_tracker_api.time_entries import time_entries_count_cache
+from time_tracker_api.time_entries.time_entries_count_cache import (
+    TimeEntryCountCache,
+    invalidate_changes,
+)
+
+
+@pytest.fixture
+def count_cache() -> TimeEntryCountCache:
+    return TimeEntryCountCache(
+        RepositoryCache(LocalCacheBackend()), 'time_entry'
+    )
+
+
+def get_or_count(count_cache, owner_ids, count, key='filters'):
+    return count_cache.get_or_count('tenant', owner_ids, key, count)
+
+
+def test_the_count_of_a_filter_is_computed_once(count_cache):
+    count = Mock(return_value=10)
+
+    assert get_or_count(count_cache, ['owner'], count) == 10
+    assert get_or_count(count_cache, ['owner'], count) == 10
+    get_or_count(count_cache, ['owner'], count, key='other filters')
+
+    assert count.call_count == 2
+
+
+def test_a_write_only_discards_the_counts_of_its_owner(count_cache):
+    count = Mock(return_value=10)
+    get_or_count(count_cache, ['owner'], count)
+    get_or_count(count_cache, ['other'], count)
+    get_or_count(count_cache, None, count)
+
+    count_cache.invalidate('tenant', 'owner')
+    get_or_count(count_cache, ['owner'], count)
+    get_or_count(count_cache, ['other'], count)
+    get_or_count(count_cache, None, count)
+
+    assert count.call_count == 5
+
+
+def test_a_write_of_an_unknown_owner_discards_the_counts_of_the_tenant(
+    count_cache,
+):
+    count = Mock(return_value=10)
+    get_or_count(count_cache, ['owner'], count)
+
+    count_cache.invalidate('tenant')
+    get_or_count(count_cache, ['owner'], count)
+    count_cache.invalidate('other tenant')
+    get_or_count(count_cache, ['owner'], count)
+
+    assert count.call_count == 2
+
+
+def test_the_changes_of_other_processes_discard_the_counts(
+    mocker, count_cache
+):
+    mocker.patch.object(time_entries_count_cache, 'count_cache', count_cache)
+    count = Mock(return_value=10)
+    get_or_count(count_cache, ['owner'], count)
+
+    invalidate_changes(
+        'time_entry', [{'id': '1', 'tenant_id': 'tenant', 'owner_id': 'owner'}]
+    )
+    get_or_count(count_cache, ['owner'], count)
+
+    assert count.call_count == 2
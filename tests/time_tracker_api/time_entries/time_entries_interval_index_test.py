@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from time_tracker_api.time_entries.time_entries_interval_index import (
+    TimeEntryIntervalIndexes,
+)
+from utils.time import current_datetime, datetime_str
+
+
+def hours_ago(hours: float) -> str:
+    return datetime_str(current_datetime() - timedelta(hours=hours))
+
+
+def entry(id: str, start_date: str, end_date: str, **values) -> dict:
+    return {
+        'id': id,
+        'start_date': start_date,
+        'end_date': end_date,
+        'owner_id': 'owner',
+        'tenant_id': 'tenant',
+        **values,
+    }
+
+
+@pytest.fixture
+def entries() -> list:
+    return [entry('1', hours_ago(10), hours_ago(9))]
+
+
+@pytest.fixture
+def load(entries) -> Mock:
+    return Mock(side_effect=lambda end_date_from: entries)
+
+
+@pytest.fixture
+def interval_indexes() -> TimeEntryIntervalIndexes:
+    return TimeEntryIntervalIndexes(window_days=1)
+
+
+def find_interception(interval_indexes, load, start_date, end_date, **kwargs):
+    return interval_indexes.find_interception(
+        'tenant', 'owner', start_date, end_date, load, **kwargs
+    )
+
+
+def test_the_index_of_a_user_is_loaded_once(interval_indexes, load):
+    assert find_interception(
+        interval_indexes, load, hours_ago(9.5), hours_ago(8)
+    )
+    assert not find_interception(
+        interval_indexes, load, hours_ago(9), hours_ago(8)
+    )
+    assert not find_interception(
+        interval_indexes, load, hours_ago(9.5), hours_ago(8), ignore_id='1'
+    )
+
+    load.assert_called_once()
+
+
+def test_ranges_before_the_window_are_left_to_the_database(
+    interval_indexes, load
+):
+    result = find_interception(
+        interval_indexes, load, hours_ago(48), hours_ago(47)
+    )
+
+    assert result is None
+
+
+def test_the_writes_update_the_loaded_index(interval_indexes, load):
+    find_interception(interval_indexes, load, hours_ago(2), hours_ago(1))
+
+    interval_indexes.apply(entry('2', hours_ago(2), hours_ago(1)))
+    assert find_interception(
+        interval_indexes, load, hours_ago(1.5), hours_ago(0.5)
+    )
+
+    interval_indexes.apply(
+        entry('2', hours_ago(2), hours_ago(1), deleted='uuid')
+    )
+    assert not find_interception(
+        interval_indexes, load, hours_ago(1.5), hours_ago(0.5)
+    )
+
+    interval_indexes.remove('tenant', '1')
+    assert not find_interception(
+        interval_indexes, load, hours_ago(9.5), hours_ago(8)
+    )
+
+
+def test_running_entries_are_not_interceptions(interval_indexes, load):
+    interval_indexes.apply(entry('2', hours_ago(2), None))
+
+    assert not find_interception(
+        interval_indexes, load, hours_ago(1.5), hours_ago(0.5)
+    )
+
+
+def test_an_index_written_while_loading_is_not_used(interval_indexes):
+    def load(end_date_from):
+        interval_indexes.apply(entry('2', hours_ago(2), hours_ago(1)))
+        return []
+
+    result = find_interception(
+        interval_indexes, load, hours_ago(1.5), hours_ago(0.5)
+    )
+
+    assert result is None
+
+
+def test_the_indexes_expire_after_the_ttl(load):
+    interval_indexes = TimeEntryIntervalIndexes(window_days=1, ttl_seconds=0)
+
+    find_interception(interval_indexes, load, hours_ago(2), hours_ago(1))
+    find_interception(interval_indexes, load, hours_ago(2), hours_ago(1))
+
+    assert load.call_count == 2
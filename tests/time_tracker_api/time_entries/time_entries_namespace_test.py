@@ -414,7 +414,7 @@ def test_update_time_entry_calls_partial_update_with_incoming_payload(
 
     assert HTTPStatus.OK == response.status_code
     time_entries_dao.repository.partial_update.assert_called_once_with(
-        valid_id, valid_time_entry_input_to_update, ANY
+        valid_id, valid_time_entry_input_to_update, ANY, current_item={}
     )
 
     time_entries_dao.repository.find.assert_called_once()
@@ -473,7 +473,7 @@ def test_update_time_entry_raise_not_found(
 
     assert HTTPStatus.NOT_FOUND == response.status_code
     time_entries_dao.repository.partial_update.assert_called_once_with(
-        valid_id, valid_time_entry_input_to_update, ANY
+        valid_id, valid_time_entry_input_to_update, ANY, current_item={}
     )
 
     time_entries_dao.repository.find.assert_called_once()
@@ -487,7 +487,7 @@ def test_delete_time_entry_calls_delete(
     time_entries_dao,
 ):
     time_entries_dao.repository.delete = Mock(return_value=None)
-    time_entries_dao.repository.find = Mock()
+    time_entries_dao.repository.find = Mock(return_value={})
     time_entries_dao.check_whether_current_user_owns_item = Mock()
     response = client.delete(
         f'/time-entries/{valid_id}',
@@ -497,7 +497,9 @@ def test_delete_time_entry_calls_delete(
 
     assert HTTPStatus.NO_CONTENT == response.status_code
     assert b'' == response.data
-    time_entries_dao.repository.delete.assert_called_once_with(valid_id, ANY)
+    time_entries_dao.repository.delete.assert_called_once_with(
+        valid_id, ANY, current_item={}
+    )
     time_entries_dao.repository.find.assert_called_once()
     time_entries_dao.check_whether_current_user_owns_item.assert_called_once()
 
@@ -518,7 +520,7 @@ def test_delete_time_entry_raise_http_exception(
     time_entries_dao,
 ):
     time_entries_dao.repository.delete = Mock(side_effect=http_exception)
-    time_entries_dao.repository.find = Mock()
+    time_entries_dao.repository.find = Mock(return_value={})
     time_entries_dao.check_whether_current_user_owns_item = Mock()
 
     response = client.delete(
@@ -528,7 +530,9 @@ def test_delete_time_entry_raise_http_exception(
     )
 
     assert http_status == response.status_code
-    time_entries_dao.repository.delete.assert_called_once_with(valid_id, ANY)
+    time_entries_dao.repository.delete.assert_called_once_with(
+        valid_id, ANY, current_item={}
+    )
     time_entries_dao.repository.find.assert_called_once()
     time_entries_dao.check_whether_current_user_owns_item.assert_called_once()
 
@@ -553,7 +557,7 @@ def test_stop_time_entry_calls_partial_update(
 
     assert HTTPStatus.OK == response.status_code
     time_entries_dao.repository.partial_update.assert_called_once_with(
-        valid_id, {"end_date": ANY}, ANY
+        valid_id, {"end_date": ANY}, ANY, current_item={}
     )
     time_entries_dao.check_time_entry_is_not_stopped.assert_called_once()
     time_entries_dao.check_whether_current_user_owns_item.assert_called_once()
@@ -582,7 +586,7 @@ def test_stop_time_entry_raise_unprocessable_entity(
 
     assert HTTPStatus.UNPROCESSABLE_ENTITY == response.status_code
     time_entries_dao.repository.partial_update.assert_called_once_with(
-        valid_id, {"end_date": ANY}, ANY
+        valid_id, {"end_date": ANY}, ANY, current_item={}
     )
     time_entries_dao.check_whether_current_user_owns_item.assert_called_once()
     time_entries_dao.check_time_entry_is_not_stopped.assert_called_once()
@@ -608,7 +612,7 @@ def test_restart_time_entry_calls_partial_update(
 
     assert HTTPStatus.OK == response.status_code
     time_entries_dao.repository.partial_update.assert_called_once_with(
-        valid_id, {"end_date": None}, ANY
+        valid_id, {"end_date": None}, ANY, current_item={}
     )
     time_entries_dao.check_time_entry_is_not_started.assert_called_once()
     time_entries_dao.check_whether_current_user_owns_item.assert_called_once()
@@ -638,7 +642,7 @@ def test_restart_time_entry_raise_unprocessable_entity(
 
     assert HTTPStatus.UNPROCESSABLE_ENTITY == response.status_code
     time_entries_dao.repository.partial_update.assert_called_once_with(
-        valid_id, {"end_date": None}, ANY
+        valid_id, {"end_date": None}, ANY, current_item={}
     )
     time_entries_dao.check_time_entry_is_not_started.assert_called_once()
     time_entries_dao.check_whether_current_user_owns_item.assert_called_once()
@@ -900,7 +904,7 @@ def test_summary_is_called_with_date_range_from_worked_time_module(
 ):
     worked_time.date_range = Mock(return_value=worked_time.date_range())
     repository_find_all_mock = mocker.patch.object(
-        time_entries_dao.repository, 'find_all_entries', return_value=[]
+        time_entries_dao.repository, 'iter_all_entries', return_value=iter([])
     )
 
     response = client.get(
@@ -948,21 +952,26 @@ def test_paginated_response_contains_expected_props(
     assert 'records_total' in json.loads(response.data)
 
 
-def test_paginated_sends_max_count_and_offset_on_call_to_repository(
+def test_paginated_sends_page_size_and_continuation_token_to_repository(
     client: FlaskClient, valid_header: dict, time_entries_dao
 ):
-    time_entries_dao.repository.find_all = Mock(return_value=[])
+    time_entries_dao.repository.count = Mock(return_value=0)
+    time_entries_dao.repository.find_all_by_page = Mock(
+        return_value=([], 'next-token')
+    )
 
     response = client.get(
-        '/time-entries/paginated?start_date=2020-09-10T00:00:00-05:00&end_date=2020-09-10T23:59:59-05:00&timezone_offset=300&start=0&length=5',
+        '/time-entries/paginated?start_date=2020-09-10T00:00:00-05:00&end_date=2020-09-10T23:59:59-05:00&timezone_offset=300&continuation_token=current-token&length=5',
         headers=valid_header,
     )
 
-    time_entries_dao.repository.find_all.assert_called_once()
+    time_entries_dao.repository.find_all_by_page.assert_called_once()
 
-    _, kwargs = time_entries_dao.repository.find_all.call_args
-    assert 'max_count' in kwargs and kwargs['max_count'] is not None
-    assert 'offset' in kwargs and kwargs['offset'] is not None
+    _, kwargs = time_entries_dao.repository.find_all_by_page.call_args
+    assert kwargs['page_size'] == 5
+    assert kwargs['continuation_token'] == 'current-token'
+    assert 'offset' not in kwargs
+    assert json.loads(response.data)['continuation_token'] == 'next-token'
 
 
 def test_update_time_entry_calls_update_last_entry(
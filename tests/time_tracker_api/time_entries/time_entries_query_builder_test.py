@@ -61,6 +61,36 @@ def test_build_with_add_sql_interception_with_date_range_condition():
     )
 
 
+def test_add_sql_overlap_with_date_ranges_condition():
+    date_ranges = [
+        ("2021-01-19T05:07:00.000Z", "2021-01-20T00:00:00.000Z"),
+        ("2021-01-25T00:00:00.000Z", "2021-01-25T10:00:00.000Z"),
+    ]
+
+    query_builder = (
+        TimeEntryQueryBuilder()
+        .add_sql_overlap_with_date_ranges_condition(
+            date_ranges, include_running=True
+        )
+        .build()
+    )
+
+    expected_condition = """
+    ((NOT IS_DEFINED(c.end_date) OR c.end_date = null)
+    OR (c.start_date < @range_end_0 AND c.end_date > @range_start_0)
+    OR (c.start_date < @range_end_1 AND c.end_date > @range_start_1))
+    """
+    assert remove_white_spaces(
+        query_builder.where_conditions[0]
+    ) == remove_white_spaces(expected_condition)
+    assert query_builder.get_parameters() == [
+        {"name": "@range_start_0", "value": date_ranges[0][0]},
+        {"name": "@range_end_0", "value": date_ranges[0][1]},
+        {"name": "@range_start_1", "value": date_ranges[1][0]},
+        {"name": "@range_end_1", "value": date_ranges[1][1]},
+    ]
+
+
 def test_add_sql_is_running_time_entry_condition_should_update_where_conditions_list():
     query_builder = (
         TimeEntryQueryBuilder().add_sql_is_running_time_entry_condition()
@@ -50,10 +50,10 @@ def test_add_complementary_info_when_there_are_time_entries(
     time_entry_repository: TimeEntryCosmosDBRepository,
 ):
     projects_db_get_all_mock = mocker.patch.object(
-        ProjectCosmosDBDao, 'get_all'
+        ProjectCosmosDBDao, 'get_many'
     )
     activities_db_get_all_mock = mocker.patch.object(
-        ActivityCosmosDBDao, 'get_all'
+        ActivityCosmosDBDao, 'get_many'
     )
     users_mock = mocker.patch.object(AzureConnection, 'users')
 
@@ -102,3 +102,229 @@ def test_add_complementary_info_when_there_are_not_time_entries(
 
     assert message == 'Time entry not found'
     assert status_code == HTTPStatus.NOT_FOUND
+
+
+def test_find_overlapping_items_only_reports_entries_of_the_same_owner():
+    items = [
+        {
+            'owner_id': 'owner_1',
+            'start_date': '2021-03-22T10:00:00.000Z',
+            'end_date': '2021-03-22T11:00:00.000Z',
+        },
+        {
+            'owner_id': 'owner_1',
+            'start_date': '2021-03-22T11:00:00.000Z',
+            'end_date': '2021-03-22T12:00:00.000Z',
+        },
+        {
+            'owner_id': 'owner_1',
+            'start_date': '2021-03-22T11:30:00.000Z',
+            'end_date': '2021-03-22T11:45:00.000Z',
+        },
+        {
+            'owner_id': 'owner_2',
+            'start_date': '2021-03-22T10:30:00.000Z',
+            'end_date': '2021-03-22T11:30:00.000Z',
+        },
+    ]
+
+    result = TimeEntryCosmosDBRepository.find_overlapping_items(items)
+
+    assert result == {1, 2}
+
+
+def test_create_many_rejects_overlapping_entries_without_writing_them(
+    mocker,
+    time_entry_repository: TimeEntryCosmosDBRepository,
+    event_context,
+):
+    create_mock = mocker.patch.object(
+        TimeEntryCosmosDBRepository, 'create', return_value='created'
+    )
+    items = [
+        {
+            'owner_id': 'owner_1',
+            'start_date': '2021-03-22T10:00:00.000Z',
+            'end_date': '2021-03-22T11:00:00.000Z',
+        },
+        {
+            'owner_id': 'owner_1',
+            'start_date': '2021-03-22T10:30:00.000Z',
+            'end_date': '2021-03-22T12:00:00.000Z',
+        },
+        {
+            'owner_id': 'owner_1',
+            'start_date': '2021-03-22T13:00:00.000Z',
+            'end_date': '2021-03-22T14:00:00.000Z',
+        },
+    ]
+
+    results = time_entry_repository.create_many(items, event_context)
+
+    assert [result.status_code for result in results] == [
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+        HTTPStatus.UNPROCESSABLE_ENTITY,
+        HTTPStatus.CREATED,
+    ]
+    assert results[2].item == 'created'
+    create_mock.assert_called_once_with(items[2], event_context, mapper=None)
+
+
+def test_find_interception_with_date_range_asks_the_interval_index_first(
+    mocker, time_entry_repository: TimeEntryCosmosDBRepository
+):
+    from time_tracker_api.time_entries import time_entries_interval_index
+
+    interval_indexes = mocker.Mock(**{'find_interception.return_value': True})
+    mocker.patch.object(
+        time_entries_interval_index, 'interval_indexes', interval_indexes
+    )
+    query_items_mock = mocker.patch.object(
+        time_entry_repository.container, 'query_items'
+    )
+
+    result = time_entry_repository.find_interception_with_date_range(
+        time_entry_data['start_date'],
+        time_entry_data['end_date'],
+        'owner_id',
+        'tenant_id',
+    )
+
+    assert result is True
+    query_items_mock.assert_not_called()
+
+
+def test_find_interception_with_date_range_queries_when_the_index_misses(
+    mocker, time_entry_repository: TimeEntryCosmosDBRepository
+):
+    from time_tracker_api.time_entries import time_entries_interval_index
+
+    interval_indexes = mocker.Mock(**{'find_interception.return_value': None})
+    mocker.patch.object(
+        time_entries_interval_index, 'interval_indexes', interval_indexes
+    )
+    query_items_mock = mocker.patch.object(
+        time_entry_repository.container,
+        'query_items',
+        return_value=iter([]),
+    )
+
+    result = time_entry_repository.find_interception_with_date_range(
+        time_entry_data['start_date'],
+        time_entry_data['end_date'],
+        'owner_id',
+        'tenant_id',
+    )
+
+    assert result is False
+    query_items_mock.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    'is_valid,end_date,exist_collision_entries,expected_description',
+    [
+        (False, '2021-03-22T09:00:00.000Z', True, 'Related entities'),
+        (
+            True,
+            '2021-03-22T09:00:00.000Z',
+            True,
+            'You must end the time entry after it started',
+        ),
+        (
+            True,
+            time_entry_data['end_date'],
+            True,
+            'There is another time entry in that date range',
+        ),
+    ],
+)
+def test_validate_data_reports_the_errors_in_the_order_of_the_checks(
+    mocker,
+    event_context,
+    time_entry_repository: TimeEntryCosmosDBRepository,
+    is_valid,
+    end_date,
+    exist_collision_entries,
+    expected_description,
+):
+    mocker.patch(
+        'time_tracker_api.time_entries.time_entries_repository'
+        '.are_related_entry_entities_valid',
+        return_value={
+            'is_valid': is_valid,
+            'status_code': HTTPStatus.BAD_REQUEST,
+            'message': 'Related entities',
+        },
+    )
+    mocker.patch.object(
+        time_entry_repository,
+        'find_interception_with_date_range',
+        return_value=exist_collision_entries,
+    )
+
+    with pytest.raises(HTTPException) as error:
+        time_entry_repository.validate_data(
+            {**time_entry_data, 'end_date': end_date}, event_context
+        )
+
+    assert error.value.description == expected_description
+
+
+def test_validate_data_checks_the_related_entities_and_the_interceptions(
+    mocker,
+    event_context,
+    time_entry_repository: TimeEntryCosmosDBRepository,
+):
+    are_related_entry_entities_valid_mock = mocker.patch(
+        'time_tracker_api.time_entries.time_entries_repository'
+        '.are_related_entry_entities_valid',
+        return_value={'is_valid': True},
+    )
+    find_interception_mock = mocker.patch.object(
+        time_entry_repository,
+        'find_interception_with_date_range',
+        return_value=False,
+    )
+
+    time_entry_repository.validate_data(time_entry_data, event_context)
+
+    are_related_entry_entities_valid_mock.assert_called_once_with(
+        project_id=time_entry_data['project_id'],
+        activity_id=time_entry_data['activity_id'],
+    )
+    find_interception_mock.assert_called_once()
+
+
+def test_find_latest_entries_by_project_queries_each_project(
+    mocker,
+    event_context,
+    time_entry_repository: TimeEntryCosmosDBRepository,
+):
+    latest_entries = {
+        'project_id1': [{'id': '1', 'project_id': 'project_id1'}],
+        'project_id2': [],
+        'project_id3': [{'id': '3', 'project_id': 'project_id3'}],
+    }
+
+    def query_items(query, parameters, partition_key):
+        values = {p['name']: p['value'] for p in parameters}
+        return iter(latest_entries[values['@project_id']])
+
+    query_items_mock = mocker.patch.object(
+        time_entry_repository.container,
+        'query_items',
+        side_effect=query_items,
+    )
+
+    result = time_entry_repository.find_latest_entries_by_project(
+        event_context,
+        ['project_id1', 'project_id2', 'project_id3'],
+        conditions={'owner_id': 'id'},
+    )
+
+    assert [entry.id for entry in result] == ['1', '3']
+    assert query_items_mock.call_count == 3
+    _, kwargs = query_items_mock.call_args
+    assert 'GROUP BY' not in kwargs['query']
+    assert 'ORDER BY c.start_date DESC' in kwargs['query']
+    assert 'LIMIT @limit' in kwargs['query']
@@ -0,0 +1,220 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from azure.cosmos import PartitionKey
+
+from commons.data_access_layer.in_memory_cosmos_db import InMemoryCosmosClient
+from time_tracker_api.time_entries import time_entries_rollups
+from time_tracker_api.time_entries.time_entries_rollups import (
+    WorkedTimeRollups,
+)
+from utils.time import current_datetime, datetime_str, str_to_datetime
+from utils.worked_time import summary, utc_days
+
+tenant_id = 'tenant'
+owner_id = 'owner'
+
+
+def entry(id: str, hours_ago: float, hours: float = None, **values) -> dict:
+    start = current_datetime() - timedelta(hours=hours_ago)
+    return {
+        'id': id,
+        'start_date': datetime_str(start),
+        'end_date': (
+            datetime_str(start + timedelta(hours=hours)) if hours else None
+        ),
+        'owner_id': owner_id,
+        'tenant_id': tenant_id,
+        'project_id': 'project',
+        'activity_id': 'activity',
+        **values,
+    }
+
+
+@pytest.fixture
+def time_entries():
+    database = InMemoryCosmosClient().get_database_client('test')
+    partition_key = PartitionKey(path='/tenant_id')
+    return database.create_container(
+        id='time_entry', partition_key=partition_key
+    ), database.create_container(
+        id='time_entry_daily_rollup', partition_key=partition_key
+    )
+
+
+@pytest.fixture
+def rollups(time_entries) -> WorkedTimeRollups:
+    entries_container, rollups_container = time_entries
+    for item in [
+        entry('1', 24 * 8 + 3, 2),
+        entry('2', 24 * 3 + 1, 1.5),
+        entry('3', 24 * 2 + 12, 0.25),
+        entry('4', 24 + 0.5, 1),
+        entry('5', 24 * 2, 1, deleted='uuid'),
+    ]:
+        entries_container.create_item(body=item)
+    return WorkedTimeRollups(
+        SimpleNamespace(container=entries_container),
+        SimpleNamespace(container=rollups_container),
+    )
+
+
+def all_items(repository) -> list:
+    return list(
+        repository.container.query_items(
+            query='SELECT * FROM c', partition_key=tenant_id
+        )
+    )
+
+
+def stored_entries(rollups: WorkedTimeRollups) -> list:
+    return [
+        SimpleNamespace(**item)
+        for item in all_items(rollups.time_entries)
+        if 'deleted' not in item
+    ]
+
+
+def test_the_summary_matches_the_one_of_the_time_entries(rollups):
+    expected = summary(stored_entries(rollups), time_offset=0)
+
+    assert rollups.summary(tenant_id, owner_id, time_offset=0) == expected
+
+
+def test_the_missing_days_are_rolled_up_and_stored_once(rollups):
+    with patch.object(
+        WorkedTimeRollups, 'roll_up', wraps=rollups.roll_up
+    ) as roll_up:
+        expected = rollups.summary(tenant_id, owner_id, time_offset=0)
+        result = rollups.summary(tenant_id, owner_id, time_offset=0)
+
+    assert result == expected
+    first_days, second_days = [args[2] for args, _ in roll_up.call_args_list]
+    assert second_days == []
+    stored_rollups = all_items(rollups.rollups)
+    assert len(stored_rollups) == len(first_days) > 0
+    assert any(rollup['seconds'] == 0 for rollup in stored_rollups)
+
+
+def test_a_rollup_stored_by_a_rebuild_is_kept_on_a_read(rollups):
+    [rollup] = rollups.roll_up(
+        tenant_id, owner_id, [current_datetime().date()]
+    )
+    rollups.rollups.container.create_item(body=rollup)
+
+    rollups.store(dict(rollup, seconds=1))
+
+    assert rollups.find_rollup(tenant_id, rollup['id'])['seconds'] == (
+        rollup['seconds']
+    )
+
+
+def test_an_entry_that_spans_the_ranges_is_left_out_like_in_the_summary(
+    rollups,
+):
+    spanning_entry = entry('6', 24 * 40, 24 * 40 + 1)
+    rollups.time_entries.container.create_item(body=spanning_entry)
+    rollups.refresh([spanning_entry])
+
+    for time_offset in (0, 300):
+        expected = summary(stored_entries(rollups), time_offset=time_offset)
+        assert (
+            rollups.summary(tenant_id, owner_id, time_offset=time_offset)
+            == expected
+        )
+
+
+def test_a_rollup_replaced_by_another_write_is_rebuilt(rollups):
+    new_entry = entry('6', 24 * 3 + 1, 0.25)
+    [day] = utc_days(
+        str_to_datetime(new_entry['start_date']),
+        str_to_datetime(new_entry['end_date']),
+    )
+    rollups.rebuild(tenant_id, owner_id, day)
+    roll_up = rollups.roll_up
+    other_writes = []
+
+    def roll_up_while_another_write_rebuilds(*args):
+        result = roll_up(*args)
+        if not other_writes:
+            other_writes.append(new_entry)
+            rollups.time_entries.container.create_item(body=new_entry)
+            rollups.rebuild(tenant_id, owner_id, day)
+        return result
+
+    with patch.object(
+        rollups, 'roll_up', side_effect=roll_up_while_another_write_rebuilds
+    ) as patched_roll_up:
+        rollup = rollups.rebuild(tenant_id, owner_id, day)
+
+    assert patched_roll_up.call_count == 3
+    assert '6' in rollup['time_entry_ids']
+    stored_rollup = rollups.find_rollup(tenant_id, rollup['id'])
+    assert '6' in stored_rollup['time_entry_ids']
+
+
+def test_the_running_entry_is_added_to_the_summary(rollups):
+    rollups.time_entries.container.create_item(body=entry('6', 0.5))
+
+    result = rollups.summary(tenant_id, owner_id, time_offset=0)
+
+    assert result['day']['minutes'] >= 30
+
+
+def test_a_refresh_moves_the_time_of_an_updated_entry(rollups):
+    rollups.summary(tenant_id, owner_id, time_offset=0)
+    updated = entry('2', 24 * 2 + 12, 0.5)
+    rollups.time_entries.container.upsert_item(body=updated)
+
+    rollups.refresh([updated])
+
+    expected = summary(stored_entries(rollups), time_offset=0)
+    assert rollups.summary(tenant_id, owner_id, time_offset=0) == expected
+    rollup_days = {
+        rollup['day']: rollup for rollup in all_items(rollups.rollups)
+    }
+    for day in utc_days(
+        current_datetime() - timedelta(hours=24 * 3 + 1),
+        current_datetime() - timedelta(hours=24 * 3 - 0.5),
+    ):
+        if day.isoformat() in rollup_days:
+            assert '2' not in rollup_days[day.isoformat()]['time_entry_ids']
+
+
+def test_a_refresh_discards_the_time_of_a_soft_deleted_entry(rollups):
+    rollups.summary(tenant_id, owner_id, time_offset=0)
+    deleted = entry('3', 24 * 2 + 12, 0.25, deleted='uuid')
+    rollups.time_entries.container.upsert_item(body=deleted)
+
+    rollups.refresh([deleted])
+
+    for rollup in all_items(rollups.rollups):
+        assert '3' not in rollup['time_entry_ids']
+    expected = summary(stored_entries(rollups), time_offset=0)
+    assert rollups.summary(tenant_id, owner_id, time_offset=0) == expected
+
+
+def test_a_permanent_delete_discards_the_rollups_of_the_entry(rollups):
+    rollups.summary(tenant_id, owner_id, time_offset=0)
+    rollups.time_entries.container.delete_item('3', partition_key=tenant_id)
+
+    rollups.discard(tenant_id, '3')
+
+    for rollup in all_items(rollups.rollups):
+        assert '3' not in rollup['time_entry_ids']
+    expected = summary(stored_entries(rollups), time_offset=0)
+    assert rollups.summary(tenant_id, owner_id, time_offset=0) == expected
+
+
+def test_the_change_feed_of_the_time_entries_refreshes_the_rollups(
+    rollups, mocker
+):
+    mocker.patch.object(time_entries_rollups, 'worked_time_rollups', rollups)
+    refresh_mock = mocker.patch.object(rollups, 'refresh')
+    items = [entry('6', 24 * 3, 1)]
+
+    time_entries_rollups.refresh_changes('time_entry', items)
+
+    refresh_mock.assert_called_once_with(items)
@@ -0,0 +1,149 @@
+import threading
+import time
+from typing import Callable
+from unittest.mock import Mock, patch
+
+import pytest
+
+from time_tracker_api.users import users_directory
+from time_tracker_api.users.users_directory import (
+    DirectorySnapshot,
+    UsersDirectory,
+)
+from utils.azure_users import AzureUser
+
+users = [
+    AzureUser('1', 'Jon', 'jon@ioet.com', [], []),
+    AzureUser('2', 'Ana', 'ana@ioet.com', ['time-tracker-tester'], []),
+]
+
+
+@pytest.fixture
+def take() -> Mock:
+    return Mock(return_value=DirectorySnapshot(users, ['2']))
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 1) -> bool:
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_the_snapshot_is_read_without_taking_it_again(take):
+    directory = UsersDirectory(take)
+    directory.refresh()
+
+    directory.snapshot()
+    snapshot = directory.snapshot()
+
+    take.assert_called_once()
+    assert snapshot.get_user_emails(['1', '3']) == {'1': 'jon@ioet.com'}
+    assert snapshot.is_test_user('2')
+    assert [user.id for user in snapshot.get_non_test_users()] == ['1']
+
+
+def test_a_failed_refresh_keeps_the_last_snapshot(take):
+    directory = UsersDirectory(take)
+    directory.refresh()
+    snapshot = directory.snapshot()
+    take.side_effect = ConnectionError('Graph is down')
+
+    assert not directory.refresh()
+    assert directory.snapshot() is snapshot
+
+
+def test_the_first_snapshot_is_taken_as_soon_as_it_starts(take):
+    directory = UsersDirectory(take, refresh_interval_seconds=60)
+
+    directory.start()
+    try:
+        assert wait_for(lambda: directory.snapshot().users == users)
+    finally:
+        directory.stop(timeout=1)
+
+    take.assert_called_once()
+
+
+def test_the_snapshot_is_empty_without_waiting_for_the_first_one(take):
+    released = threading.Event()
+
+    def take_slowly() -> DirectorySnapshot:
+        released.wait(1)
+        return take()
+
+    directory = UsersDirectory(take_slowly, refresh_interval_seconds=60)
+
+    directory.start()
+    try:
+        snapshot = directory.snapshot()
+    finally:
+        released.set()
+        directory.stop(timeout=1)
+
+    assert snapshot.users == []
+    assert not snapshot.is_test_user('2')
+
+
+def test_a_failed_first_snapshot_is_taken_again_after_a_backoff(take):
+    snapshot = take.return_value
+    take.side_effect = [ConnectionError('Graph is down'), snapshot]
+    directory = UsersDirectory(
+        take, refresh_interval_seconds=60, retry_backoff_seconds=0.01
+    )
+
+    directory.start()
+    try:
+        assert wait_for(lambda: directory.snapshot() is snapshot)
+    finally:
+        directory.stop(timeout=1)
+
+    assert take.call_count == 2
+
+
+def test_the_backoff_doubles_up_to_the_refresh_interval(take):
+    take.side_effect = ConnectionError('Graph is down')
+    directory = UsersDirectory(
+        take, refresh_interval_seconds=100, retry_backoff_seconds=30
+    )
+
+    assert directory.next_refresh_seconds() == 100
+    backoffs = []
+    for _ in range(4):
+        directory.refresh()
+        backoffs.append(directory.next_refresh_seconds())
+
+    assert backoffs == [30, 60, 100, 100]
+
+
+def test_a_requested_refresh_is_taken_in_the_background(take):
+    directory = UsersDirectory(take, refresh_interval_seconds=60)
+    refreshed = DirectorySnapshot(users[:1], [])
+
+    directory.start()
+    try:
+        assert wait_for(lambda: directory.snapshot().users == users)
+        take.return_value = refreshed
+        directory.request_refresh()
+        assert wait_for(lambda: directory.snapshot() is refreshed)
+    finally:
+        directory.stop(timeout=1)
+
+    assert take.call_count == 2
+
+
+@patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
+@patch('utils.azure_users.AzureConnection.get_token', Mock())
+@patch('utils.azure_users.AzureConnection.get_user_emails')
+def test_get_user_emails_reads_only_the_users_out_of_the_snapshot(
+    get_user_emails, take
+):
+    get_user_emails.return_value = {'3': 'ext@gmail.com'}
+
+    directory = UsersDirectory(take)
+    directory.refresh()
+    with patch.object(users_directory, 'users_directory', directory):
+        emails = users_directory.get_user_emails(['1', '3'])
+
+    get_user_emails.assert_called_once_with(['3'])
+    assert emails == {'1': 'jon@ioet.com', '3': 'ext@gmail.com'}
@@ -2,13 +2,19 @@ import copy
 from unittest.mock import Mock, patch
 from requests import Response
 
-from utils.azure_users import AzureConnection, ROLE_FIELD_VALUES, AzureUser, MSConfig
+from utils.azure_users import (
+    AzureConnection,
+    AzureUser,
+    GraphSession,
+    MSConfig,
+    ROLE_FIELD_VALUES,
+)
 from pytest import mark
 
 
 @patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
-@patch('requests.get')
+@patch('utils.azure_users.http_session.get')
 @mark.parametrize(
     'field_name,field_value,is_test_user_expected_value',
     [
@@ -34,7 +40,7 @@ def test_azure_connection_is_test_user(
 
 @patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
-@patch('requests.get')
+@patch('utils.azure_users.http_session.get')
 def test_azure_connection_get_test_user_ids(get_mock):
     response_mock = Mock()
     response_mock.status_code = 200
@@ -53,6 +59,36 @@ def test_azure_connection_get_test_user_ids(get_mock):
     assert az_conn.get_test_user_ids() == ids
 
 
+@patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
+@patch('utils.azure_users.AzureConnection.get_token', Mock())
+@patch('utils.azure_users.http_session.post')
+def test_azure_connection_get_user_emails(post_mock):
+    response_mock = Mock()
+    response_mock.status_code = 200
+    response_mock.json = Mock(
+        return_value={
+            'value': [
+                {'objectId': 'ID1', 'otherMails': ['user1@ioet.com']},
+                {'objectId': 'ID2', 'otherMails': []},
+            ]
+        }
+    )
+    post_mock.return_value = response_mock
+
+    az_conn = AzureConnection()
+
+    assert az_conn.get_user_emails(['ID1', 'ID2', 'ID3']) == {
+        'ID1': 'user1@ioet.com'
+    }
+    assert post_mock.call_args.kwargs['json']['objectIds'] == [
+        'ID1',
+        'ID2',
+        'ID3',
+    ]
+    assert az_conn.get_user_emails([]) == {}
+    post_mock.assert_called_once()
+
+
 @patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
 @patch('utils.azure_users.AzureConnection.get_test_user_ids')
@@ -71,7 +107,7 @@ def test_azure_connection_get_non_test_users(
 
 @patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
-@patch('requests.get')
+@patch('utils.azure_users.http_session.get')
 def test_azure_connection_get_group_id_by_group_name(get_mock):
     response_mock = Mock()
     response_mock.status_code = 200
@@ -88,7 +124,7 @@ def test_azure_connection_get_group_id_by_group_name(get_mock):
 @patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
 @patch('utils.azure_users.AzureConnection.get_group_id_by_group_name')
-@patch('requests.post')
+@patch('utils.azure_users.http_session.post')
 @mark.parametrize('expected_value', [True, False])
 def test_is_user_in_group(
         post_mock, get_group_id_by_group_name_mock, expected_value
@@ -111,7 +147,7 @@ def test_is_user_in_group(
 
 @patch('utils.azure_users.AzureConnection.get_msal_client', Mock())
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
-@patch('requests.get')
+@patch('utils.azure_users.http_session.get')
 def test_get_groups_and_users(get_mock):
     response_mock = Mock()
     response_mock.status_code = 200
@@ -196,7 +232,7 @@ def test_get_groups_and_users_called_once_by_instance(
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
 @patch('utils.azure_users.AzureConnection.get_user')
 @patch('utils.azure_users.AzureConnection.get_group_id_by_group_name')
-@patch('requests.post')
+@patch('utils.azure_users.http_session.post')
 def test_add_user_to_group(
         post_mock, get_group_id_by_group_name_mock, get_user_mock
 ):
@@ -222,7 +258,7 @@ def test_add_user_to_group(
 @patch('utils.azure_users.AzureConnection.get_token', Mock())
 @patch('utils.azure_users.AzureConnection.get_user')
 @patch('utils.azure_users.AzureConnection.get_group_id_by_group_name')
-@patch('requests.delete')
+@patch('utils.azure_users.http_session.delete')
 def test_remove_user_from_group(
         delete_mock, get_group_id_by_group_name_mock, get_user_mock
 ):
@@ -245,7 +281,7 @@ def test_remove_user_from_group(
 
 
 @patch('utils.azure_users.AzureConnection.get_groups_and_users')
-@patch('requests.get')
+@patch('utils.azure_users.http_session.get')
 def test_users_functions_should_returns_all_users(
         get_mock, get_groups_and_users_mock
 ):
@@ -265,3 +301,50 @@ def test_users_functions_should_returns_all_users(
     users = AzureConnection().users()
 
     assert len(users) == 2
+
+
+@patch('utils.azure_users._tokens', {})
+@patch('utils.azure_users.AzureConnection.get_msal_client')
+def test_azure_connection_reuses_the_token_until_it_expires(
+    get_msal_client_mock,
+):
+    client = get_msal_client_mock.return_value
+    client.acquire_token_for_client.return_value = {
+        'access_token': 'token',
+        'expires_in': 3599,
+    }
+
+    assert AzureConnection().access_token == 'token'
+    assert AzureConnection().access_token == 'token'
+    client.acquire_token_for_client.assert_called_once()
+
+
+@patch('utils.azure_users._tokens', {})
+@patch('utils.azure_users.AzureConnection.get_msal_client')
+def test_azure_connection_acquires_a_token_close_to_expire_again(
+    get_msal_client_mock,
+):
+    client = get_msal_client_mock.return_value
+    client.acquire_token_for_client.return_value = {
+        'access_token': 'token',
+        'expires_in': 60,
+    }
+
+    AzureConnection().get_token()
+    AzureConnection().get_token()
+
+    assert client.acquire_token_for_client.call_count == 2
+
+
+def test_graph_session_sets_a_default_timeout():
+    session = GraphSession(timeout=3)
+
+    with patch('requests.Session.request') as request_mock:
+        session.get('https://graph.windows.net/users')
+
+    request_mock.assert_called_once_with(
+        'GET',
+        'https://graph.windows.net/users',
+        allow_redirects=True,
+        timeout=3,
+    )
@@ -0,0 +1,36 @@
+from utils.cache import LRUCache
+
+
+def test_lru_cache_discards_the_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_returns_the_default_value_of_missing_keys():
+    cache = LRUCache()
+
+    assert cache.get('missing') is None
+    assert cache.get('missing', 0) == 0
+    assert cache.pop('missing', 'default') == 'default'
+
+
+def test_lru_cache_entries_expire_after_the_ttl():
+    now = [0]
+    cache = LRUCache(ttl=10, timer=lambda: now[0])
+    cache.put('a', 1)
+    cache.put('b', 2, ttl=30)
+
+    now[0] = 15
+
+    assert 'a' not in cache
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
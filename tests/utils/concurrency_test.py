@@ -0,0 +1,76 @@
+import threading
+
+from flask import Flask, request
+
+from utils.concurrency import (
+    SHARED_MAX_WORKERS,
+    map_concurrently,
+    run_concurrently,
+)
+
+
+def test_map_concurrently_keeps_the_order_of_the_items():
+    result = map_concurrently(lambda x: x * 2, range(20), max_workers=4)
+
+    assert result == [x * 2 for x in range(20)]
+
+
+def test_map_concurrently_runs_on_several_threads():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_the_other_thread(_):
+        barrier.wait()
+        return threading.get_ident()
+
+    result = map_concurrently(wait_for_the_other_thread, [1, 2])
+
+    assert len(set(result)) == 2
+
+
+def test_map_concurrently_gives_access_to_the_current_request():
+    app = Flask(__name__)
+
+    with app.test_request_context(headers={'Authorization': 'Bearer token'}):
+        result = map_concurrently(
+            lambda _: request.headers.get('Authorization'), [1, 2, 3]
+        )
+
+    assert result == ['Bearer token'] * 3
+
+
+def test_run_concurrently_returns_the_results_in_order():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_and_return(value):
+        barrier.wait()
+        return value
+
+    result = run_concurrently(
+        lambda: wait_and_return('first'), lambda: wait_and_return('second')
+    )
+
+    assert result == ['first', 'second']
+
+
+def test_map_concurrently_runs_the_nested_calls_on_the_same_thread():
+    def nested_thread_ids(_):
+        return set(
+            map_concurrently(lambda _: threading.get_ident(), [1, 2, 3])
+        ) == {threading.get_ident()}
+
+    assert map_concurrently(nested_thread_ids, [1, 2]) == [True, True]
+
+
+def test_map_concurrently_shares_a_bounded_pool_of_threads():
+    for _ in range(5):
+        names = map_concurrently(
+            lambda _: threading.current_thread().name, range(20)
+        )
+
+    assert all(name.startswith('concurrency') for name in names)
+    pool_threads = [
+        thread
+        for thread in threading.enumerate()
+        if thread.name.startswith('concurrency')
+    ]
+    assert len(pool_threads) <= SHARED_MAX_WORKERS
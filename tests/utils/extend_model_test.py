@@ -1,5 +1,10 @@
 from unittest.mock import patch
-from utils.extend_model import add_custom_attribute
+from utils.extend_model import (
+    add_activity_name_to_time_entries,
+    add_custom_attribute,
+    add_project_info_to_time_entries,
+    extend_models,
+)
 
 
 @patch('time_tracker_api.project_types.project_types_model.create_dao')
@@ -30,3 +35,61 @@ def test_add_custom_attribute(customers_create_dao, projects_create_dao):
 
     assert 'customer' in project
     assert 'project_type' in project
+
+
+class Entity:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+    def is_deleted(self):
+        return bool(self.__dict__.get('deleted'))
+
+
+def test_add_project_info_to_time_entries_marks_archived_projects():
+    projects = [
+        Entity(id='p1', name='Alpha', customer_id='c1', customer_name='C1'),
+        Entity(
+            id='p2',
+            name='Beta',
+            customer_id='c2',
+            customer_name='C2',
+            deleted='uuid',
+        ),
+    ]
+    time_entries = [
+        Entity(project_id='p1'),
+        Entity(project_id='p2'),
+        Entity(project_id='p3'),
+    ]
+
+    add_project_info_to_time_entries(time_entries, projects)
+
+    assert time_entries[0].project_name == 'Alpha'
+    assert time_entries[0].customer_name == 'C1'
+    assert time_entries[1].project_name == 'Beta (archived)'
+    assert time_entries[1].customer_id == 'c2'
+    assert not hasattr(time_entries[2], 'project_name')
+
+
+def test_add_activity_name_to_time_entries_defaults_unknown_activities():
+    activities = [Entity(id='a1', name='Coding')]
+    time_entries = [Entity(activity_id='a1'), Entity(activity_id='a2')]
+
+    add_activity_name_to_time_entries(time_entries, activities)
+
+    assert time_entries[0].activity_name == 'Coding'
+    assert time_entries[1].activity_name == 'activity'
+
+
+def test_extend_models_takes_the_related_entities_indexed_by_id():
+    time_entries = [Entity(owner_id='u1'), Entity(owner_id='u2')]
+
+    extend_models(
+        time_entries,
+        'owner_id',
+        {'u1': 'u1@ioet.com'},
+        {'owner_email': lambda email: email},
+    )
+
+    assert time_entries[0].owner_email == 'u1@ioet.com'
+    assert not hasattr(time_entries[1], 'owner_email')
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from utils.interval_index import IntervalIndex, intersects
+
+
+def date(hour: int) -> str:
+    return '2021-03-22T%02d:00:00.000Z' % hour
+
+
+@pytest.mark.parametrize(
+    'start,end,expected',
+    [
+        (date(8), date(9), False),
+        (date(8), date(10), False),
+        (date(8), date(11), True),
+        (date(10), date(12), True),
+        (date(11), date(12), True),
+        (date(12), date(13), False),
+        (date(14), date(15), False),
+        (date(9), date(14), True),
+    ],
+)
+def test_intersects_shares_the_bounds_without_touching(start, end, expected):
+    assert intersects(start, end, date(10), date(12)) == expected
+
+
+def test_find_intersection_returns_an_intersecting_interval():
+    index = IntervalIndex([(date(8), date(9), 'a'), (date(10), date(12), 'b')])
+
+    assert index.find_intersection(date(11), date(13)) == 'b'
+    assert index.find_intersection(date(9), date(10)) is None
+    assert index.find_intersection(date(13), date(14)) is None
+    assert index.find_intersection(date(11), date(13), ignore_id='b') is None
+
+
+def test_find_intersection_finds_intervals_that_contain_later_ones():
+    index = IntervalIndex()
+    index.add('long', date(1), date(20))
+    index.add('short', date(2), date(3))
+
+    assert index.find_intersection(date(10), date(11)) == 'long'
+
+
+def test_add_replaces_and_remove_discards_an_interval():
+    index = IntervalIndex([(date(8), date(9), 'a')])
+
+    index.add('a', date(10), date(11))
+
+    assert len(index) == 1
+    assert index.find_intersection(date(8), date(9)) is None
+    assert index.find_intersection(date(10), date(11)) == 'a'
+
+    index.remove('a')
+    index.remove('missing')
+
+    assert 'a' not in index
+    assert index.find_intersection(date(10), date(11)) is None
+
+
+def test_find_intersection_matches_a_full_scan():
+    generator = random.Random(1)
+    index = IntervalIndex()
+    intervals = {}
+    for id in range(200):
+        start = generator.randint(0, 22)
+        end = generator.randint(start + 1, 23)
+        intervals[str(id)] = (date(start), date(end))
+        index.add(str(id), date(start), date(end))
+        if generator.random() < 0.3:
+            removed = generator.choice(list(intervals))
+            intervals.pop(removed)
+            index.remove(removed)
+
+    for start in range(23):
+        for end in range(start + 1, 24):
+            expected = any(
+                intersects(date(start), date(end), *dates)
+                for dates in intervals.values()
+            )
+            found = index.find_intersection(date(start), date(end))
+            assert (found is not None) == expected
@@ -423,3 +423,61 @@ def test_add_sql_inactive_condition_should_update_where_conditions():
     )
     assert len(query_builder.where_conditions) == 1
     assert query_builder.where_conditions[0] == expected_condition
+
+
+def test_parameterized_in_conditions_send_the_values_as_parameters():
+    query_builder = (
+        CosmosDBQueryBuilder(parameterize_lists=True)
+        .add_sql_in_condition("owner_id", ["id1", "id2"])
+        .add_sql_not_in_condition("owner_id", ["id3"])
+    )
+
+    assert query_builder.where_conditions == [
+        "ARRAY_CONTAINS(@in_owner_id, c.owner_id)",
+        "NOT ARRAY_CONTAINS(@not_in_owner_id, c.owner_id)",
+    ]
+    assert query_builder.get_parameters() == [
+        {'name': '@in_owner_id', 'value': ['id1', 'id2']},
+        {'name': '@not_in_owner_id', 'value': ['id3']},
+    ]
+
+
+def test_parameterized_in_conditions_on_the_same_attribute_use_other_names():
+    query_builder = (
+        CosmosDBQueryBuilder(parameterize_lists=True)
+        .add_sql_in_condition("id", ["id1"])
+        .add_sql_in_condition("id", ["id2"])
+    )
+
+    names = [p['name'] for p in query_builder.get_parameters()]
+    assert len(set(names)) == 2
+
+
+def test_build_reuses_the_query_of_builders_with_the_same_shape():
+    def build(owner_ids, offset):
+        return (
+            CosmosDBQueryBuilder(parameterize_lists=True)
+            .add_sql_in_condition("owner_id", owner_ids)
+            .add_sql_where_equal_condition({'project_id': owner_ids[0]})
+            .add_sql_offset_condition(offset)
+            .add_sql_limit_condition(10)
+            .build()
+        )
+
+    first = build(["id1"], 0)
+    second = build(["id2", "id3"], 10)
+
+    assert first.get_query() is second.get_query()
+    assert second.get_parameters() == [
+        {'name': '@in_owner_id', 'value': ['id2', 'id3']},
+        {'name': '@project_id', 'value': 'id2'},
+        {'name': '@offset', 'value': 10},
+        {'name': '@limit', 'value': 10},
+    ]
+
+
+def test_build_does_not_cache_queries_with_inline_values():
+    with patch('utils.query_builder.query_templates') as query_templates:
+        CosmosDBQueryBuilder().add_sql_in_condition("id", ["id1"]).build()
+
+    query_templates.put.assert_not_called()
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from dateutil import parser
+
+from utils.time import parse_datetime, str_to_datetime
+
+
+@pytest.mark.parametrize(
+    'value',
+    [
+        '2021-03-10T08:00:00+00:00',
+        '2021-03-10T08:00:00.123456-05:00',
+        '2021-03-10T08:00:00.123Z',
+        '2021-03-10T08:00:00Z',
+        '2021-03-10T08:00:00',
+        '2021-03-10',
+    ],
+)
+def test_parse_datetime_matches_dateutil(value):
+    expected = parser.parse(value)
+    if expected.tzinfo is None:
+        expected = expected.replace(tzinfo=timezone.utc)
+
+    result = parse_datetime(value)
+
+    assert result == expected
+    assert result.utcoffset() == expected.utcoffset()
+
+
+def test_parse_datetime_falls_back_to_dateutil_for_other_shapes():
+    result = parse_datetime('2021-03-10T08:00:00.1234Z')
+
+    assert result == datetime(
+        2021, 3, 10, 8, 0, 0, 123400, tzinfo=timezone.utc
+    )
+
+
+def test_parse_datetime_keeps_the_offset():
+    result = parse_datetime('2021-03-10T08:00:00-05:00')
+
+    assert result.utcoffset() == timedelta(hours=-5)
+
+
+def test_parse_datetime_rejects_invalid_dates():
+    with pytest.raises(ValueError):
+        parse_datetime('not a date')
+
+
+def test_str_to_datetime_reuses_the_parsed_dates():
+    value = '2021-03-10T08:00:00.654321Z'
+
+    assert str_to_datetime(value) is str_to_datetime(value)
@@ -1,6 +1,5 @@
 from http import HTTPStatus
 
-from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from faker import Faker
 
 from time_tracker_api.activities import activities_model
@@ -37,13 +36,19 @@ def test_validate_related_entry_entities_must_failed_if_activity_id_is_empty():
 def test_validate_related_entry_entities_must_pass_if_the_data_is_valid(
     mocker,
 ):
-    mocker.patch.object(ProjectCosmosDBDao, 'get')
-    mocker.patch.object(ActivityCosmosDBDao, 'get')
+    project_dao_get_many_mock = mocker.patch.object(
+        ProjectCosmosDBDao, 'get_many', return_value=[{}]
+    )
+    mocker.patch.object(ActivityCosmosDBDao, 'get_many', return_value=[{}])
+    project_id = fake.uuid4()
 
     are_entities_valid = are_related_entry_entities_valid(
-        project_id=fake.uuid4(), activity_id=fake.uuid4()
+        project_id=project_id, activity_id=fake.uuid4()
     )
 
+    project_dao_get_many_mock.assert_called_once_with(
+        [project_id], with_customer_names=False
+    )
     assert are_entities_valid.get('is_valid') is True
     assert are_entities_valid.get('status_code') == HTTPStatus.OK
     assert are_entities_valid.get('message') == 'Related entry entities valid'
@@ -70,11 +75,9 @@ def test_validate_related_entry_entities_must_fail_if_the_project_id_does_not_ex
 def test_validate_related_entry_entities_must_fail_if_the_activity_id_does_not_exists(
     mocker,
 ):
-    mocker.patch.object(ProjectCosmosDBDao, 'get')
+    mocker.patch.object(ProjectCosmosDBDao, 'get_many', return_value=[{}])
 
-    mocker.patch.object(
-        ActivityCosmosDBDao, 'get', side_effect=CosmosResourceNotFoundError
-    )
+    mocker.patch.object(ActivityCosmosDBDao, 'get_many', return_value=[])
 
     are_entities_valid = are_related_entry_entities_valid(
         project_id=fake.uuid4(), activity_id=fake.uuid4()
@@ -88,7 +91,7 @@ def test_validate_related_entry_entities_must_fail_if_the_activity_id_does_not_e
 
 
 def test_exists_related_entity_should_return_true_if_entity_exists(mocker):
-    mocker.patch.object(ActivityCosmosDBDao, 'get')
+    mocker.patch.object(ActivityCosmosDBDao, 'get_many', return_value=[{}])
     activity_dao = activities_model.create_dao()
 
     exists_entity = exists_related_entity(
@@ -101,9 +104,7 @@ def test_exists_related_entity_should_return_true_if_entity_exists(mocker):
 def test_exists_related_entity_should_return_false_if_entity_does_not_exists(
     mocker,
 ):
-    mocker.patch.object(
-        ActivityCosmosDBDao, 'get', side_effect=CosmosResourceNotFoundError
-    )
+    mocker.patch.object(ActivityCosmosDBDao, 'get_many', return_value=[])
     activity_dao = activities_model.create_dao()
 
     exists_entity = exists_related_entity(
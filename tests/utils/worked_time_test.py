@@ -0,0 +1,145 @@
+from datetime import date, datetime, timedelta, timezone
+
+from utils.time import datetime_str
+from utils.worked_time import (
+    WorkedTimeIntervals,
+    day_rollup,
+    split_in_days,
+    summary,
+    summary_date_ranges,
+    summary_from_rollups,
+)
+
+
+class FakeTimeEntry:
+    def __init__(self, start_date, end_date=None):
+        self.start_date = start_date
+        self.end_date = end_date
+
+
+def test_summary_consumes_time_entries_from_a_generator():
+    now = datetime.now(timezone.utc)
+    time_entries = (
+        FakeTimeEntry(
+            datetime_str(now - timedelta(minutes=minutes + 1)),
+            datetime_str(now - timedelta(minutes=1)),
+        )
+        for minutes in [1, 2]
+    )
+
+    result = summary(time_entries, time_offset=0)
+
+    assert result['month'] == {'hours': 0, 'minutes': 3, 'seconds': 0}
+
+
+def test_summary_cuts_time_entries_out_of_the_current_day():
+    tz = timezone(timedelta(minutes=-300))
+    start_of_day = datetime.now(tz).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    time_entries = [
+        FakeTimeEntry(
+            datetime_str(start_of_day - timedelta(hours=2)),
+            datetime_str(start_of_day + timedelta(minutes=1)),
+        )
+    ]
+
+    result = summary(time_entries, time_offset=300)
+
+    assert result['day'] == {'hours': 0, 'minutes': 1, 'seconds': 0}
+
+
+def test_worked_time_intervals_add_up_the_time_inside_each_range():
+    now = datetime(2021, 3, 10, 12, tzinfo=timezone.utc)
+    time_entries = [
+        FakeTimeEntry('2021-03-10T08:00:00Z', '2021-03-10T09:30:00Z'),
+        FakeTimeEntry('2021-03-09T23:00:00Z', '2021-03-10T00:30:00Z'),
+        FakeTimeEntry('2021-03-01T00:00:00Z', '2021-03-20T00:00:00Z'),
+        FakeTimeEntry('2021-03-10T11:00:00Z'),
+    ]
+
+    intervals = WorkedTimeIntervals.from_time_entries(
+        time_entries, running_end=now
+    )
+
+    assert (
+        intervals.total_time_in_seconds(
+            datetime(2021, 3, 10, tzinfo=timezone.utc), now
+        )
+        == (90 + 30 + 60) * 60
+    )
+    assert (
+        intervals.total_time_in_seconds(
+            datetime(2021, 3, 9, 23, 30, tzinfo=timezone.utc),
+            datetime(2021, 3, 10, 0, 30, tzinfo=timezone.utc),
+        )
+        == 60 * 60
+    )
+
+
+def test_split_in_days_leaves_the_partial_days_as_edges():
+    tz = timezone(timedelta(minutes=-300))
+    start = datetime(2021, 3, 1, tzinfo=tz)
+    end = datetime(2021, 3, 4, 12, tzinfo=tz)
+
+    days, edges = split_in_days(start, end)
+
+    assert days == [date(2021, 3, 2), date(2021, 3, 3)]
+    assert edges == [
+        (start, datetime(2021, 3, 2, tzinfo=timezone.utc)),
+        (datetime(2021, 3, 4, tzinfo=timezone.utc), end),
+    ]
+
+
+def test_day_rollup_only_counts_the_time_inside_the_day():
+    time_entries = [
+        {
+            'id': '1',
+            'start_date': '2021-03-01T23:00:00Z',
+            'end_date': '2021-03-02T01:00:00Z',
+            'project_id': 'p1',
+            'activity_id': 'a1',
+        },
+        {
+            'id': '2',
+            'start_date': '2021-03-02T10:00:00Z',
+            'end_date': '2021-03-02T10:30:00Z',
+            'project_id': 'p2',
+        },
+    ]
+
+    rollup = day_rollup(time_entries, date(2021, 3, 2))
+
+    assert rollup == {
+        'day': '2021-03-02',
+        'seconds': 5400,
+        'projects': {'p1': 3600, 'p2': 1800},
+        'activities': {'a1': 3600},
+        'time_entry_ids': ['1', '2'],
+    }
+
+
+def test_summary_from_rollups_adds_the_edges_and_the_running_entry():
+    date_ranges = summary_date_ranges(0)
+    day_start = date_ranges['day'].start()
+    yesterday = (day_start - timedelta(days=1)).date()
+    time_entries = [
+        {
+            'start_date': datetime_str(day_start - timedelta(minutes=10)),
+            'end_date': datetime_str(day_start + timedelta(minutes=5)),
+        },
+        {
+            'start_date': datetime_str(
+                datetime.now(timezone.utc) - timedelta(seconds=10)
+            ),
+            'end_date': None,
+        },
+    ]
+
+    result = summary_from_rollups(
+        date_ranges, {yesterday.isoformat(): 7200}, time_entries
+    )
+
+    assert result['day']['hours'] == 0
+    assert result['day']['minutes'] == 5
+    assert result['day']['seconds'] >= 10
@@ -44,6 +44,20 @@ def init_app(app: Flask):
 
     init_app(app)
 
+    from time_tracker_api.database import warm_up as warm_up_database
+
+    warm_up_database(app)
+
+    from time_tracker_api.database import start_change_feed
+
+    start_change_feed(app)
+
+    from time_tracker_api.users.users_directory import (
+        init_app as init_users_directory,
+    )
+
+    init_users_directory(app)
+
     if app.config.get('DEBUG'):
         app.logger.setLevel(logging.DEBUG)
         add_debug_toolbar(app)
@@ -8,6 +8,7 @@ from commons.data_access_layer.cosmos_db import (
     CosmosDBDao,
     CosmosDBRepository,
     CustomError,
+    repository_registry,
 )
 from time_tracker_api.database import CRUDDao, APICosmosDBDao
 from typing import List, Callable
@@ -15,6 +16,10 @@ from commons.data_access_layer.database import EventContext
 from utils.enums.status import Status
 from utils.query_builder import CosmosDBQueryBuilder
 from commons.data_access_layer.file import FileStream
+from utils.cache import LRUCache
+
+# The activities file is maintained by hand and rarely changes
+ACTIVITY_FILES_TTL_SECONDS = 300
 
 
 class ActivityDao(CRUDDao):
@@ -59,6 +64,7 @@ class ActivityCosmosDBRepository(CosmosDBRepository):
             partition_key_attribute='tenant_id',
             mapper=ActivityCosmosDBModel,
         )
+        self.files = LRUCache(maxsize=4, ttl=ACTIVITY_FILES_TTL_SECONDS)
 
     def find_all_with_id_in_list(
         self,
@@ -68,16 +74,18 @@ class ActivityCosmosDBRepository(CosmosDBRepository):
         mapper: Callable = None,
     ):
         query_builder = (
-            CosmosDBQueryBuilder()
+            CosmosDBQueryBuilder(parameterize_lists=True)
             .add_sql_in_condition('id', activity_ids)
             .add_sql_visibility_condition(visible_only)
             .build()
         )
         query_str = query_builder.get_query()
+        params = query_builder.get_parameters()
 
         tenant_id_value = self.find_partition_key_value(event_context)
         result = self.container.query_items(
             query=query_str,
+            parameters=params,
             partition_key=tenant_id_value,
         )
 
@@ -95,7 +103,7 @@ class ActivityCosmosDBRepository(CosmosDBRepository):
         mapper: Callable = None,
     ):
         query_builder = (
-            CosmosDBQueryBuilder()
+            CosmosDBQueryBuilder(parameterize_lists=True)
             .add_sql_in_condition('id', activities_id)
             .add_sql_where_equal_condition(conditions)
             .add_sql_visibility_condition(visible_only)
@@ -128,10 +136,7 @@ class ActivityCosmosDBRepository(CosmosDBRepository):
         if tenant_id_value is None:
             return [{"result": "error", "message": "tenant_id is None"}]
 
-        fs = FileStream("tt-common-files")
-        result = fs.get_file_stream(file_name)
-        result_json = list(map(function_mapper, json.loads(
-            result))) if result is not None else []
+        result_json = list(map(function_mapper, self.read_file(file_name)))
         if activity_id is not None:
             result_json = [
                 activity
@@ -141,6 +146,21 @@ class ActivityCosmosDBRepository(CosmosDBRepository):
 
         return result_json
 
+    def read_file(self, file_name: str) -> list:
+        """
+        Activities of the file in the blob storage, downloaded at most once
+        every ACTIVITY_FILES_TTL_SECONDS. Failed downloads are not cached.
+        """
+        activities = self.files.get(file_name)
+        if activities is None:
+            fs = FileStream("tt-common-files")
+            result = fs.get_file_stream(file_name)
+            if result is None:
+                return []
+            activities = json.loads(result)
+            self.files.put(file_name, activities)
+        return activities
+
 
 class ActivityCosmosDBDao(APICosmosDBDao, ActivityDao):
     def __init__(self, repository):
@@ -194,6 +214,14 @@ class ActivityCosmosDBDao(APICosmosDBDao, ActivityDao):
         else:
             raise CustomError(404, "It was not found")
 
+    def get_many(self, ids: List[str], **kwargs) -> list:
+        event_ctx = self.create_event_context("read-many")
+        activities = self.repository.find_all_from_blob_storage(
+            event_context=event_ctx
+        )
+        ids = set(ids)
+        return [activity for activity in activities if activity.id in ids]
+
     def create(self, activity_payload: dict):
         event_ctx = self.create_event_context('create')
         activity_payload['status'] = Status.ACTIVE.value
@@ -203,6 +231,8 @@ class ActivityCosmosDBDao(APICosmosDBDao, ActivityDao):
 
 
 def create_dao() -> ActivityDao:
-    repository = ActivityCosmosDBRepository()
+    repository = repository_registry.get(
+        container_definition['id'], ActivityCosmosDBRepository
+    )
 
     return ActivityCosmosDBDao(repository)
@@ -6,6 +6,8 @@ from time_tracker_api.activities.activities_model import create_dao
 from time_tracker_api.api import (
     common_fields,
     api,
+    add_fields_argument,
+    select_fields,
     remove_required_constraint,
     NullableString,
 )
@@ -65,17 +67,20 @@ list_activities_attribs_parser.add_argument(
     help="(Filter) Permits to get a list of active or inactive activities.",
     location='args',
 )
+add_fields_argument(list_activities_attribs_parser, activity)
 
 
 @ns.route('')
 class Activities(Resource):
     @ns.doc('list_activities')
+    @select_fields
     @ns.marshal_list_with(activity)
     @ns.expect(list_activities_attribs_parser)
     def get(self):
         """List all activities"""
         conditions = list_activities_attribs_parser.parse_args()
-        return activity_dao.get_all(conditions=conditions)
+        fields = conditions.pop('fields', None)
+        return activity_dao.get_all(conditions=conditions, fields=fields)
 
     @ns.doc('create_activity')
     @ns.response(HTTPStatus.CONFLICT, 'This activity already exists')
@@ -1,16 +1,25 @@
 from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
     CosmosResourceExistsError,
     CosmosResourceNotFoundError,
     CosmosHttpResponseError,
 )
+import math
+from functools import wraps
+from typing import List
+
 from faker import Faker
-from flask import current_app as app, Flask
+from flask import current_app as app, Flask, request
 from flask_restplus import Api, fields, Model
 from flask_restplus import namespace
 from flask_restplus._http import HTTPStatus
 from flask_restplus.reqparse import RequestParser
 
 from commons.data_access_layer.cosmos_db import CustomError
+from commons.data_access_layer.resilience import (
+    is_throttled,
+    retry_after_seconds,
+)
 from time_tracker_api import security
 from time_tracker_api.security import UUID_REGEX
 from time_tracker_api.version import __version__
@@ -69,6 +78,57 @@ def create_attributes_filter(
     return attribs_parser
 
 
+def add_fields_argument(
+    attribs_parser: RequestParser, model: Model
+) -> RequestParser:
+    """
+    Add the argument `fields` to the parser: a comma separated list of the
+    attributes of the model to return. Use it with select_fields.
+    """
+    model_attributes = model.resolved
+
+    def parse_fields(value: str) -> List[str]:
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        invalid_names = [n for n in names if n not in model_attributes]
+        if invalid_names:
+            raise ValueError(
+                "Invalid fields for %s: %s"
+                % (model.name, ', '.join(invalid_names))
+            )
+        return names
+
+    attribs_parser.add_argument(
+        'fields',
+        type=parse_fields,
+        required=False,
+        store_missing=False,
+        help="(Projection) Comma separated attributes to return, e.g. id,name",
+        location='args',
+    )
+    return attribs_parser
+
+
+def select_fields(func):
+    """
+    Decorator that removes from the marshalled list the attributes that are
+    not in the argument `fields` of the request, if it was sent
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        requested_fields = request.args.get('fields')
+        if not requested_fields:
+            return result
+
+        names = {'id'} | {name.strip() for name in requested_fields.split(',')}
+        return [
+            {k: v for k, v in item.items() if k in names} for item in result
+        ]
+
+    return wrapper
+
+
 # Custom fields
 class NullableString(fields.String):
     __schema_type__ = ['string', 'null']
@@ -135,6 +195,10 @@ def init_app(app: Flask):
 
     api.add_namespace(users_namespace.ns)
 
+    from time_tracker_api.metrics import metrics_namespace
+
+    api.add_namespace(metrics_namespace.ns)
+
 
 """
 Error handlers
@@ -154,9 +218,24 @@ def handle_not_found_errors(error):
     return {'message': 'It was not found'}, HTTPStatus.NOT_FOUND
 
 
+@api.errorhandler(CosmosAccessConditionFailedError)
+def handle_cosmos_access_condition_failed_error(error):
+    app.logger.error(error)
+    return (
+        {'message': 'It was modified by another request. Please try again.'},
+        HTTPStatus.CONFLICT,
+    )
+
+
 @api.errorhandler(CosmosHttpResponseError)
 def handle_cosmos_http_response_error(error):
     app.logger.error(error)
+    if is_throttled(error):
+        return (
+            {'message': 'The database is busy. Please try again.'},
+            HTTPStatus.TOO_MANY_REQUESTS,
+            {'Retry-After': str(math.ceil(retry_after_seconds(error)) or 1)},
+        )
     return (
         {'message': 'Invalid request. Please verify your data.'},
         HTTPStatus.BAD_REQUEST,
@@ -33,11 +33,111 @@ class CosmosDB(Config):
     DATABASE_ACCOUNT_URI = os.environ.get('DATABASE_ACCOUNT_URI')
     DATABASE_MASTER_KEY = os.environ.get('DATABASE_MASTER_KEY')
     DATABASE_NAME = os.environ.get('DATABASE_NAME')
+    COSMOS_DATABASE_WARM_UP = (
+        os.environ.get('COSMOS_DATABASE_WARM_UP', "true").lower()
+        not in DISABLE_STR_VALUES
+    )
+    COSMOS_DATABASE_LATENCY_MS = float(
+        os.environ.get('COSMOS_DATABASE_LATENCY_MS', 0)
+    )
+    COSMOS_THROTTLING_MAX_RETRIES = int(
+        os.environ.get('COSMOS_THROTTLING_MAX_RETRIES', 9)
+    )
+    COSMOS_THROTTLING_MAX_WAIT_SECONDS = float(
+        os.environ.get('COSMOS_THROTTLING_MAX_WAIT_SECONDS', 30)
+    )
+    COSMOS_CONCURRENCY_INITIAL_LIMIT = int(
+        os.environ.get('COSMOS_CONCURRENCY_INITIAL_LIMIT', 16)
+    )
+    COSMOS_CONCURRENCY_MAX_LIMIT = int(
+        os.environ.get('COSMOS_CONCURRENCY_MAX_LIMIT', 64)
+    )
+    COSMOS_QUEUE_TIMEOUT_SECONDS = float(
+        os.environ.get('COSMOS_QUEUE_TIMEOUT_SECONDS', 10)
+    )
+    SLOW_QUERY_LOG_ENABLED = (
+        os.environ.get('SLOW_QUERY_LOG_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    SLOW_QUERY_LOG_FILE = os.environ.get(
+        'SLOW_QUERY_LOG_FILE', 'slow_queries.log'
+    )
+    SLOW_QUERY_LOG_DURATION_MS = float(
+        os.environ.get('SLOW_QUERY_LOG_DURATION_MS', 100)
+    )
+    SLOW_QUERY_LOG_REQUEST_CHARGE = float(
+        os.environ.get('SLOW_QUERY_LOG_REQUEST_CHARGE', 50)
+    )
+    SLOW_QUERY_LOG_SAMPLE_RATE = float(
+        os.environ.get('SLOW_QUERY_LOG_SAMPLE_RATE', 1.0)
+    )
+    SLOW_QUERY_LOG_MAX_BYTES = int(
+        os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10485760)
+    )
+    SLOW_QUERY_LOG_BACKUP_COUNT = int(
+        os.environ.get('SLOW_QUERY_LOG_BACKUP_COUNT', 5)
+    )
+    REFERENCE_CACHE_ENABLED = (
+        os.environ.get('REFERENCE_CACHE_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    REFERENCE_CACHE_REDIS_URL = os.environ.get('REFERENCE_CACHE_REDIS_URL')
+    REFERENCE_CACHE_TTL_SECONDS = int(
+        os.environ.get('REFERENCE_CACHE_TTL_SECONDS', 300)
+    )
+    REFERENCE_CACHE_MAX_ENTRIES = int(
+        os.environ.get('REFERENCE_CACHE_MAX_ENTRIES', 1024)
+    )
+    TIME_ENTRY_INTERVAL_INDEX_ENABLED = (
+        os.environ.get('TIME_ENTRY_INTERVAL_INDEX_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    TIME_ENTRY_INTERVAL_INDEX_WINDOW_DAYS = int(
+        os.environ.get('TIME_ENTRY_INTERVAL_INDEX_WINDOW_DAYS', 31)
+    )
+    TIME_ENTRY_INTERVAL_INDEX_TTL_SECONDS = float(
+        os.environ.get('TIME_ENTRY_INTERVAL_INDEX_TTL_SECONDS', 60)
+    )
+    TIME_ENTRY_COUNT_CACHE_ENABLED = (
+        os.environ.get('TIME_ENTRY_COUNT_CACHE_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    TIME_ENTRY_COUNT_CACHE_TTL_SECONDS = int(
+        os.environ.get('TIME_ENTRY_COUNT_CACHE_TTL_SECONDS', 60)
+    )
+    WORKED_TIME_ROLLUPS_ENABLED = (
+        os.environ.get('WORKED_TIME_ROLLUPS_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    USERS_DIRECTORY_SNAPSHOT_ENABLED = (
+        os.environ.get('USERS_DIRECTORY_SNAPSHOT_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    USERS_DIRECTORY_REFRESH_SECONDS = float(
+        os.environ.get('USERS_DIRECTORY_REFRESH_SECONDS', 300)
+    )
+    CHANGE_FEED_ENABLED = (
+        os.environ.get('CHANGE_FEED_ENABLED', "false").lower()
+        not in DISABLE_STR_VALUES
+    )
+    CHANGE_FEED_POLL_INTERVAL_SECONDS = float(
+        os.environ.get('CHANGE_FEED_POLL_INTERVAL_SECONDS', 5)
+    )
+    CHANGE_FEED_LEASE_CONTAINER = os.environ.get('CHANGE_FEED_LEASE_CONTAINER')
+    CHANGE_FEED_NAME = os.environ.get('CHANGE_FEED_NAME')
 
 
 class TestConfig(CosmosDB, SQLConfig):
     TESTING = True
     FLASK_DEBUG = True
+    COSMOS_DATABASE_WARM_UP = False
+    REFERENCE_CACHE_ENABLED = False
+    CHANGE_FEED_ENABLED = False
+    SLOW_QUERY_LOG_ENABLED = False
+    TIME_ENTRY_INTERVAL_INDEX_ENABLED = False
+    TIME_ENTRY_COUNT_CACHE_ENABLED = False
+    WORKED_TIME_ROLLUPS_ENABLED = False
+    USERS_DIRECTORY_SNAPSHOT_ENABLED = False
     TEST_TABLE = 'tests'
     SQL_DATABASE_URI = os.environ.get('SQL_DATABASE_URI')
     SQLALCHEMY_DATABASE_URI = SQL_DATABASE_URI or 'sqlite:///:memory:'
@@ -74,3 +174,5 @@ ProductionConfig = AzureProductionConfig
 
 class CLIConfig(DefaultConfig):
     FLASK_DEBUG = False
+    CHANGE_FEED_ENABLED = False
+    SLOW_QUERY_LOG_ENABLED = False
@@ -6,6 +6,7 @@ from commons.data_access_layer.cosmos_db import (
     CosmosDBModel,
     CosmosDBRepository,
     CosmosDBDao,
+    repository_registry,
 )
 from time_tracker_api.database import CRUDDao, APICosmosDBDao
 from utils.enums.status import Status
@@ -51,7 +52,12 @@ class CustomerCosmosDBDao(APICosmosDBDao, CustomerDao):
 
 
 def create_dao() -> CustomerDao:
-    repository = CosmosDBRepository.from_definition(
-        container_definition, mapper=CustomerCosmosDBModel
+    repository = repository_registry.get(
+        container_definition['id'],
+        lambda: CosmosDBRepository.from_definition(
+            container_definition,
+            mapper=CustomerCosmosDBModel,
+            cached=True,
+        ),
     )
     return CustomerCosmosDBDao(repository)
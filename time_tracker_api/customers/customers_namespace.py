@@ -5,6 +5,8 @@ from flask_restplus._http import HTTPStatus
 from time_tracker_api.api import (
     common_fields,
     api,
+    add_fields_argument,
+    select_fields,
     remove_required_constraint,
     NullableString,
 )
@@ -66,17 +68,20 @@ list_customers_attribs_parser.add_argument(
     help="(Filter) Permits to get a list of customers actives or inactives",
     location='args',
 )
+add_fields_argument(list_customers_attribs_parser, customer)
 
 
 @ns.route('')
 class Customers(Resource):
     @ns.doc('list_customers')
+    @select_fields
     @ns.marshal_list_with(customer)
     @ns.expect(list_customers_attribs_parser)
     def get(self):
         """List all customers"""
         conditions = list_customers_attribs_parser.parse_args()
-        return customer_dao.get_all(conditions=conditions)
+        fields = conditions.pop('fields', None)
+        return customer_dao.get_all(conditions=conditions, fields=fields)
 
     @ns.doc('create_customer')
     @ns.response(HTTPStatus.CONFLICT, 'This customer already exists')
@@ -11,6 +11,7 @@ from flask import Flask
 
 from commons.data_access_layer.cosmos_db import CosmosDBDao
 from commons.data_access_layer.database import EventContext
+from commons.data_access_layer.metrics import tag_dao_method
 from time_tracker_api.security import current_user_id, current_user_tenant_id, current_role_user, roles
 
 
@@ -72,12 +73,20 @@ class ApiEventContext(EventContext):
 
 class APICosmosDBDao(CosmosDBDao):
     def create_event_context(self, action: str = None, description: str = None):
+        tag_dao_method(self)
         return ApiEventContext(self.repository.container.id, action,
                                description=description)
 
 
 def init_app(app: Flask) -> None:
     init_cosmos_db(app)
+    init_resilience(app)
+    init_cache(app)
+    init_metrics(app)
+    init_slow_query_log(app)
+    init_time_entry_interval_index(app)
+    init_time_entry_count_cache(app)
+    init_worked_time_rollups(app)
 
 
 def init_sql(app: Flask) -> None:
@@ -88,3 +97,52 @@ def init_sql(app: Flask) -> None:
 def init_cosmos_db(app: Flask) -> None:
     from commons.data_access_layer.cosmos_db import init_app
     init_app(app)
+
+
+def init_resilience(app: Flask) -> None:
+    from commons.data_access_layer.resilience import init_app
+    init_app(app)
+
+
+def init_cache(app: Flask) -> None:
+    from commons.data_access_layer.cache import init_app
+    init_app(app)
+
+
+def warm_up(app: Flask) -> None:
+    from commons.data_access_layer.cosmos_db import warm_up
+    warm_up(app)
+
+
+def start_change_feed(app: Flask) -> None:
+    from commons.data_access_layer.change_feed import start
+    start(app)
+
+
+def init_metrics(app: Flask) -> None:
+    from commons.data_access_layer.metrics import init_app
+    init_app(app)
+
+
+def init_slow_query_log(app: Flask) -> None:
+    from commons.data_access_layer.slow_query_log import init_app
+    init_app(app)
+
+
+def init_time_entry_interval_index(app: Flask) -> None:
+    from time_tracker_api.time_entries.time_entries_interval_index import (
+        init_app,
+    )
+    init_app(app)
+
+
+def init_time_entry_count_cache(app: Flask) -> None:
+    from time_tracker_api.time_entries.time_entries_count_cache import (
+        init_app,
+    )
+    init_app(app)
+
+
+def init_worked_time_rollups(app: Flask) -> None:
+    from time_tracker_api.time_entries.time_entries_rollups import init_app
+    init_app(app)
@@ -0,0 +1,137 @@
+from faker import Faker
+from flask_restplus import abort, fields, Resource
+from flask_restplus._http import HTTPStatus
+
+from commons.data_access_layer import resilience
+from commons.data_access_layer.metrics import metrics_registry
+from time_tracker_api.api import api
+from time_tracker_api.security import current_role_user, get_token_json, roles
+
+faker = Faker()
+
+ns = api.namespace(
+    'metrics', description='Namespace of the API for performance metrics'
+)
+
+# Cosmos DB Metric Model
+cosmos_db_metric = ns.model(
+    'CosmosDBMetric',
+    {
+        'endpoint': fields.String(
+            title='Endpoint',
+            description='Flask endpoint of the requests that made the calls',
+            example='time-entries_time_entries',
+        ),
+        'dao_method': fields.String(
+            title='DAO method',
+            description='DAO method that made the calls',
+            example='TimeEntriesCosmosDBDao.get_all',
+        ),
+        'container_id': fields.String(
+            title='Container',
+            description='Id of the Cosmos DB container',
+            example='time_entry',
+        ),
+        'operation': fields.String(
+            title='Operation',
+            description='Operation of the Cosmos DB SDK',
+            example=faker.random_element(['query_items', 'read_item']),
+        ),
+        'calls': fields.Integer(
+            title='Calls',
+            description='Amount of calls, a query counts one per page',
+            example=faker.random_int(1, 100),
+        ),
+        'request_charge': fields.Float(
+            title='Request charge',
+            description='Total request units (RU) consumed by the calls',
+            example=faker.pyfloat(positive=True, max_value=1000),
+        ),
+        'duration_ms': fields.Float(
+            title='Duration',
+            description='Total duration of the calls in milliseconds',
+            example=faker.pyfloat(positive=True, max_value=1000),
+        ),
+        'max_duration_ms': fields.Float(
+            title='Max duration',
+            description='Duration of the slowest call in milliseconds',
+            example=faker.pyfloat(positive=True, max_value=100),
+        ),
+        'item_count': fields.Integer(
+            title='Item count',
+            description='Amount of items returned by the calls',
+            example=faker.random_int(1, 1000),
+        ),
+    },
+)
+
+# Cosmos DB Concurrency Model
+cosmos_db_concurrency = ns.model(
+    'CosmosDBConcurrency',
+    {
+        'container_id': fields.String(
+            title='Container',
+            description='Id of the Cosmos DB container',
+            example='time_entry',
+        ),
+        'limit': fields.Integer(
+            title='Limit',
+            description='Current limit of calls in flight to the container',
+            example=faker.random_int(1, 64),
+        ),
+        'in_flight': fields.Integer(
+            title='In flight',
+            description='Calls to the container that are running',
+            example=faker.random_int(0, 64),
+        ),
+        'queue_depth': fields.Integer(
+            title='Queue depth',
+            description='Calls waiting for the limit to let them run',
+            example=faker.random_int(0, 10),
+        ),
+        'throttled_count': fields.Integer(
+            title='Throttled count',
+            description='Calls throttled by Cosmos DB since the app started',
+            example=faker.random_int(0, 100),
+        ),
+    },
+)
+
+
+def check_current_user_is_admin():
+    """
+    The metrics add up the calls of every tenant, so only the admins can
+    read them
+    """
+    if get_token_json() is None:
+        abort(message='The JWT is missing', code=HTTPStatus.UNAUTHORIZED)
+    if current_role_user() != roles.get("admin").get("name"):
+        abort(HTTPStatus.FORBIDDEN, "You don't have enough permissions.")
+
+
+@ns.route('/cosmos-db')
+class CosmosDBMetrics(Resource):
+    @ns.doc('list_cosmos_db_metrics')
+    @ns.response(HTTPStatus.FORBIDDEN, 'The current user is not an admin')
+    @ns.marshal_list_with(cosmos_db_metric)
+    def get(self):
+        """
+        List the metrics of the calls to Cosmos DB since the app started,
+        the most expensive in request units first
+        """
+        check_current_user_is_admin()
+        return metrics_registry.snapshot()
+
+
+@ns.route('/cosmos-db/concurrency')
+class CosmosDBConcurrency(Resource):
+    @ns.doc('list_cosmos_db_concurrency')
+    @ns.response(HTTPStatus.FORBIDDEN, 'The current user is not an admin')
+    @ns.marshal_list_with(cosmos_db_concurrency)
+    def get(self):
+        """
+        List the adaptive concurrency limit of each Cosmos DB container,
+        with the calls in flight and the calls waiting in the queue
+        """
+        check_current_user_is_admin()
+        return resilience.limiter_registry.snapshot()
@@ -6,6 +6,7 @@ from commons.data_access_layer.cosmos_db import (
     CosmosDBModel,
     CosmosDBDao,
     CosmosDBRepository,
+    repository_registry,
 )
 from time_tracker_api.database import CRUDDao, APICosmosDBDao
 
@@ -53,7 +54,12 @@ class ProjectTypeCosmosDBDao(APICosmosDBDao, ProjectTypeDao):
 
 
 def create_dao() -> ProjectTypeDao:
-    repository = CosmosDBRepository.from_definition(
-        container_definition, mapper=ProjectTypeCosmosDBModel
+    repository = repository_registry.get(
+        container_definition['id'],
+        lambda: CosmosDBRepository.from_definition(
+            container_definition,
+            mapper=ProjectTypeCosmosDBModel,
+            cached=True,
+        ),
     )
     return ProjectTypeCosmosDBDao(repository)
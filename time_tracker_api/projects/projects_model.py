@@ -4,6 +4,7 @@ from commons.data_access_layer.cosmos_db import (
     CosmosDBModel,
     CosmosDBDao,
     CosmosDBRepository,
+    repository_registry,
 )
 from time_tracker_api.database import CRUDDao, APICosmosDBDao
 from typing import List, Callable
@@ -74,6 +75,8 @@ class ProjectCosmosDBRepository(CosmosDBRepository):
             container_id=container_definition['id'],
             partition_key_attribute='tenant_id',
             mapper=ProjectCosmosDBModel,
+            required_fields=['customer_id', 'project_type_id'],
+            cached=True,
         )
 
     def find_all(
@@ -84,23 +87,18 @@ class ProjectCosmosDBRepository(CosmosDBRepository):
         customer_ids: List[str] = None,
         visible_only=True,
         mapper: Callable = None,
+        fields: List[str] = None,
     ):
         query_builder = (
-            CosmosDBQueryBuilder()
+            CosmosDBQueryBuilder(parameterize_lists=True)
+            .add_select_conditions(self.get_select_columns(fields))
             .add_sql_where_equal_condition(conditions)
             .add_sql_in_condition("id", project_ids)
             .add_sql_in_condition("customer_id", customer_ids)
             .add_sql_visibility_condition(visible_only)
             .build()
         )
-        query_str = query_builder.get_query()
-        tenant_id_value = self.find_partition_key_value(event_context)
-        params = query_builder.get_parameters()
-        result = self.container.query_items(
-            query=query_str,
-            parameters=params,
-            partition_key=tenant_id_value,
-        )
+        result = self.query_cached(query_builder, event_context)
         function_mapper = self.get_mapper_or_dict(mapper)
         return list(map(function_mapper, result))
 
@@ -122,6 +120,32 @@ class ProjectCosmosDBDao(APICosmosDBDao, ProjectDao):
         setattr(project, 'customer_name', customer.name)
         return project
 
+    def get_many(
+        self, ids: List[str], visible_only=True, with_customer_names=True
+    ) -> list:
+        """
+        Get the projects with the given ids, including the name of their
+        customer
+        :param (list) ids: projects' ids
+        :param (bool) with_customer_names: read the customers of the
+        projects to add their names
+        :return (list): ProjectCosmosDBModel object list
+        """
+        event_ctx = self.create_event_context("read-many")
+        projects = self.repository.find_many(
+            ids, event_ctx, visible_only=visible_only
+        )
+        if not with_customer_names:
+            return projects
+        customers = customers_create_dao().get_many(
+            [project.customer_id for project in projects], visible_only=False
+        )
+        customer_names = {customer.id: customer.name for customer in customers}
+        for project in projects:
+            customer_name = customer_names.get(project.customer_id)
+            setattr(project, 'customer_name', customer_name)
+        return projects
+
     @add_custom_attribute_in_list('customer', customers_create_dao)
     @add_custom_attribute_in_list('project_type', project_types_create_dao)
     def get_all(
@@ -154,6 +178,7 @@ class ProjectCosmosDBDao(APICosmosDBDao, ProjectDao):
             conditions=conditions,
             project_ids=project_ids,
             customer_ids=customers_id,
+            fields=kwargs.get('fields'),
         )
 
         add_customer_name_to_projects(projects, customers)
@@ -191,5 +216,7 @@ class ProjectCosmosDBDao(APICosmosDBDao, ProjectDao):
 
 
 def create_dao() -> ProjectDao:
-    repository = ProjectCosmosDBRepository()
+    repository = repository_registry.get(
+        container_definition['id'], ProjectCosmosDBRepository
+    )
     return ProjectCosmosDBDao(repository)
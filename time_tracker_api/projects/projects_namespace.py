@@ -5,6 +5,8 @@ from flask_restplus._http import HTTPStatus
 from time_tracker_api.api import (
     common_fields,
     create_attributes_filter,
+    add_fields_argument,
+    select_fields,
     UUID,
     api,
     remove_required_constraint,
@@ -132,18 +134,23 @@ project_dao = create_dao()
 attributes_filter = create_attributes_filter(
     ns, project, ["customer_id", "project_type_id", "status"]
 )
+add_fields_argument(attributes_filter, project)
 
 
 @ns.route('')
 class Projects(Resource):
     @ns.doc('list_projects')
     @ns.expect(attributes_filter)
+    @select_fields
     @ns.marshal_list_with(project)
     def get(self):
         """List all projects"""
         conditions = attributes_filter.parse_args()
+        fields = conditions.pop('fields', None)
         return project_dao.get_all(
-            conditions=conditions, customer_status=Status.ACTIVE.value
+            conditions=conditions,
+            customer_status=Status.ACTIVE.value,
+            fields=fields,
         )
 
     @ns.doc('create_project')
@@ -6,6 +6,7 @@ from commons.data_access_layer.cosmos_db import (
     CosmosDBModel,
     CosmosDBDao,
     CosmosDBRepository,
+    repository_registry,
 )
 from time_tracker_api.database import CRUDDao, APICosmosDBDao
 
@@ -41,8 +42,13 @@ class TechnologyCosmosDBModel(CosmosDBModel):
 
 
 def create_dao() -> TechnologyDao:
-    repository = CosmosDBRepository.from_definition(
-        container_definition, mapper=TechnologyCosmosDBModel
+    repository = repository_registry.get(
+        container_definition['id'],
+        lambda: CosmosDBRepository.from_definition(
+            container_definition,
+            mapper=TechnologyCosmosDBModel,
+            cached=True,
+        ),
     )
 
     class TechnologyCosmosDBDao(APICosmosDBDao, TechnologyDao):
@@ -0,0 +1,120 @@
+"""
+Cache of the amount of time entries that match the filters of the
+paginated list, so paging through the same filters counts them once.
+
+A count is kept with the write versions of the users it counts. Every write
+of a time entry increments the version of its owner and the version of all
+the users of the tenant, so only the counts that include that owner are
+computed again. The versions are kept in the backend of the repository
+cache: with Redis the writes of every worker are seen, otherwise the writes
+of the other workers are seen through the change feed, when it is enabled,
+or when the counts expire.
+"""
+from typing import Callable, Hashable, List, Optional
+
+from flask import Flask
+
+from commons.data_access_layer import cache, change_feed
+from commons.data_access_layer.cache import (
+    CacheScope,
+    LocalCacheBackend,
+    RepositoryCache,
+)
+
+# Owner of the version incremented by the writes of any user
+ALL_USERS = '*'
+
+
+class TimeEntryCountCache:
+    def __init__(self, repository_cache: RepositoryCache, container_id: str):
+        self.repository_cache = repository_cache
+        self.container_id = container_id + '-count'
+
+    def get_or_count(
+        self,
+        tenant_id: str,
+        owner_ids: Optional[List[str]],
+        key: Hashable,
+        count: Callable[[], int],
+    ) -> int:
+        """
+        :param owner_ids: the users whose entries are counted, None for all
+        the users of the tenant
+        :param key: JSON serializable value that identifies the filters
+        """
+        owners = sorted(set(owner_ids)) if owner_ids else [ALL_USERS]
+        versions = [self.version(tenant_id)] + [
+            self.version(tenant_id, owner_id) for owner_id in owners
+        ]
+        scope = CacheScope(
+            self.repository_cache,
+            'time-tracker:{}:{}'.format(self.container_id, tenant_id),
+            '.'.join(versions),
+        )
+        return scope.get_or_load([owners, key], count)
+
+    def version(self, tenant_id: str, owner_id: str = None) -> str:
+        return self.repository_cache.scope(
+            self.container_id, self.versioned_name(tenant_id, owner_id)
+        ).version
+
+    def invalidate(self, tenant_id: str, owner_id: str = None):
+        """
+        Discard the counts that include the entries of the owner, or every
+        count of the tenant when the owner is not known
+        """
+        if owner_id is None:
+            names = [self.versioned_name(tenant_id)]
+        else:
+            names = [
+                self.versioned_name(tenant_id, owner_id),
+                self.versioned_name(tenant_id, ALL_USERS),
+            ]
+        for name in names:
+            self.repository_cache.invalidate(self.container_id, name)
+
+    @staticmethod
+    def versioned_name(tenant_id: str, owner_id: str = None) -> str:
+        if owner_id is None:
+            return tenant_id
+        return '{}:{}'.format(tenant_id, owner_id)
+
+
+def invalidate_changes(container_id: str, items: List[dict]):
+    """
+    Handler of the change feed of the time entries
+    """
+    if count_cache is not None:
+        owners = {(i.get('tenant_id'), i.get('owner_id')) for i in items}
+        for tenant_id, owner_id in owners:
+            count_cache.invalidate(tenant_id, owner_id)
+
+
+count_cache: Optional[TimeEntryCountCache] = None
+
+
+def init_app(app: Flask) -> None:
+    global count_cache
+    if not app.config.get('TIME_ENTRY_COUNT_CACHE_ENABLED', False):
+        count_cache = None
+        return
+
+    from time_tracker_api.time_entries.time_entries_model import (
+        container_definition,
+    )
+
+    if cache.repository_cache is not None:
+        backend = cache.repository_cache.backend
+    else:
+        backend = LocalCacheBackend()
+    count_cache = TimeEntryCountCache(
+        RepositoryCache(
+            backend,
+            ttl=app.config.get('TIME_ENTRY_COUNT_CACHE_TTL_SECONDS', 60),
+        ),
+        container_definition['id'],
+    )
+
+    handlers = change_feed.change_feed_handlers[container_definition['id']]
+    if invalidate_changes not in handlers:
+        handlers.append(invalidate_changes)
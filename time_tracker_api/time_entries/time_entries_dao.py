@@ -2,6 +2,7 @@ import abc
 from commons.data_access_layer.cosmos_db import (
     CosmosDBDao,
     CustomError,
+    repository_registry,
 )
 from utils.extend_model import (
     add_project_info_to_time_entries,
@@ -23,12 +24,17 @@ from time_tracker_api.activities import activities_model
 from time_tracker_api.projects import projects_model
 from utils import worked_time
 from datetime import timedelta
+from time_tracker_api.time_entries.time_entries_model import (
+    container_definition,
+)
 from time_tracker_api.time_entries.time_entries_repository import (
     TimeEntryCosmosDBRepository,
 )
+from time_tracker_api.time_entries import time_entries_rollups
 from time_tracker_api.database import CRUDDao, APICosmosDBDao
 from time_tracker_api.security import current_user_id
-from utils.azure_users import AzureConnection
+from time_tracker_api.users import users_directory
+from utils.concurrency import run_concurrently
 
 
 class TimeEntriesDao(CRUDDao):
@@ -97,13 +103,12 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
         )
         date_range = self.handle_date_filter_args(args=conditions)
         limit = conditions.pop("limit", None)
-        azure_connection = AzureConnection()
-        current_user_is_tester = azure_connection.is_test_user(
+        current_user_is_tester = users_directory.is_test_user(
             event_ctx.user_id
         )
 
         test_user_ids = (
-            azure_connection.get_test_user_ids()
+            users_directory.get_test_user_ids()
             if not current_user_is_tester and is_complete_query
             else None
         )
@@ -115,6 +120,7 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
             date_range=date_range,
             max_count=limit,
             event_context=event_ctx,
+            fields=kwargs.get('fields'),
         )
 
         return time_entries_list
@@ -149,27 +155,17 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
         date_range = self.handle_date_filter_args(args=conditions)
 
         project_dao = projects_model.create_dao()
-        projects = project_dao.get_all()
-        projects_ids = [project.id for project in projects]
-
         activity_dao = activities_model.create_dao()
-        activities = activity_dao.get_all(
-            visible_only=False,
+        projects, activities = run_concurrently(
+            project_dao.get_all,
+            lambda: activity_dao.get_all(visible_only=False),
+        )
+        result = self.repository.find_latest_entries_by_project(
+            event_ctx,
+            [project.id for project in projects],
+            conditions=conditions,
+            date_range=date_range,
         )
-
-        result = []
-        for id_project in projects_ids:
-            conditions.update({"project_id": id_project})
-
-            latest = self.repository.find_all_entries(
-                event_ctx,
-                conditions=conditions,
-                date_range=date_range,
-                max_count=1,
-            )
-
-            if len(latest) > 0:
-                self.append = result.append(latest[0])
 
         add_activity_name_to_time_entries(result, activities)
         add_project_info_to_time_entries(result, projects)
@@ -177,45 +173,37 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
         return result
 
     def get_all_paginated(self, conditions: dict = None, **kwargs) -> list:
-        get_all_conditions = dict(conditions)
-        get_all_conditions.pop("length")
-        get_all_conditions.pop("start")
         event_ctx = self.create_event_context("read-many")
-        get_all_conditions.update({"owner_id": event_ctx.user_id})
-        owner_ids = self.get_owner_ids(
-            is_admin=event_ctx.is_admin,
-            conditions=get_all_conditions,
-        )
-        date_range = self.handle_date_filter_args(args=get_all_conditions)
-        records_total = self.repository.count(
-            event_ctx,
-            conditions=get_all_conditions,
-            owner_ids=owner_ids,
-            date_range=date_range,
-        )
+        length = conditions.pop("length", None)
+        continuation_token = conditions.pop("continuation_token", None)
         conditions.update({"owner_id": event_ctx.user_id})
         owner_ids = self.get_owner_ids(
             is_admin=event_ctx.is_admin,
             conditions=conditions,
         )
         date_range = self.handle_date_filter_args(args=conditions)
-        length = conditions.get("length", None)
-        conditions.pop("length", None)
-        start = conditions.get("start", None)
-        conditions.pop("start", None)
 
-        time_entries = self.repository.find_all(
-            event_context=event_ctx,
-            conditions=conditions,
-            owner_ids=owner_ids,
-            date_range=date_range,
-            max_count=length,
-            offset=start,
+        records_total, (time_entries, next_token) = run_concurrently(
+            lambda: self.repository.count(
+                event_ctx,
+                conditions=conditions,
+                owner_ids=owner_ids,
+                date_range=date_range,
+            ),
+            lambda: self.repository.find_all_by_page(
+                event_context=event_ctx,
+                conditions=conditions,
+                owner_ids=owner_ids,
+                date_range=date_range,
+                page_size=length,
+                continuation_token=continuation_token,
+            ),
         )
 
         return {
             'records_total': records_total,
             'data': time_entries,
+            'continuation_token': next_token,
         }
 
     def get(self, id):
@@ -234,10 +222,23 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
         data['owner_id'] = event_ctx.user_id
         return self.repository.create(data, event_ctx)
 
+    def create_many(self, data_list: list) -> list:
+        event_ctx = self.create_event_context("create-many")
+        for data in data_list:
+            data['owner_id'] = event_ctx.user_id
+        return self.repository.create_many(data_list, event_ctx)
+
+    def upsert_many(self, data_list: list) -> list:
+        event_ctx = self.create_event_context("upsert-many")
+        for data in data_list:
+            data['owner_id'] = event_ctx.user_id
+        return self.repository.upsert_many(data_list, event_ctx)
+
     def update(self, id, data: dict, description=None):
         event_ctx = self.create_event_context("update", description)
         data['owner_id'] = event_ctx.user_id
-        time_entry = self.repository.find(id, event_ctx)
+        time_entry_data = self.repository.find(id, event_ctx, mapper=dict)
+        time_entry = self.repository.mapper(time_entry_data)
         self.check_whether_current_user_owns_item(time_entry)
 
         if data.get('update_last_entry_if_overlap', None):
@@ -252,12 +253,14 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
             id,
             data,
             event_ctx,
+            current_item=time_entry_data,
         )
 
     def stop(self, id):
         event_ctx = self.create_event_context("update", "Stop time entry")
 
-        time_entry = self.repository.find(id, event_ctx)
+        time_entry_data = self.repository.find(id, event_ctx, mapper=dict)
+        time_entry = self.repository.mapper(time_entry_data)
         self.check_whether_current_user_owns_item(time_entry)
         self.check_time_entry_is_not_stopped(time_entry)
 
@@ -265,12 +268,14 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
             id,
             {'end_date': current_datetime_str()},
             event_ctx,
+            current_item=time_entry_data,
         )
 
     def restart(self, id):
         event_ctx = self.create_event_context("update", "Restart time entry")
 
-        time_entry = self.repository.find(id, event_ctx)
+        time_entry_data = self.repository.find(id, event_ctx, mapper=dict)
+        time_entry = self.repository.mapper(time_entry_data)
         self.check_whether_current_user_owns_item(time_entry)
         self.check_time_entry_is_not_started(time_entry)
 
@@ -278,15 +283,18 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
             id,
             {'end_date': None},
             event_ctx,
+            current_item=time_entry_data,
         )
 
     def delete(self, id):
         event_ctx = self.create_event_context("delete")
-        time_entry = self.repository.find(id, event_ctx)
+        time_entry_data = self.repository.find(id, event_ctx, mapper=dict)
+        time_entry = self.repository.mapper(time_entry_data)
         self.check_whether_current_user_owns_item(time_entry)
         self.repository.delete(
             id,
             event_ctx,
+            current_item=time_entry_data,
         )
 
     def find_running(self):
@@ -301,8 +309,16 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
             "read", "Summary of worked time in the current month"
         )
 
+        worked_time_rollups = time_entries_rollups.worked_time_rollups
+        if worked_time_rollups is not None:
+            return worked_time_rollups.summary(
+                event_ctx.tenant_id,
+                event_ctx.user_id,
+                time_offset=args.get('time_offset'),
+            )
+
         conditions = {"owner_id": event_ctx.user_id}
-        time_entries = self.repository.find_all_entries(
+        time_entries = self.repository.iter_all_entries(
             event_ctx,
             conditions=conditions,
             date_range=worked_time.date_range(),
@@ -332,6 +348,8 @@ class TimeEntriesCosmosDBDao(APICosmosDBDao, TimeEntriesDao):
 
 
 def create_dao() -> TimeEntriesDao:
-    repository = TimeEntryCosmosDBRepository()
+    repository = repository_registry.get(
+        container_definition['id'], TimeEntryCosmosDBRepository
+    )
 
     return TimeEntriesCosmosDBDao(repository)
@@ -0,0 +1,185 @@
+"""
+In-process index of the recent time entries of each user, to check that a
+new or updated entry doesn't intercept another one without querying Cosmos
+DB on every write.
+
+The index of a user holds the finished and visible entries that end after
+the start of a window of days, loaded with one query the first time it is
+needed. It answers the checks of the date ranges that start inside the
+window and is kept current with the writes of this process and, when the
+change feed is enabled, with the writes of the other processes. Without the
+change feed, an index can miss the writes of other workers until it
+expires, so keep a short TTL when the API runs more than one worker.
+"""
+import threading
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+from flask import Flask
+
+from commons.data_access_layer import change_feed
+from utils.cache import LRUCache
+from utils.interval_index import IntervalIndex
+from utils.time import current_datetime, datetime_str
+
+# Receives the start of the window and returns the entries that end after it
+EntriesLoader = Callable[[str], List[dict]]
+
+
+class UserIntervalIndex:
+    def __init__(self, covered_from: str, entries: List[dict]):
+        """
+        :param covered_from: the index has every entry that ends after it
+        """
+        self.covered_from = covered_from
+        self.index = IntervalIndex(
+            [
+                (entry['start_date'], entry['end_date'], entry['id'])
+                for entry in entries
+                if is_indexable(entry)
+            ]
+        )
+
+    def covers(self, start_date: str) -> bool:
+        return start_date >= self.covered_from
+
+    def apply(self, entry: dict):
+        if is_indexable(entry) and entry['end_date'] >= self.covered_from:
+            self.index.add(entry['id'], entry['start_date'], entry['end_date'])
+        else:
+            self.index.remove(entry['id'])
+
+
+def is_indexable(entry: dict) -> bool:
+    """
+    Running and deleted entries are never an interception, as in
+    TimeEntryCosmosDBRepository.find_interception_with_date_range
+    """
+    return (
+        isinstance(entry.get('start_date'), str)
+        and isinstance(entry.get('end_date'), str)
+        and 'deleted' not in entry
+    )
+
+
+class TimeEntryIntervalIndexes:
+    def __init__(
+        self,
+        window_days: int = 31,
+        ttl_seconds: float = 60,
+        max_users: int = 1024,
+    ):
+        self.window_days = window_days
+        self._indexes = LRUCache(maxsize=max_users, ttl=ttl_seconds)
+        # Keys being loaded, and whether they were written meanwhile
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def find_interception(
+        self,
+        tenant_id: str,
+        owner_id: str,
+        start_date: str,
+        end_date: str,
+        load: EntriesLoader,
+        ignore_id: str = None,
+    ) -> Optional[bool]:
+        """
+        :return: whether an entry of the user intercepts the range, or None
+        when the index can't tell and the database has to be queried
+        """
+        user_index = self.get_or_load(tenant_id, owner_id, load)
+        if user_index is None or not user_index.covers(start_date):
+            return None
+        with self._lock:
+            intercepting_id = user_index.index.find_intersection(
+                start_date, end_date, ignore_id=ignore_id
+            )
+        return intercepting_id is not None
+
+    def get_or_load(
+        self, tenant_id: str, owner_id: str, load: EntriesLoader
+    ) -> Optional[UserIntervalIndex]:
+        key = (tenant_id, owner_id)
+        user_index = self._indexes.get(key)
+        if user_index is not None:
+            return user_index
+
+        covered_from = datetime_str(
+            current_datetime() - timedelta(days=self.window_days)
+        )
+        with self._lock:
+            self._loading[key] = False
+        try:
+            user_index = UserIntervalIndex(covered_from, load(covered_from))
+        finally:
+            with self._lock:
+                written_while_loading = self._loading.pop(key, True)
+        if written_while_loading:
+            # The loaded entries may miss that write
+            return None
+        self._indexes.put(key, user_index)
+        return user_index
+
+    def apply(self, entry: dict):
+        """
+        Update the index of the owner of a written entry, if it is loaded
+        """
+        key = (entry.get('tenant_id'), entry.get('owner_id'))
+        with self._lock:
+            if key in self._loading:
+                self._loading[key] = True
+            user_index = self._indexes.get(key)
+            if user_index is not None:
+                user_index.apply(entry)
+
+    def remove(self, tenant_id: str, id: str):
+        """
+        Discard a permanently deleted entry from the indexes of the tenant
+        """
+        with self._lock:
+            for key in list(self._loading):
+                if key[0] == tenant_id:
+                    self._loading[key] = True
+            for (key_tenant_id, _), user_index in self._indexes.items():
+                if key_tenant_id == tenant_id:
+                    user_index.index.remove(id)
+
+    def clear(self):
+        self._indexes.clear()
+
+
+def apply_changes(container_id: str, items: List[dict]):
+    """
+    Handler of the change feed of the time entries
+    """
+    if interval_indexes is not None:
+        for item in items:
+            interval_indexes.apply(item)
+
+
+interval_indexes: Optional[TimeEntryIntervalIndexes] = None
+
+
+def init_app(app: Flask) -> None:
+    global interval_indexes
+    if not app.config.get('TIME_ENTRY_INTERVAL_INDEX_ENABLED', False):
+        interval_indexes = None
+        return
+
+    interval_indexes = TimeEntryIntervalIndexes(
+        window_days=app.config.get(
+            'TIME_ENTRY_INTERVAL_INDEX_WINDOW_DAYS', 31
+        ),
+        ttl_seconds=app.config.get(
+            'TIME_ENTRY_INTERVAL_INDEX_TTL_SECONDS', 60
+        ),
+        max_users=app.config.get('TIME_ENTRY_INTERVAL_INDEX_MAX_USERS', 1024),
+    )
+    from time_tracker_api.time_entries.time_entries_model import (
+        container_definition,
+    )
+
+    handlers = change_feed.change_feed_handlers[container_definition['id']]
+    if apply_changes not in handlers:
+        handlers.append(apply_changes)
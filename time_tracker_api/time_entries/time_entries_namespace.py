@@ -11,6 +11,8 @@ from commons.data_access_layer.database import COMMENTS_MAX_LENGTH
 from time_tracker_api.api import (
     common_fields,
     create_attributes_filter,
+    add_fields_argument,
+    select_fields,
     api,
     UUID,
     NullableString,
@@ -227,17 +229,21 @@ attributes_filter.add_argument(
     location='args',
 )
 
+add_fields_argument(attributes_filter, time_entry)
+
 
 @ns.route('')
 class TimeEntries(Resource):
     @ns.doc('list_time_entries')
     @ns.expect(attributes_filter)
+    @select_fields
     @ns.marshal_list_with(time_entry)
     @ns.response(HTTPStatus.NOT_FOUND, 'Time entry not found')
     def get(self):
         """List all time entries"""
         conditions = attributes_filter.parse_args()
-        return time_entries_dao.get_all(conditions=conditions)
+        fields = conditions.pop('fields', None)
+        return time_entries_dao.get_all(conditions=conditions, fields=fields)
 
     @ns.doc('create_time_entry')
     @ns.expect(time_entry_input)
@@ -382,6 +388,11 @@ time_entry_paginated = ns.model(
             description='Total number of entries.',
         ),
         'data': fields.List(fields.Nested(time_entry)),
+        'continuation_token': fields.String(
+            title='Continuation token',
+            description='Token to request the next page. '
+            'It is null when there are no more pages.',
+        ),
     },
 )
 
@@ -395,10 +406,11 @@ paginated_attribs_parser.add_argument(
 )
 
 paginated_attribs_parser.add_argument(
-    'start',
-    required=True,
-    type=int,
-    help="(Filter) The number of rows to be removed from the query. (aka offset)",
+    'continuation_token',
+    required=False,
+    store_missing=False,
+    help="(Filter) Token returned by the previous page. "
+    "Omit it to get the first page.",
     location='args',
 )
 
@@ -1,9 +1,11 @@
+from typing import List, Tuple
+
 from utils.query_builder import CosmosDBQueryBuilder
 
 
 class TimeEntryQueryBuilder(CosmosDBQueryBuilder):
-    def __init__(self):
-        super(TimeEntryQueryBuilder, self).__init__()
+    def __init__(self, parameterize_lists: bool = False):
+        super(TimeEntryQueryBuilder, self).__init__(parameterize_lists)
 
     def add_sql_interception_with_date_range_condition(
         self, start_date, end_date
@@ -25,6 +27,40 @@ class TimeEntryQueryBuilder(CosmosDBQueryBuilder):
         )
         return self
 
+    def add_sql_end_date_from_condition(self, end_date_from: str):
+        self.where_conditions.append("c.end_date >= @end_date_from")
+        self.parameters.append(
+            {'name': '@end_date_from', 'value': end_date_from}
+        )
+        return self
+
+    def add_sql_overlap_with_date_ranges_condition(
+        self, date_ranges: List[Tuple[str, str]], include_running=False
+    ):
+        """
+        Finished entries with some time inside any of the date ranges and,
+        optionally, the running ones
+        """
+        conditions = []
+        if include_running:
+            conditions.append(
+                "(NOT IS_DEFINED(c.end_date) OR c.end_date = null)"
+            )
+        for index, (start_date, end_date) in enumerate(date_ranges):
+            conditions.append(
+                f"(c.start_date < @range_end_{index} "
+                f"AND c.end_date > @range_start_{index})"
+            )
+            self.parameters.extend(
+                [
+                    {'name': f'@range_start_{index}', 'value': start_date},
+                    {'name': f'@range_end_{index}', 'value': end_date},
+                ]
+            )
+        if conditions:
+            self.where_conditions.append("(" + " OR ".join(conditions) + ")")
+        return self
+
     def add_sql_is_running_time_entry_condition(self):
         condition = "(NOT IS_DEFINED(c.end_date) OR c.end_date = null)"
         self.where_conditions.append(condition)
@@ -1,4 +1,5 @@
 from commons.data_access_layer.cosmos_db import (
+    BulkOperationResult,
     CosmosDBRepository,
     CustomError,
 )
@@ -16,15 +17,22 @@ from utils.extend_model import (
     add_activity_name_to_time_entries,
     create_in_condition,
     add_user_email_to_time_entries,
+    extend_models,
 )
 import flask
 from flask_restplus import abort
 from flask_restplus._http import HTTPStatus
-from utils.azure_users import AzureConnection
+from time_tracker_api.users import users_directory
+from utils.concurrency import map_concurrently, run_concurrently
 from time_tracker_api.activities import activities_model
 from commons.data_access_layer.database import EventContext
-from typing import List, Callable
+from typing import List, Callable, Optional
 from time_tracker_api.projects import projects_model
+from time_tracker_api.time_entries import (
+    time_entries_count_cache,
+    time_entries_interval_index,
+    time_entries_rollups,
+)
 from time_tracker_api.time_entries.time_entries_query_builder import (
     TimeEntryQueryBuilder,
 )
@@ -41,6 +49,13 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
             partition_key_attribute='tenant_id',
             order_fields=['start_date DESC'],
             mapper=TimeEntryCosmosDBModel,
+            required_fields=[
+                'owner_id',
+                'project_id',
+                'activity_id',
+                'start_date',
+                'end_date',
+            ],
         )
 
     def find_all_entries(
@@ -63,6 +78,70 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         )
         return time_entries
 
+    def iter_all_entries(
+        self,
+        event_context: EventContext,
+        conditions: dict = None,
+        date_range: dict = None,
+        **kwargs,
+    ):
+        conditions = conditions if conditions else {}
+        date_range = date_range if date_range else {}
+
+        return CosmosDBRepository.iter_all(
+            self,
+            event_context=event_context,
+            conditions=conditions,
+            date_range=date_range,
+            page_size=kwargs.get("page_size", None),
+        )
+
+    def find_latest_entries_by_project(
+        self,
+        event_context: EventContext,
+        project_ids: List[str],
+        conditions: dict = None,
+        date_range: dict = None,
+        mapper: Callable = None,
+    ) -> list:
+        """
+        Find the latest entry of each project with a query ordered by
+        start_date and limited to one item, running the queries of the
+        projects concurrently. The query plan of the SDK supports ORDER BY
+        and OFFSET/LIMIT, but not GROUP BY.
+        :return: the latest entries, in the order of the projects
+        """
+        conditions = conditions if conditions else {}
+        date_range = date_range if date_range else {}
+        tenant_id_value = self.find_partition_key_value(event_context)
+
+        def find_latest_entry(project_id: str) -> Optional[dict]:
+            query_builder = (
+                TimeEntryQueryBuilder()
+                .add_sql_where_equal_condition(
+                    {**conditions, 'project_id': project_id}
+                )
+                .add_sql_visibility_condition(True)
+                .add_sql_date_range_condition(date_range)
+                .add_sql_order_by_condition('start_date', Order.DESC)
+                .add_sql_limit_condition(1)
+                .add_sql_offset_condition(0)
+                .build()
+            )
+            result = self.container.query_items(
+                query=query_builder.get_query(),
+                parameters=query_builder.get_parameters(),
+                partition_key=tenant_id_value,
+            )
+            return next(iter(result), None)
+
+        function_mapper = self.get_mapper_or_dict(mapper)
+        return [
+            function_mapper(entry)
+            for entry in map_concurrently(find_latest_entry, project_ids)
+            if entry is not None
+        ]
+
     def count(
         self,
         event_context: EventContext,
@@ -73,7 +152,7 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         **kwargs,
     ):
         query_builder = (
-            TimeEntryQueryBuilder()
+            TimeEntryQueryBuilder(parameterize_lists=True)
             .add_select_conditions(["VALUE COUNT(1)"])
             .add_sql_in_condition('owner_id', owner_ids)
             .add_sql_where_equal_condition(conditions)
@@ -85,13 +164,24 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         query_str = query_builder.get_query()
         params = query_builder.get_parameters()
         tenant_id_value = self.find_partition_key_value(event_context)
-        result = self.container.query_items(
-            query=query_str,
-            parameters=params,
-            partition_key=tenant_id_value,
-        )
 
-        return result.next()
+        def count() -> int:
+            result = self.container.query_items(
+                query=query_str,
+                parameters=params,
+                partition_key=tenant_id_value,
+            )
+            return result.next()
+
+        count_cache = time_entries_count_cache.count_cache
+        if count_cache is None:
+            return count()
+        counted_owner_ids = owner_ids
+        if not counted_owner_ids and conditions and conditions.get('owner_id'):
+            counted_owner_ids = [conditions['owner_id']]
+        return count_cache.get_or_count(
+            tenant_id_value, counted_owner_ids, [query_str, params], count
+        )
 
     def add_complementary_info(
         self, time_entries=None, max_count=None, exist_conditions=False
@@ -101,24 +191,15 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
             activity_ids = list(set([x.activity_id for x in time_entries]))
 
             project_dao = projects_model.create_dao()
-            projects = project_dao.get_all(
-                project_ids=project_ids,
-                visible_only=False,
-                max_count=max_count,
-            )
-
-            add_project_info_to_time_entries(time_entries, projects)
-
             activity_dao = activities_model.create_dao()
-            activities = activity_dao.get_all(
-                activities_id=activity_ids,
-                visible_only=False,
-                max_count=max_count,
+            projects, activities, users = run_concurrently(
+                lambda: project_dao.get_many(project_ids, visible_only=False),
+                lambda: activity_dao.get_many(activity_ids),
+                users_directory.get_users,
             )
 
+            add_project_info_to_time_entries(time_entries, projects)
             add_activity_name_to_time_entries(time_entries, activities)
-
-            users = AzureConnection().users()
             add_user_email_to_time_entries(time_entries, users)
         elif not time_entries and exist_conditions:
             abort(HTTPStatus.NOT_FOUND, "Time entry not found")
@@ -135,12 +216,14 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         max_count=None,
         visible_only=True,
         mapper: Callable = None,
+        fields: List[str] = None,
     ):
         max_count = self.get_page_size_or(max_count)
         date_range = date_range if date_range else {}
 
         query_builder = (
-            TimeEntryQueryBuilder()
+            TimeEntryQueryBuilder(parameterize_lists=True)
+            .add_select_conditions(self.get_select_columns(fields))
             .add_sql_in_condition('owner_id', owner_ids)
             .add_sql_where_equal_condition(conditions)
             .add_sql_visibility_condition(visible_only)
@@ -169,6 +252,69 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
             time_entries, max_count, exist_conditions
         )
 
+    def find_all_by_page(
+        self,
+        conditions,
+        event_context: EventContext,
+        date_range: dict = None,
+        owner_ids: list = None,
+        test_user_ids=None,
+        page_size: int = None,
+        continuation_token: str = None,
+        visible_only=True,
+        mapper: Callable = None,
+    ):
+        date_range = date_range if date_range else {}
+
+        query_builder = (
+            TimeEntryQueryBuilder(parameterize_lists=True)
+            .add_sql_in_condition('owner_id', owner_ids)
+            .add_sql_where_equal_condition(conditions)
+            .add_sql_visibility_condition(visible_only)
+            .add_sql_date_range_condition(date_range)
+            .add_sql_not_in_condition('owner_id', test_user_ids)
+            .add_sql_order_by_condition('start_date', Order.DESC)
+            .build()
+        )
+
+        time_entries, next_token = self.query_page(
+            query_builder,
+            event_context,
+            page_size=page_size,
+            continuation_token=continuation_token,
+            mapper=mapper,
+        )
+
+        time_entries = self.add_page_info(time_entries)
+        return time_entries, next_token
+
+    def add_page_info(self, time_entries: list) -> list:
+        """
+        Lighter add_complementary_info for a page of entries, which reads
+        the emails of the owners of the page instead of the whole directory
+        """
+        if not time_entries:
+            return time_entries
+
+        project_ids = list({x.project_id for x in time_entries})
+        activity_ids = list({x.activity_id for x in time_entries})
+        owner_ids = list({x.owner_id for x in time_entries})
+
+        project_dao = projects_model.create_dao()
+        activity_dao = activities_model.create_dao()
+        projects, activities, emails = run_concurrently(
+            lambda: project_dao.get_many(project_ids, visible_only=False),
+            lambda: activity_dao.get_many(activity_ids),
+            lambda: users_directory.get_user_emails(owner_ids),
+        )
+
+        add_project_info_to_time_entries(time_entries, projects)
+        add_activity_name_to_time_entries(time_entries, activities)
+        extend_models(
+            time_entries, 'owner_id', emails, {'owner_email': lambda e: e}
+        )
+        return time_entries
+
     def get_last_entry(
         self,
         owner_id: str,
@@ -178,7 +324,7 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         mapper: Callable = None,
     ):
         query_builder = (
-            CosmosDBQueryBuilder()
+            CosmosDBQueryBuilder(parameterize_lists=True)
             .add_sql_where_equal_condition({'owner_id': owner_id})
             .add_sql_order_by_condition('end_date', Order.DESC)
             .add_sql_not_in_condition('id', [id_running_entry])
@@ -212,6 +358,64 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
             update_data = {'end_date': start_date}
             self.partial_update(last_entry.id, update_data, event_context)
 
+    def create(
+        self, data: dict, event_context: EventContext, mapper: Callable = None
+    ):
+        created_item = CosmosDBRepository.create(
+            self, data, event_context, mapper=mapper
+        )
+        self.on_written(data)
+        return created_item
+
+    def upsert(
+        self, data: dict, event_context: EventContext, mapper: Callable = None
+    ):
+        upserted_item = CosmosDBRepository.upsert(
+            self, data, event_context, mapper=mapper
+        )
+        self.on_written(data)
+        return upserted_item
+
+    def update(
+        self,
+        id: str,
+        item_data: dict,
+        event_context: EventContext,
+        mapper: Callable = None,
+    ):
+        updated_item = CosmosDBRepository.update(
+            self, id, item_data, event_context, mapper=mapper
+        )
+        self.on_written(item_data)
+        return updated_item
+
+    def delete_permanently(self, id: str, event_context: EventContext) -> None:
+        CosmosDBRepository.delete_permanently(self, id, event_context)
+        interval_indexes = time_entries_interval_index.interval_indexes
+        if interval_indexes is not None:
+            interval_indexes.remove(event_context.tenant_id, id)
+        count_cache = time_entries_count_cache.count_cache
+        if count_cache is not None:
+            count_cache.invalidate(event_context.tenant_id)
+        worked_time_rollups = time_entries_rollups.worked_time_rollups
+        if worked_time_rollups is not None:
+            worked_time_rollups.discard(event_context.tenant_id, id)
+
+    @staticmethod
+    def on_written(item_data: dict):
+        """
+        Keep the interval index and the cached counts of the owner of a
+        written entry up to date
+        """
+        interval_indexes = time_entries_interval_index.interval_indexes
+        if interval_indexes is not None:
+            interval_indexes.apply(item_data)
+        count_cache = time_entries_count_cache.count_cache
+        if count_cache is not None:
+            count_cache.invalidate(
+                item_data.get('tenant_id'), item_data.get('owner_id')
+            )
+
     def on_create(self, new_item_data: dict, event_context: EventContext):
         CosmosDBRepository.on_create(self, new_item_data, event_context)
 
@@ -227,6 +431,66 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
             self.validate_data(updated_item_data, event_context)
         self.replace_empty_value_per_none(updated_item_data)
 
+    def bulk_write(
+        self,
+        items: List[dict],
+        event_context: EventContext,
+        write: Callable,
+        success_status: int,
+        mapper: Callable = None,
+    ) -> List[BulkOperationResult]:
+        """
+        The entries are written in parallel, so each one is validated against
+        the database but not against the rest of the batch. Entries that
+        intercept another one of the same batch are rejected before writing.
+        """
+        results = [None] * len(items)
+        overlapping_indexes = self.find_overlapping_items(items)
+        for index in overlapping_indexes:
+            results[index] = BulkOperationResult(
+                HTTPStatus.UNPROCESSABLE_ENTITY,
+                message="There is another time entry in that date range",
+            )
+
+        pending_indexes = [
+            index for index in range(len(items)) if results[index] is None
+        ]
+        written = CosmosDBRepository.bulk_write(
+            self,
+            [items[index] for index in pending_indexes],
+            event_context,
+            write,
+            success_status,
+            mapper=mapper,
+        )
+        for index, result in zip(pending_indexes, written):
+            results[index] = result
+        return results
+
+    @staticmethod
+    def find_overlapping_items(items: List[dict]) -> set:
+        now = current_datetime_str()
+        intervals_by_owner = {}
+        for index, item in enumerate(items):
+            if not item.get('start_date'):
+                continue
+            start_date = str_to_datetime(item['start_date'])
+            end_date = str_to_datetime(item.get('end_date') or now)
+            intervals_by_owner.setdefault(item.get('owner_id'), []).append(
+                (start_date, end_date, index)
+            )
+
+        overlapping_indexes = set()
+        for intervals in intervals_by_owner.values():
+            intervals.sort()
+            latest_end, latest_index = None, None
+            for start_date, end_date, index in intervals:
+                if latest_end is not None and start_date < latest_end:
+                    overlapping_indexes.update([index, latest_index])
+                if latest_end is None or end_date > latest_end:
+                    latest_end, latest_index = end_date, index
+        return overlapping_indexes
+
     def find_interception_with_date_range(
         self,
         start_date,
@@ -243,8 +507,27 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         }
         end_date = end_date or current_datetime_str()
 
+        interval_indexes = time_entries_interval_index.interval_indexes
+        if (
+            interval_indexes is not None
+            and visible_only
+            and isinstance(start_date, str)
+        ):
+            exist_collision_entries = interval_indexes.find_interception(
+                tenant_id,
+                owner_id,
+                start_date,
+                end_date,
+                lambda end_date_from: self.find_entries_ending_from(
+                    end_date_from, owner_id, tenant_id
+                ),
+                ignore_id=ignore_id,
+            )
+            if exist_collision_entries is not None:
+                return exist_collision_entries
+
         query_builder = (
-            TimeEntryQueryBuilder()
+            TimeEntryQueryBuilder(parameterize_lists=True)
             .add_sql_interception_with_date_range_condition(
                 start_date, end_date
             )
@@ -269,6 +552,31 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         exist_collision_entries = len(collision_entries) > 0
         return exist_collision_entries
 
+    def find_entries_ending_from(
+        self, end_date_from: str, owner_id: str, tenant_id: str
+    ) -> List[dict]:
+        """
+        Dates of the finished and visible entries of the user that end at or
+        after end_date_from
+        """
+        query_builder = (
+            TimeEntryQueryBuilder()
+            .add_select_conditions(['c.id', 'c.start_date', 'c.end_date'])
+            .add_sql_end_date_from_condition(end_date_from)
+            .add_sql_where_equal_condition(
+                {"owner_id": owner_id, "tenant_id": tenant_id}
+            )
+            .add_sql_visibility_condition(True)
+            .build()
+        )
+        return list(
+            self.container.query_items(
+                query=query_builder.get_query(),
+                parameters=query_builder.get_parameters(),
+                partition_key=tenant_id,
+            )
+        )
+
     def find_running(
         self, tenant_id: str, owner_id: str, mapper: Callable = None
     ):
@@ -278,7 +586,7 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
         }
 
         query_builder = (
-            TimeEntryQueryBuilder()
+            TimeEntryQueryBuilder(parameterize_lists=True)
             .add_sql_is_running_time_entry_condition()
             .add_sql_where_equal_condition(conditions)
             .add_sql_visibility_condition(True)
@@ -304,14 +612,38 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
             raise CustomError(HTTPStatus.NO_CONTENT)
 
     def validate_data(self, data, event_context: EventContext):
+        """
+        The related entities and the interceptions are checked at the same
+        time. The errors are reported in the order of the checks: related
+        entities, end date and interceptions.
+        """
         start_date = data.get('start_date')
 
-        related_project_id = data.get('project_id')
-        related_activity_id = data.get('activity_id')
+        def check_related_entities():
+            return are_related_entry_entities_valid(
+                project_id=data.get('project_id'),
+                activity_id=data.get('activity_id'),
+            )
 
-        are_related_entities_valid = are_related_entry_entities_valid(
-            project_id=related_project_id, activity_id=related_activity_id
-        )
+        def check_interceptions():
+            return self.find_interception_with_date_range(
+                start_date=start_date,
+                end_date=data.get('end_date'),
+                owner_id=event_context.user_id,
+                tenant_id=event_context.tenant_id,
+                ignore_id=data.get('id'),
+            )
+
+        end_date_error = self.find_end_date_error(data)
+        has_ids = data.get('project_id') and data.get('activity_id')
+        if end_date_error is None and has_ids:
+            (
+                are_related_entities_valid,
+                exist_collision_entries,
+            ) = run_concurrently(check_related_entities, check_interceptions)
+        else:
+            are_related_entities_valid = check_related_entities()
+            exist_collision_entries = None
 
         if not are_related_entities_valid.get('is_valid'):
             status_code = are_related_entities_valid.get('status_code')
@@ -321,28 +653,26 @@ class TimeEntryCosmosDBRepository(CosmosDBRepository):
                 description=message,
             )
 
-        if data.get('end_date') is not None:
-            if data['end_date'] <= start_date:
-                raise CustomError(
-                    HTTPStatus.BAD_REQUEST,
-                    description="You must end the time entry after it started",
-                )
-            if data['end_date'] >= current_datetime_str():
-                raise CustomError(
-                    HTTPStatus.BAD_REQUEST,
-                    description="You cannot end a time entry in the future",
-                )
+        if end_date_error is not None:
+            raise CustomError(
+                HTTPStatus.BAD_REQUEST,
+                description=end_date_error,
+            )
 
-        exist_collision_entries = self.find_interception_with_date_range(
-            start_date=start_date,
-            end_date=data.get('end_date'),
-            owner_id=event_context.user_id,
-            tenant_id=event_context.tenant_id,
-            ignore_id=data.get('id'),
-        )
+        if exist_collision_entries is None:
+            exist_collision_entries = check_interceptions()
 
         if exist_collision_entries:
             raise CustomError(
                 HTTPStatus.UNPROCESSABLE_ENTITY,
                 description="There is another time entry in that date range",
             )
+
+    @staticmethod
+    def find_end_date_error(data: dict) -> Optional[str]:
+        if data.get('end_date') is not None:
+            if data['end_date'] <= data.get('start_date'):
+                return "You must end the time entry after it started"
+            if data['end_date'] >= current_datetime_str():
+                return "You cannot end a time entry in the future"
+        return None
@@ -0,0 +1,353 @@
+"""
+Daily rollups of the worked time of each user, so the summary of worked
+time reads one small document per day instead of every time entry of the
+month.
+
+A rollup holds the seconds worked by a user in a UTC day, in total and per
+project and activity, and the ids of the time entries that add up to them.
+The change feed of the time entries rebuilds the rollups of the days a
+changed entry had time in and has time in now, from the entries stored,
+whoever wrote it: the API, the functions or the migrations. A rollup is
+only replaced if nobody wrote it since it was read, before its entries,
+otherwise it is rebuilt again, so concurrent changes can't leave a rollup
+of older entries.
+
+The days without a rollup yet, like the ones before the rollups were
+enabled, are rolled up from the entries the first time they are read and
+stored, even without any worked time, so later reads only find rollups.
+The change feed doesn't report the permanent deletes, so those drop the
+rollups of the entry, to be rolled up again on the next read.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import azure.cosmos.exceptions as exceptions
+from azure.cosmos import PartitionKey
+from flask import Flask
+
+from commons.data_access_layer import change_feed
+from commons.data_access_layer.cosmos_db import CosmosDBRepository
+from time_tracker_api.time_entries.time_entries_query_builder import (
+    TimeEntryQueryBuilder,
+)
+from utils import worked_time
+from utils.concurrency import map_concurrently, run_concurrently
+from utils.query_builder import CosmosDBQueryBuilder
+from utils.time import datetime_str, str_to_datetime
+
+container_definition = {
+    'id': 'time_entry_daily_rollup',
+    'partition_key': PartitionKey(path='/tenant_id'),
+}
+
+# Times a rollup is rebuilt while other writes of its day replace it first
+MAX_REBUILD_ATTEMPTS = 5
+
+
+class WorkedTimeRollups:
+    def __init__(
+        self,
+        time_entries: CosmosDBRepository,
+        rollups: CosmosDBRepository,
+    ):
+        self.time_entries = time_entries
+        self.rollups = rollups
+
+    def summary(
+        self, tenant_id: str, owner_id: str, time_offset: int = None
+    ) -> dict:
+        """
+        Same result as utils.worked_time.summary, reading the rollups of
+        the whole days of the ranges and the time entries of their edges
+        """
+        date_ranges = worked_time.summary_date_ranges(time_offset)
+        days, edges = set(), set()
+        for dr in date_ranges.values():
+            range_days, range_edges = worked_time.split_in_days(
+                dr.start(), dr.end()
+            )
+            days.update(range_days)
+            edges.update(range_edges)
+            # The entries that span a whole range are left out of it, so the
+            # ones that hold its start are read too
+            edges.add((dr.start(), dr.start()))
+
+        rollup_seconds, time_entries = run_concurrently(
+            lambda: self.find_seconds(tenant_id, owner_id, sorted(days)),
+            lambda: self.find_edge_entries(tenant_id, owner_id, edges),
+        )
+        return worked_time.summary_from_rollups(
+            date_ranges, rollup_seconds, time_entries
+        )
+
+    def find_seconds(
+        self, tenant_id: str, owner_id: str, days: List[date]
+    ) -> Dict[str, float]:
+        """
+        :return: the seconds worked in each day, by ISO date. The days
+        without a rollup are rolled up from the time entries and stored.
+        """
+        if not days:
+            return {}
+        query_builder = (
+            CosmosDBQueryBuilder(parameterize_lists=True)
+            .add_select_conditions(['c.day', 'c.seconds'])
+            .add_sql_where_equal_condition({'owner_id': owner_id})
+            .add_sql_in_condition('day', [day.isoformat() for day in days])
+            .build()
+        )
+        seconds = {
+            rollup['day']: rollup['seconds']
+            for rollup in self.query(self.rollups, query_builder, tenant_id)
+        }
+        missing_days = [day for day in days if day.isoformat() not in seconds]
+        for rollup in self.roll_up(tenant_id, owner_id, missing_days):
+            self.store(rollup)
+            seconds[rollup['day']] = rollup['seconds']
+        return seconds
+
+    def store(self, rollup: dict):
+        """
+        Store a rollup made on a read, unless a rebuild stored it first
+        """
+        try:
+            self.rollups.container.create_item(body=rollup)
+        except exceptions.CosmosResourceExistsError:
+            pass
+
+    def find_edge_entries(
+        self,
+        tenant_id: str,
+        owner_id: str,
+        edges: List[Tuple[datetime, datetime]],
+    ) -> List[dict]:
+        query_builder = (
+            TimeEntryQueryBuilder(parameterize_lists=True)
+            .add_select_conditions(['c.id', 'c.start_date', 'c.end_date'])
+            .add_sql_where_equal_condition({'owner_id': owner_id})
+            .add_sql_visibility_condition(True)
+            .add_sql_overlap_with_date_ranges_condition(
+                [
+                    (utc_datetime_str(start), utc_datetime_str(end))
+                    for start, end in sorted(edges)
+                ],
+                include_running=True,
+            )
+            .build()
+        )
+        return self.query(self.time_entries, query_builder, tenant_id)
+
+    def rebuild(self, tenant_id: str, owner_id: str, day: date) -> dict:
+        """
+        Roll up the finished time entries of the user in the day and store
+        the rollup, unless another write replaced it since it was read
+        """
+        rollup_id = '{}_{}'.format(owner_id, day.isoformat())
+        for attempt in range(1, MAX_REBUILD_ATTEMPTS + 1):
+            stored_rollup = self.find_rollup(tenant_id, rollup_id)
+            [rollup] = self.roll_up(tenant_id, owner_id, [day])
+            try:
+                if stored_rollup is None:
+                    self.rollups.container.create_item(body=rollup)
+                else:
+                    self.rollups.container.replace_item(
+                        rollup_id,
+                        body=rollup,
+                        **CosmosDBRepository.if_not_modified_options(
+                            stored_rollup
+                        ),
+                    )
+                return rollup
+            except (
+                exceptions.CosmosAccessConditionFailedError,
+                exceptions.CosmosResourceExistsError,
+            ):
+                if attempt == MAX_REBUILD_ATTEMPTS:
+                    raise
+
+    def find_rollup(self, tenant_id: str, rollup_id: str) -> Optional[dict]:
+        try:
+            return self.rollups.container.read_item(rollup_id, tenant_id)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    def roll_up(
+        self, tenant_id: str, owner_id: str, days: List[date]
+    ) -> List[dict]:
+        """
+        Roll up the finished time entries of the user in each of the days,
+        reading them at once
+        """
+        if not days:
+            return []
+        first_day, last_day = min(days), max(days)
+        query_builder = (
+            TimeEntryQueryBuilder(parameterize_lists=True)
+            .add_select_conditions(
+                [
+                    'c.id',
+                    'c.start_date',
+                    'c.end_date',
+                    'c.project_id',
+                    'c.activity_id',
+                ]
+            )
+            .add_sql_where_equal_condition({'owner_id': owner_id})
+            .add_sql_visibility_condition(True)
+            .add_sql_overlap_with_date_ranges_condition(
+                [
+                    (
+                        datetime_str(utc_midnight(first_day)),
+                        datetime_str(
+                            utc_midnight(last_day) + timedelta(days=1)
+                        ),
+                    )
+                ]
+            )
+            .build()
+        )
+        time_entries = self.query(self.time_entries, query_builder, tenant_id)
+        rollups = []
+        for day in days:
+            rollup = worked_time.day_rollup(time_entries, day)
+            rollup.update(
+                {
+                    'id': '{}_{}'.format(owner_id, rollup['day']),
+                    'owner_id': owner_id,
+                    'tenant_id': tenant_id,
+                }
+            )
+            rollups.append(rollup)
+        return rollups
+
+    def refresh(self, time_entries: List[dict]):
+        """
+        Rebuild the rollups of the days of changed time entries, the ones
+        they had time in and the ones they have time in now
+        :param time_entries: the entries as stored, the soft deleted ones
+        included
+        """
+
+        def find_owner_days(time_entry: dict) -> set:
+            tenant_id = time_entry['tenant_id']
+            owner_days = {
+                (
+                    tenant_id,
+                    rollup['owner_id'],
+                    date.fromisoformat(rollup['day']),
+                )
+                for rollup in self.find_rollups_of(tenant_id, time_entry['id'])
+            }
+            if is_worked_time(time_entry):
+                owner_days.update(
+                    (tenant_id, time_entry['owner_id'], day)
+                    for day in worked_time.utc_days(
+                        str_to_datetime(time_entry['start_date']),
+                        str_to_datetime(time_entry['end_date']),
+                    )
+                )
+            return owner_days
+
+        owner_days = set().union(
+            *map_concurrently(find_owner_days, time_entries)
+        )
+        map_concurrently(
+            lambda owner_day: self.rebuild(*owner_day), sorted(owner_days)
+        )
+
+    def discard(self, tenant_id: str, time_entry_id: str):
+        """
+        Delete the rollups that hold a permanently deleted time entry
+        """
+        for rollup in self.find_rollups_of(tenant_id, time_entry_id):
+            try:
+                self.rollups.container.delete_item(
+                    rollup['id'], partition_key=tenant_id
+                )
+            except exceptions.CosmosResourceNotFoundError:
+                pass
+
+    def find_rollups_of(
+        self, tenant_id: str, time_entry_id: str
+    ) -> List[dict]:
+        return list(
+            self.rollups.container.query_items(
+                query="""
+                SELECT c.id, c.owner_id, c.day FROM c
+                WHERE ARRAY_CONTAINS(c.time_entry_ids, @time_entry_id)
+                """,
+                parameters=[
+                    {'name': '@time_entry_id', 'value': time_entry_id}
+                ],
+                partition_key=tenant_id,
+            )
+        )
+
+    @staticmethod
+    def query(
+        repository: CosmosDBRepository,
+        query_builder: CosmosDBQueryBuilder,
+        tenant_id: str,
+    ) -> List[dict]:
+        return list(
+            repository.container.query_items(
+                query=query_builder.get_query(),
+                parameters=query_builder.get_parameters(),
+                partition_key=tenant_id,
+            )
+        )
+
+
+def utc_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def utc_datetime_str(value: datetime) -> str:
+    # The dates are compared as strings, like the ones stored
+    return datetime_str(value.astimezone(timezone.utc))
+
+
+def is_worked_time(time_entry: Optional[dict]) -> bool:
+    return (
+        time_entry is not None
+        and bool(time_entry.get('start_date'))
+        and bool(time_entry.get('end_date'))
+        and not time_entry.get('deleted')
+    )
+
+
+def refresh_changes(container_id: str, items: List[dict]):
+    """
+    Handler of the change feed of the time entries
+    """
+    if worked_time_rollups is not None:
+        worked_time_rollups.refresh(items)
+
+
+worked_time_rollups: Optional[WorkedTimeRollups] = None
+
+
+def init_app(app: Flask) -> None:
+    global worked_time_rollups
+    if not app.config.get('WORKED_TIME_ROLLUPS_ENABLED', False):
+        worked_time_rollups = None
+        return
+
+    from commons.data_access_layer import cosmos_db
+    from time_tracker_api.time_entries import time_entries_model
+
+    cosmos_db.cosmos_helper.create_container_if_not_exists(
+        container_definition
+    )
+    worked_time_rollups = WorkedTimeRollups(
+        CosmosDBRepository.from_definition(
+            time_entries_model.container_definition
+        ),
+        CosmosDBRepository.from_definition(container_definition),
+    )
+
+    handlers = change_feed.change_feed_handlers[
+        time_entries_model.container_definition['id']
+    ]
+    if refresh_changes not in handlers:
+        handlers.append(refresh_changes)
@@ -0,0 +1,200 @@
+"""
+Process-wide snapshot of the Azure AD directory: the users, with their
+emails, roles and groups, and the ids of the test users.
+
+Reading the directory takes a token, every page of the users and every group
+with its members, so with the snapshot enabled the request handlers read it
+instead, and a background thread takes it again on an interval. When taking
+it fails, the handlers keep reading the last one. The role and group changes
+made through the API ask for a new snapshot right away. The thread takes the
+first one as soon as it starts. Until then, or while taking it fails, the
+handlers read an empty snapshot without waiting for it, and the thread
+takes it again after a backoff.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from flask import Flask
+
+from utils.azure_users import AzureConnection, AzureUser
+
+
+class DirectorySnapshot:
+    def __init__(
+        self,
+        users: List[AzureUser],
+        test_user_ids: Iterable[str],
+        taken_at: float = None,
+    ):
+        self.users = users
+        self.users_by_id = {user.id: user for user in users}
+        self.test_user_ids = set(test_user_ids)
+        self.taken_at = taken_at if taken_at is not None else time.time()
+
+    def get_user_emails(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        return {
+            user_id: self.users_by_id[user_id].email
+            for user_id in user_ids
+            if user_id in self.users_by_id
+        }
+
+    def is_test_user(self, user_id: str) -> bool:
+        return user_id in self.test_user_ids
+
+    def get_non_test_users(self) -> List[AzureUser]:
+        return [
+            user for user in self.users if user.id not in self.test_user_ids
+        ]
+
+
+def take_snapshot() -> DirectorySnapshot:
+    azure_connection = AzureConnection()
+    return DirectorySnapshot(
+        azure_connection.users(), azure_connection.get_test_user_ids()
+    )
+
+
+class UsersDirectory:
+    def __init__(
+        self,
+        take: Callable[[], DirectorySnapshot] = take_snapshot,
+        refresh_interval_seconds: float = 300,
+        retry_backoff_seconds: float = 30,
+        logger=None,
+    ):
+        """
+        :param retry_backoff_seconds: time to wait before taking again a
+        first snapshot that failed, doubled after each failure up to the
+        refresh interval
+        """
+        self.take = take
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self._snapshot: Optional[DirectorySnapshot] = None
+        self._failures = 0
+        self._refresh_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread = None
+
+    def snapshot(self) -> DirectorySnapshot:
+        """
+        The last snapshot taken, or an empty one while there is none yet
+        """
+        return self._snapshot or DirectorySnapshot([], [])
+
+    def refresh(self) -> bool:
+        """
+        Take a new snapshot, keeping the last one if it fails
+        :return: whether the snapshot was taken
+        """
+        try:
+            snapshot = self.take()
+        except Exception as e:
+            self.logger.warning(
+                f"The snapshot of the Azure AD directory failed: {e}"
+            )
+            self._failures += 1
+            return False
+        self._snapshot = snapshot
+        self._failures = 0
+        return True
+
+    def request_refresh(self):
+        """
+        Take a new snapshot in the background without waiting the interval
+        """
+        self._refresh_event.set()
+
+    def next_refresh_seconds(self) -> float:
+        if self._snapshot is not None or self._failures == 0:
+            return self.refresh_interval_seconds
+        return min(
+            self.retry_backoff_seconds * 2 ** (self._failures - 1),
+            self.refresh_interval_seconds,
+        )
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._refresh_event.wait(self.next_refresh_seconds())
+            self._refresh_event.clear()
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self.run, name='users-directory', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        self._refresh_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+users_directory: Optional[UsersDirectory] = None
+
+
+def get_users() -> List[AzureUser]:
+    if users_directory is None:
+        return AzureConnection().users()
+    return users_directory.snapshot().users
+
+
+def get_non_test_users() -> List[AzureUser]:
+    if users_directory is None:
+        return AzureConnection().get_non_test_users()
+    return users_directory.snapshot().get_non_test_users()
+
+
+def get_test_user_ids() -> List[str]:
+    if users_directory is None:
+        return AzureConnection().get_test_user_ids()
+    return list(users_directory.snapshot().test_user_ids)
+
+
+def is_test_user(user_id: str) -> bool:
+    if users_directory is None:
+        return AzureConnection().is_test_user(user_id)
+    return users_directory.snapshot().is_test_user(user_id)
+
+
+def get_user_emails(user_ids: List[str]) -> Dict[str, str]:
+    """
+    Emails of the users. With the snapshot, only the users out of it, like
+    the ones without an ioet.com email, are read from Azure AD.
+    """
+    if users_directory is None:
+        return AzureConnection().get_user_emails(user_ids)
+    emails = users_directory.snapshot().get_user_emails(user_ids)
+    missing_user_ids = [id for id in user_ids if id not in emails]
+    if missing_user_ids:
+        emails.update(AzureConnection().get_user_emails(missing_user_ids))
+    return emails
+
+
+def request_refresh() -> None:
+    if users_directory is not None:
+        users_directory.request_refresh()
+
+
+def init_app(app: Flask) -> None:
+    global users_directory
+    if users_directory is not None:
+        users_directory.stop()
+        users_directory = None
+    if not app.config.get('USERS_DIRECTORY_SNAPSHOT_ENABLED', False):
+        return
+
+    users_directory = UsersDirectory(
+        refresh_interval_seconds=app.config.get(
+            'USERS_DIRECTORY_REFRESH_SECONDS', 300
+        ),
+        logger=app.logger,
+    )
+    users_directory.start()
@@ -4,6 +4,7 @@ from flask_restplus import fields, Resource
 from time_tracker_api.api import common_fields, api
 from time_tracker_api.security import current_user_id
 
+from time_tracker_api.users import users_directory
 from utils.azure_users import AzureConnection
 
 ns = api.namespace('users', description='Namespace of the API for users')
@@ -94,14 +95,13 @@ class Users(Resource):
     @ns.marshal_list_with(user_response_fields)
     def get(self):
         """List all users"""
-        azure_connection = AzureConnection()
-        is_current_user_a_tester = azure_connection.is_test_user(
+        is_current_user_a_tester = users_directory.is_test_user(
             current_user_id()
         )
         return (
-            azure_connection.users()
+            users_directory.get_users()
             if is_current_user_a_tester
-            else azure_connection.get_non_test_users()
+            else users_directory.get_non_test_users()
         )
 
 
@@ -120,7 +120,9 @@ class GrantRole(Resource):
             - admin
         ```
         """
-        return AzureConnection().update_role(user_id, role_id, is_grant=True)
+        user = AzureConnection().update_role(user_id, role_id, is_grant=True)
+        users_directory.request_refresh()
+        return user
 
 
 @ns.route('/<string:user_id>/roles/<string:role_id>/revoke')
@@ -131,7 +133,11 @@ class RevokeRole(Resource):
     @ns.marshal_with(user_response_fields)
     def post(self, user_id, role_id):
         """Revoke role to user"""
-        return AzureConnection().update_role(user_id, role_id, is_grant=False)
+        user = AzureConnection().update_role(
+            user_id, role_id, is_grant=False
+        )
+        users_directory.request_refresh()
+        return user
 
 
 @ns.route('/<string:user_id>/is-member-of')
@@ -165,9 +171,11 @@ class AddToGroup(Resource):
             - time-tracker-tester
         ```
         """
-        return AzureConnection().add_user_to_group(
+        user = AzureConnection().add_user_to_group(
             user_id, ns.payload['group_name']
         )
+        users_directory.request_refresh()
+        return user
 
 
 remove_user_from_group_input = ns.model(
@@ -185,6 +193,8 @@ class RemoveFromGroup(Resource):
         """
         Remove user from an EXISTING group in the Azure Tenant directory.
         """
-        return AzureConnection().remove_user_from_group(
+        user = AzureConnection().remove_user_from_group(
             user_id, ns.payload['group_name']
         )
+        users_directory.request_refresh()
+        return user
@@ -2,7 +2,11 @@ import msal
 import os
 import requests
 import json
-from typing import List
+import threading
+import time
+from typing import Dict, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from utils.environment_variables import check_variables_are_defined
 
 
@@ -37,6 +41,46 @@ class BearerAuth(requests.auth.AuthBase):
         return r
 
 
+class GraphSession(requests.Session):
+    """
+    Session that keeps the connections to Azure AD alive between requests,
+    with a default timeout and retries of the idempotent requests that fail
+    or are throttled
+    """
+
+    def __init__(self, timeout=(5, 30), retries=3, pool_maxsize=10):
+        super(GraphSession, self).__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                raise_on_status=False,
+            ),
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super(GraphSession, self).request(method, url, **kwargs)
+
+
+http_session = GraphSession()
+
+# Seconds before its expiration when a token is acquired again
+TOKEN_EXPIRATION_MARGIN_SECONDS = 300
+
+# MSAL clients and tokens shared by the connections of the process, by the
+# client, authority and scope they are for
+_msal_clients = {}
+_tokens = {}
+_msal_clients_lock = threading.Lock()
+_tokens_lock = threading.Lock()
+
+
 class AzureUser:
     def __init__(self, id, name, email, roles, groups):
         self.id = id
@@ -66,39 +110,92 @@ ROLE_FIELD_VALUES = {
 class AzureConnection:
     def __init__(self, config=MSConfig):
         self.config = config
-        self.client = self.get_msal_client()
-        self.access_token = self.get_token()
         self.groups_and_users = None
 
+    @property
+    def client(self):
+        return self.get_msal_client()
+
+    @property
+    def access_token(self):
+        return self.get_token()
+
     def get_blob_storage_connection_string(self) -> str:
         return self.config.AZURE_STORAGE_CONNECTION_STRING
 
     def get_msal_client(self):
-        client = msal.ConfidentialClientApplication(
-            self.config.CLIENT_ID,
-            authority=self.config.AUTHORITY,
-            client_credential=self.config.SECRET,
-        )
+        key = (self.config.CLIENT_ID, self.config.AUTHORITY)
+        with _msal_clients_lock:
+            client = _msal_clients.get(key)
+            if client is None:
+                client = msal.ConfidentialClientApplication(
+                    self.config.CLIENT_ID,
+                    authority=self.config.AUTHORITY,
+                    client_credential=self.config.SECRET,
+                )
+                _msal_clients[key] = client
         return client
 
     def get_token(self):
-        response = self.client.acquire_token_for_client(
-            scopes=self.config.SCOPE
+        """
+        Access token of the application, acquired again only when the last
+        one is about to expire
+        """
+        key = (
+            self.config.CLIENT_ID,
+            self.config.AUTHORITY,
+            str(self.config.SCOPE),
         )
-        if "access_token" in response:
-            return response['access_token']
-        else:
-            error_info = f"{response['error']} {response['error_description']}"
-            raise ValueError(error_info)
+        with _tokens_lock:
+            token = _tokens.get(key)
+            if token is not None and time.monotonic() < token[1]:
+                return token[0]
+            response = self.client.acquire_token_for_client(
+                scopes=self.config.SCOPE
+            )
+            if "access_token" in response:
+                expires_at = (
+                    time.monotonic()
+                    + response.get('expires_in', 0)
+                    - TOKEN_EXPIRATION_MARGIN_SECONDS
+                )
+                _tokens[key] = (response['access_token'], expires_at)
+                return response['access_token']
+            else:
+                error_info = f"{response['error']} {response['error_description']}"
+                raise ValueError(error_info)
 
     def get_user(self, user_id) -> AzureUser:
         endpoint = "{endpoint}/users/{user_id}?api-version=1.6".format(
             endpoint=self.config.ENDPOINT, user_id=user_id
         )
-        response = requests.get(endpoint, auth=BearerAuth(self.access_token))
+        response = http_session.get(endpoint, auth=BearerAuth(self.access_token))
         assert 200 == response.status_code
         return self.to_azure_user(response.json())
 
+    def get_user_emails(self, user_ids: List[str]) -> Dict[str, str]:
+        """
+        Emails of the users, read with a single request instead of the
+        whole directory. The users that are not found are left out.
+        """
+        if not user_ids:
+            return {}
+        endpoint = "{endpoint}/getObjectsByObjectIds?api-version=1.6".format(
+            endpoint=self.config.ENDPOINT
+        )
+        response = http_session.post(
+            endpoint,
+            json={'objectIds': list(user_ids), 'types': ['user']},
+            auth=BearerAuth(self.access_token),
+        )
+        assert 200 == response.status_code
+        assert 'value' in response.json()
+        return {
+            item['objectId']: item['otherMails'][0]
+            for item in response.json()['value']
+            if item.get('otherMails')
+        }
+
     def users(self) -> List[AzureUser]:
         role_fields_params = ','.join(
             [field_name for field_name, _ in ROLE_FIELD_VALUES.values()]
@@ -115,7 +212,7 @@ class AzureConnection:
         skip_token_attribute = '&$skiptoken='
 
         while exists_users:
-            response = requests.get(
+            response = http_session.get(
                 final_endpoint, auth=BearerAuth(self.access_token)
             )  
             json_response = response.json()
@@ -161,7 +258,7 @@ class AzureConnection:
         )
 
         data = self.get_role_data(role_id, is_grant)
-        response = requests.patch(
+        response = http_session.patch(
             endpoint,
             auth=BearerAuth(self.access_token),
             data=json.dumps(data),
@@ -169,7 +266,7 @@ class AzureConnection:
         )
         assert 204 == response.status_code
 
-        response = requests.get(endpoint, auth=BearerAuth(self.access_token))
+        response = http_session.get(endpoint, auth=BearerAuth(self.access_token))
         assert 200 == response.status_code
 
         return self.to_azure_user(response.json())
@@ -181,7 +278,7 @@ class AzureConnection:
             group_id=group_id,
         )
         data = {'url': f'{self.config.ENDPOINT}/directoryObjects/{user_id}'}
-        response = requests.post(
+        response = http_session.post(
             endpoint,
             auth=BearerAuth(self.access_token),
             data=json.dumps(data),
@@ -204,7 +301,7 @@ class AzureConnection:
         endpoint = "{endpoint}/groups/{group_id}/$links/members/{user_id}?api-version=1.6".format(
             endpoint=self.config.ENDPOINT, group_id=group_id, user_id=user_id
         )
-        response = requests.delete(
+        response = http_session.delete(
             endpoint,
             auth=BearerAuth(self.access_token),
             headers=HTTP_PATCH_HEADERS,
@@ -233,7 +330,7 @@ class AzureConnection:
         endpoint = "{endpoint}/users/{user_id}?api-version=1.6".format(
             endpoint=self.config.ENDPOINT, user_id=user_id
         )
-        response = requests.get(endpoint, auth=BearerAuth(self.access_token))
+        response = http_session.get(endpoint, auth=BearerAuth(self.access_token))
         assert 200 == response.status_code
         item = response.json()
         field_name, field_value = ROLE_FIELD_VALUES['test']
@@ -246,7 +343,7 @@ class AzureConnection:
             field_name=field_name,
             field_value=field_value,
         )
-        response = requests.get(endpoint, auth=BearerAuth(self.access_token))
+        response = http_session.get(endpoint, auth=BearerAuth(self.access_token))
         assert 200 == response.status_code
         assert 'value' in response.json()
         return [item['objectId'] for item in response.json()['value']]
@@ -256,7 +353,7 @@ class AzureConnection:
             endpoint=self.config.ENDPOINT, group_name=group_name
         )
 
-        response = requests.get(endpoint, auth=BearerAuth(self.access_token))
+        response = http_session.get(endpoint, auth=BearerAuth(self.access_token))
 
         assert 200 == response.status_code
 
@@ -275,7 +372,7 @@ class AzureConnection:
         endpoint = "{endpoint}/groups?api-version=1.6&$select=displayName,members&$expand=members".format(
             endpoint=self.config.ENDPOINT
         )
-        response = requests.get(endpoint, auth=BearerAuth(self.access_token))
+        response = http_session.get(endpoint, auth=BearerAuth(self.access_token))
         assert 200 == response.status_code
         parse_item = lambda item: (
             item['displayName'],
@@ -297,7 +394,7 @@ class AzureConnection:
 
         data = {"groupId": group_id, "memberId": user_id}
 
-        response = requests.post(
+        response = http_session.post(
             endpoint,
             auth=BearerAuth(self.access_token),
             data=json.dumps(data),
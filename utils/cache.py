@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    Thread safe mapping that keeps at most maxsize entries, discarding the
+    least recently used ones first. With a ttl, in seconds, the entries also
+    expire after that time.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: float = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if not self.__is_alive(key):
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][1]
+
+    def put(self, key: Hashable, value: Any, ttl: float = None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = self.timer() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if not self.__is_alive(key):
+                return default
+            return self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def items(self) -> list:
+        """
+        :return: the (key, value) pairs that have not expired
+        """
+        with self._lock:
+            return [
+                (key, value)
+                for key, (expires_at, value) in self._entries.items()
+                if expires_at is None or expires_at > self.timer()
+            ]
+
+    def __is_alive(self, key: Hashable) -> bool:
+        if key not in self._entries:
+            return False
+        expires_at, _ = self._entries[key]
+        if expires_at is not None and expires_at <= self.timer():
+            del self._entries[key]
+            return False
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self.__is_alive(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
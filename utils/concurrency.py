@@ -0,0 +1,94 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable, Iterable
+
+from flask import _request_ctx_stack, has_request_context
+
+DEFAULT_MAX_WORKERS = 8
+# Threads shared by every call, whatever the requests in flight
+SHARED_MAX_WORKERS = 32
+
+executor: ThreadPoolExecutor = None
+executor_lock = threading.Lock()
+worker_thread = threading.local()
+
+
+def with_current_context(func: Callable) -> Callable:
+    """
+    Wrap a function so it can run in another thread with a copy of the
+    current context variables and Flask request context, e.g. to read the
+    JWT of the current user.
+    """
+    context = contextvars.copy_context()
+    request_context = _request_ctx_stack.top if has_request_context() else None
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if request_context is None:
+            return context.copy().run(func, *args, **kwargs)
+        with request_context.copy():
+            return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def map_concurrently(
+    func: Callable, items: Iterable, max_workers: int = DEFAULT_MAX_WORKERS
+) -> list:
+    """
+    Apply func to every item, running at most max_workers of them at a time
+    on the threads shared by the whole process. When called from one of
+    those threads, e.g. by a function already running concurrently, the
+    items are handled one after the other on it.
+    :return (list): the results in the same order of the items
+    """
+    items = list(items)
+    if len(items) < 2 or is_worker_thread():
+        return [func(item) for item in items]
+
+    func = with_current_context(func)
+    workers = min(max_workers, len(items))
+    # Each worker takes every workers-th item, so the results interleave
+    futures = [
+        get_executor().submit(lambda part: [func(x) for x in part], part)
+        for part in (items[i::workers] for i in range(workers))
+    ]
+    parts = [future.result() for future in futures]
+    results = [None] * len(items)
+    for i, part in enumerate(parts):
+        results[i::workers] = part
+    return results
+
+
+def run_concurrently(
+    *funcs: Callable, max_workers: int = DEFAULT_MAX_WORKERS
+) -> list:
+    """
+    Call every function, without arguments, at the same time. Use it to
+    fan out independent reads, e.g. `run_concurrently(get_a, get_b)`.
+    :return (list): the results in the same order of the functions
+    """
+    return map_concurrently(lambda func: func(), funcs, max_workers)
+
+
+def is_worker_thread() -> bool:
+    return getattr(worker_thread, 'active', False)
+
+
+def mark_worker_thread():
+    worker_thread.active = True
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global executor
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=SHARED_MAX_WORKERS,
+                    thread_name_prefix='concurrency',
+                    initializer=mark_worker_thread,
+                )
+    return executor
@@ -1,4 +1,5 @@
 from functools import wraps
+from typing import Any, Callable, Dict
 import re
 
 
@@ -43,7 +44,9 @@ def add_custom_attribute_in_list(attr, dao):
             entity_model_list = func(*args, **kwargs)
             attribute_id = f"{attr}_id"
 
-            related_entity_list = current_dao.get_all()
+            related_entity_list = current_dao.get_many(
+                [x.__dict__.get(attribute_id) for x in entity_model_list]
+            )
             related_entities_ids_dict = {x.id: x for x in related_entity_list}
 
             for entity_model in entity_model_list:
@@ -59,19 +62,67 @@ def add_custom_attribute_in_list(attr, dao):
     return decorator_for_list_item
 
 
+_missing = object()
+
+
+def index_by_id(entities, id_attr: str = 'id') -> dict:
+    """
+    Index entities by their id, the last one wins when an id repeats
+    :param (list) entities: entities retrieved from a repository
+    :param (str) id_attr: name of the id attribute of the entities
+    """
+    return {getattr(entity, id_attr): entity for entity in entities}
+
+
+def extend_models(
+    models,
+    id_attr: str,
+    related,
+    attributes: Dict[str, Callable[[Any], Any]],
+    defaults: dict = None,
+):
+    """
+    Set attributes of each model computed from its related entity, looked up
+    by id, in one pass over the models
+    :param (list) models: models to extend
+    :param (str) id_attr: attribute of the models with the related entity id
+    :param related: related entities, as a list or a dict indexed by id
+    :param (dict) attributes: name of each attribute and the function that
+    computes it from the related entity
+    :param (dict) defaults: attributes of the models without a related
+    entity, which are left untouched otherwise
+    """
+    if not isinstance(related, dict):
+        related = index_by_id(related)
+    for model in models:
+        entity = related.get(getattr(model, id_attr), _missing)
+        if entity is _missing:
+            for name, value in (defaults or {}).items():
+                setattr(model, name, value)
+            continue
+        for name, get_value in attributes.items():
+            setattr(model, name, get_value(entity))
+
+
+def archived_name(entity) -> str:
+    if entity.is_deleted():
+        return entity.name + " (archived)"
+    return entity.name
+
+
 def add_customer_name_to_projects(projects, customers):
     """
     Add attribute customer_name in project model, based on customer_id of the
     project
     :param (list) projects: projects retrieved from project repository
     :param (list) customers: customers retrieved from customer repository
-
-    TODO : check if we can improve this by using the overwritten __add__ method
     """
-    for project in projects:
-        for customer in customers:
-            if project.customer_id == customer.id:
-                setattr(project, 'customer_name', customer.name)
+    extend_models(
+        projects,
+        'customer_id',
+        customers,
+        {'customer_name': lambda customer: customer.name},
+    )
 
 
 def add_project_info_to_time_entries(time_entries, projects):
@@ -80,52 +131,45 @@ def add_project_info_to_time_entries(time_entries, projects):
     time_entry
     :param (list) time_entries: time_entries retrieved from time-entry repository
     :param (list) projects: projects retrieved from project repository
-
-    TODO : check if we can improve this by using the overwritten __add__ method
     """
-    for time_entry in time_entries:
-        for project in projects:
-            if time_entry.project_id == project.id:
-                name = (
-                    project.name + " (archived)"
-                    if project.is_deleted()
-                    else project.name
-                )
-                setattr(time_entry, 'project_name', name)
-                setattr(time_entry, 'customer_id', project.customer_id)
-                setattr(time_entry, 'customer_name', project.customer_name)
+    extend_models(
+        time_entries,
+        'project_id',
+        projects,
+        {
+            'project_name': archived_name,
+            'customer_id': lambda project: project.customer_id,
+            'customer_name': lambda project: project.customer_name,
+        },
+    )
 
 
 def add_activity_name_to_time_entries_v1(time_entries, activities):
-    for time_entry in time_entries:
-        for activity in activities:
-            if time_entry.activity_id == activity.id:
-                name = (
-                    activity.name + " (archived)"
-                    if activity.is_deleted()
-                    else activity.name
-                )
-                setattr(time_entry, 'activity_name', name)
+    extend_models(
+        time_entries,
+        'activity_id',
+        activities,
+        {'activity_name': archived_name},
+    )
+
 
 def add_activity_name_to_time_entries(time_entries, activities):
-    for time_entry in time_entries:
-        result = [x for x in activities if time_entry.activity_id == x.id]
-        if result:
-            name = (
-                    result[0].name + " (archived)"
-                    if result[0].is_deleted()
-                    else result[0].name
-                )
-            setattr(time_entry, 'activity_name', name)
-        else:
-            setattr(time_entry, 'activity_name', "activity")
+    extend_models(
+        time_entries,
+        'activity_id',
+        activities,
+        {'activity_name': archived_name},
+        defaults={'activity_name': "activity"},
+    )
 
 
 def add_user_email_to_time_entries(time_entries, users):
-    for time_entry in time_entries:
-        for user in users:
-            if time_entry.owner_id == user.id:
-                setattr(time_entry, 'owner_email', user.email)
+    extend_models(
+        time_entries,
+        'owner_id',
+        users,
+        {'owner_email': lambda user: user.email},
+    )
 
 
 def create_in_condition(
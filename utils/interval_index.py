@@ -0,0 +1,91 @@
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+
+def intersects(start: str, end: str, other_start: str, other_end: str) -> bool:
+    """
+    Same condition as
+    TimeEntryQueryBuilder.add_sql_interception_with_date_range_condition,
+    comparing the dates as strings like Cosmos DB does
+    """
+    return (
+        other_start <= start <= other_end
+        or other_start <= end <= other_end
+        or start <= other_start <= end
+        or start <= other_end <= end
+    ) and (start != other_end and end != other_start)
+
+
+class IntervalIndex:
+    """
+    Closed intervals sorted by their start, with the maximum end of every
+    prefix, to find an interval that intersects a range in O(log n). The
+    walk only visits the intervals whose prefix could still reach the
+    range, which are one or two when the intervals don't overlap each other.
+    """
+
+    def __init__(self, intervals: List[Tuple[str, str, str]] = ()):
+        """
+        :param intervals: (start, end, id) of each interval
+        """
+        # The intervals are kept as (low, high, id), so the ones that end
+        # before they start are still found
+        self._intervals: List[Tuple[str, str, str]] = sorted(
+            (min(start, end), max(start, end), id)
+            for start, end, id in intervals
+        )
+        self._dates: Dict[str, Tuple[str, str]] = {
+            id: (start, end) for start, end, id in intervals
+        }
+        self._starts: List[str] = [i[0] for i in self._intervals]
+        self._max_ends: List[str] = []
+        self._update_max_ends(0)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._dates
+
+    def add(self, id: str, start: str, end: str):
+        self.remove(id)
+        interval = (min(start, end), max(start, end), id)
+        position = bisect.bisect_left(self._intervals, interval)
+        self._intervals.insert(position, interval)
+        self._starts.insert(position, interval[0])
+        self._dates[id] = (start, end)
+        self._update_max_ends(position)
+
+    def remove(self, id: str):
+        dates = self._dates.pop(id, None)
+        if dates is None:
+            return
+        interval = (min(dates), max(dates), id)
+        position = bisect.bisect_left(self._intervals, interval)
+        del self._intervals[position]
+        del self._starts[position]
+        self._update_max_ends(position)
+
+    def find_intersection(
+        self, start: str, end: str, ignore_id: str = None
+    ) -> Optional[str]:
+        """
+        :return: the id of an interval that intersects the range, or None
+        """
+        position = bisect.bisect_right(self._starts, end) - 1
+        while position >= 0 and self._max_ends[position] >= start:
+            id = self._intervals[position][2]
+            other_start, other_end = self._dates[id]
+            if id != ignore_id and intersects(
+                start, end, other_start, other_end
+            ):
+                return id
+            position -= 1
+        return None
+
+    def _update_max_ends(self, position: int):
+        del self._max_ends[position:]
+        max_end = self._max_ends[-1] if self._max_ends else None
+        for _, end, _ in self._intervals[position:]:
+            max_end = end if max_end is None or end > max_end else max_end
+            self._max_ends.append(max_end)
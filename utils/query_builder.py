@@ -1,9 +1,16 @@
+import re
 from typing import List
 
+from utils.cache import LRUCache
 from utils.enums.status import Status
 from utils.repository import convert_list_to_tuple_string
 from enum import Enum
 
+QUERY_TEMPLATE_CACHE_SIZE = 256
+
+# Query texts indexed by the structure of the builder that generated them
+query_templates = LRUCache(maxsize=QUERY_TEMPLATE_CACHE_SIZE)
+
 
 class Order(Enum):
     DESC = 'DESC'
@@ -13,8 +20,15 @@ class Order(Enum):
 class CosmosDBQueryBuilder:
     query: str
 
-    def __init__(self):
+    def __init__(self, parameterize_lists: bool = False):
+        """
+        :param parameterize_lists: send the values of IN and NOT IN conditions
+        as query parameters instead of writing them in the query text, so
+        the text only depends on the conditions used and can be reused
+        """
         super().__init__()
+        self.parameterize_lists = parameterize_lists
+        self.has_inline_values = False
         self.query = ""
         self.parameters = []
         self.select_conditions = []
@@ -32,8 +46,14 @@ class CosmosDBQueryBuilder:
         self, attribute: str = None, ids_list: List[str] = None
     ):
         if ids_list and attribute and len(ids_list) > 0:
-            ids_values = convert_list_to_tuple_string(ids_list)
-            self.where_conditions.append(f"c.{attribute} IN {ids_values}")
+            if self.parameterize_lists:
+                name = self.__add_list_parameter('in', attribute, ids_list)
+                condition = f"ARRAY_CONTAINS({name}, c.{attribute})"
+            else:
+                ids_values = convert_list_to_tuple_string(ids_list)
+                condition = f"c.{attribute} IN {ids_values}"
+                self.has_inline_values = True
+            self.where_conditions.append(condition)
         return self
 
     def add_sql_active_condition(self, status_value: str):
@@ -102,10 +122,26 @@ class CosmosDBQueryBuilder:
         self, attribute: str = None, ids_list: List[str] = None
     ):
         if ids_list and attribute and len(ids_list) > 0:
-            ids_values = convert_list_to_tuple_string(ids_list)
-            self.where_conditions.append(f"c.{attribute} NOT IN {ids_values}")
+            if self.parameterize_lists:
+                name = self.__add_list_parameter('not_in', attribute, ids_list)
+                condition = f"NOT ARRAY_CONTAINS({name}, c.{attribute})"
+            else:
+                ids_values = convert_list_to_tuple_string(ids_list)
+                condition = f"c.{attribute} NOT IN {ids_values}"
+                self.has_inline_values = True
+            self.where_conditions.append(condition)
         return self
 
+    def __add_list_parameter(
+        self, prefix: str, attribute: str, values: List[str]
+    ) -> str:
+        name = f"@{prefix}_{re.sub(r'[^0-9a-zA-Z_]', '_', attribute)}"
+        used_names = {p['name'] for p in self.parameters}
+        if name in used_names:
+            name = f"{name}_{len(self.parameters)}"
+        self.parameters.append({'name': name, 'value': list(values)})
+        return name
+
     def __build_select(self):
         if len(self.select_conditions) < 1:
             self.select_conditions.append("*")
@@ -138,8 +174,8 @@ class CosmosDBQueryBuilder:
         else:
             return ""
 
-    def build(self):
-        self.query = """
+    def __build_query(self):
+        return """
         SELECT {select_conditions} FROM c
         {where_conditions}
         {order_by_condition}
@@ -152,6 +188,39 @@ class CosmosDBQueryBuilder:
             offset_condition=self.__build_offset(),
             limit_condition=self.__build_limit(),
         )
+
+    def get_shape(self) -> tuple:
+        """
+        :return: a key that identifies the text of the query, independently
+        of the values of its parameters
+        """
+        return (
+            type(self),
+            tuple(self.select_conditions) or ("*",),
+            tuple(self.where_conditions),
+            self.order_by,
+            self.offset is not None,
+            self.limit is not None,
+        )
+
+    def build(self):
+        if self.has_inline_values:
+            self.query = self.__build_query()
+            return self
+
+        shape = self.get_shape()
+        query = query_templates.get(shape)
+        if query is None:
+            query = self.__build_query()
+            query_templates.put(shape, query)
+        else:
+            if self.offset is not None:
+                self.parameters.append(
+                    {'name': '@offset', 'value': self.offset}
+                )
+            if self.limit is not None:
+                self.parameters.append({'name': '@limit', 'value': self.limit})
+        self.query = query
         return self
 
     def get_query(self):
@@ -1,4 +1,5 @@
 import pytz
+from functools import lru_cache
 from typing import Dict
 from datetime import datetime, timezone
 
@@ -52,18 +53,28 @@ def get_date_range_of_month(year: int, month: int):
     return start_date, end_date
 
 
+def parse_datetime(value: str) -> datetime:
+    """
+    Parse the ISO 8601 dates written by datetime_str, with an offset, a
+    trailing Z or no time zone, which is taken as UTC. Other shapes are left
+    to dateutil.
+    """
+    try:
+        if value[-1:] in ('Z', 'z'):
+            result = datetime.fromisoformat(value[:-1] + '+00:00')
+        else:
+            result = datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil import parser
+
+        result = parser.parse(value)
+    if result.tzinfo is None:
+        return result.replace(tzinfo=timezone.utc)
+    return result
+
+
+# The dates are immutable, so the ones parsed from the strings seen lately,
+# like the ranges of the summary and the reports, are reused
+@lru_cache(maxsize=4096)
 def str_to_datetime(value: str) -> datetime:
-    def to_utc(date: datetime) -> datetime:
-        from pytz import timezone
-
-        _tz = timezone('UTC')
-        localized = _tz.localize(date)
-        return localized
-
-    from dateutil import parser
-
-    no_timezone_info = parser.parse(value).tzinfo is None
-    if no_timezone_info:
-        return to_utc(parser.parse(value))
-    else:
-        return parser.parse(value)
+    return parse_datetime(value)
@@ -1,9 +1,8 @@
 from http import HTTPStatus
 
-from azure.cosmos.exceptions import CosmosResourceNotFoundError
-
 from time_tracker_api.projects import projects_model
 from time_tracker_api.activities import activities_model
+from utils.concurrency import run_concurrently
 
 
 def are_related_entry_entities_valid(project_id: str, activity_id: str):
@@ -21,8 +20,13 @@ def are_related_entry_entities_valid(project_id: str, activity_id: str):
             "message": "Activity id can not be empty",
         }
 
-    exists_project = exists_related_entity(
-        project_id, projects_model.create_dao()
+    exists_project, exists_activity = run_concurrently(
+        lambda: exists_related_entity(
+            project_id, projects_model.create_dao(), with_customer_names=False
+        ),
+        lambda: exists_related_entity(
+            activity_id, activities_model.create_dao()
+        ),
     )
 
     if not exists_project:
@@ -32,10 +36,6 @@ def are_related_entry_entities_valid(project_id: str, activity_id: str):
             "message": "Related Project does not exists",
         }
 
-    exists_activity = exists_related_entity(
-        activity_id, activities_model.create_dao()
-    )
-
     if not exists_activity:
         return {
             "is_valid": False,
@@ -50,9 +50,5 @@ def are_related_entry_entities_valid(project_id: str, activity_id: str):
     }
 
 
-def exists_related_entity(related_id: str, dao):
-    try:
-        dao.get(related_id)
-        return True
-    except CosmosResourceNotFoundError:
-        return False
+def exists_related_entity(related_id: str, dao, **kwargs):
+    return len(dao.get_many([related_id], **kwargs)) > 0
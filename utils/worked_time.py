@@ -1,7 +1,7 @@
 import pytz
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
 from utils.time import datetime_str, str_to_datetime
-from copy import deepcopy
 
 
 class DateRange:
@@ -75,77 +75,214 @@ class WorkedTime:
         }
 
 
-def filter_time_entries(time_entries, dr: DateRange):
-    start, end = dr.start(), dr.end()
-    result = []
-    for t in time_entries:
-        te_start, te_end = (
-            str_to_datetime(t.start_date),
-            str_to_datetime(t.end_date),
-        )
-        in_range = start <= te_start <= end or start <= te_end <= end
-        if in_range:
-            result.append(deepcopy(t))
-    return result
-
-
-def cut_time_entries_out_of_range(time_entries, dr):
-    start, end = dr.start(), dr.end()
-    for t in time_entries:
-        te_start, te_end = (
-            str_to_datetime(t.start_date),
-            str_to_datetime(t.end_date),
-        )
-        if te_start < start:
-            t.start_date = datetime_str(start)
-        if end < te_end:
-            t.end_date = datetime_str(end)
-
-
-def worked_time_in_day(time_entries, tz):
-    dr = DayDateRange(tz)
-    day_time_entries = filter_time_entries(time_entries, dr)
-    cut_time_entries_out_of_range(day_time_entries, dr)
-    return WorkedTime(day_time_entries).summary()
-
-
-def worked_time_in_week(time_entries, tz):
-    dr = WeekDateRange(tz)
-    week_time_entries = filter_time_entries(time_entries, dr)
-    cut_time_entries_out_of_range(week_time_entries, dr)
-    return WorkedTime(week_time_entries).summary()
-
-
-def worked_time_in_month(time_entries, tz):
-    dr = MonthDateRange(tz)
-    month_time_entries = filter_time_entries(time_entries, dr)
-    cut_time_entries_out_of_range(month_time_entries, dr)
-    return WorkedTime(month_time_entries).summary()
-
-
-def stop_running_time_entry(time_entries, tz):
-    end = datetime.now(tz)
-    for t in time_entries:
-        if t.end_date is None:
-            t.end_date = datetime_str(end)
-
+class WorkedSeconds(WorkedTime):
+    def __init__(self, seconds: float):
+        super(WorkedSeconds, self).__init__([])
+        self.worked_seconds = seconds
 
-def change_timezones(time_entries, tz):
-    for t in time_entries:
-        start_date = str_to_datetime(t.start_date)
-        end_date = str_to_datetime(t.end_date)
-
-        t.start_date = datetime_str(start_date.astimezone(tz))
-        t.end_date = datetime_str(end_date.astimezone(tz))
+    def total_time_in_seconds(self):
+        return self.worked_seconds
+
+
+class WorkedTimeIntervals:
+    """
+    Start and end of time entries as integer epoch microseconds, parsed once,
+    to add up the worked time inside many date ranges without parsing or
+    copying the time entries again.
+    """
+
+    def __init__(self, starts: List[int], ends: List[int]):
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_time_entries(
+        cls, time_entries, running_end: datetime
+    ) -> 'WorkedTimeIntervals':
+        """
+        :param running_end: end of the running time entry
+        """
+        running_end_epoch = epoch_microseconds(running_end)
+        starts, ends = [], []
+        for time_entry in time_entries:
+            starts.append(to_epoch_microseconds(time_entry.start_date))
+            if time_entry.end_date is None:
+                ends.append(running_end_epoch)
+            else:
+                ends.append(to_epoch_microseconds(time_entry.end_date))
+        return cls(starts, ends)
+
+    def total_time_in_seconds(self, start: datetime, end: datetime) -> float:
+        """
+        Worked time inside the range of the time entries that start or end
+        in it
+        """
+        range_start = epoch_microseconds(start)
+        range_end = epoch_microseconds(end)
+        total = 0
+        for te_start, te_end in zip(self.starts, self.ends):
+            if (
+                range_start <= te_start <= range_end
+                or range_start <= te_end <= range_end
+            ):
+                total += min(te_end, range_end) - max(te_start, range_start)
+        return total / 1000000
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def epoch_microseconds(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def to_epoch_microseconds(value: str) -> int:
+    return epoch_microseconds(str_to_datetime(value))
+
+
+def summary_date_ranges(time_offset) -> Dict[str, DateRange]:
+    offset_in_minutes = time_offset if time_offset else 300
+    tz = timezone(timedelta(minutes=-offset_in_minutes))
+    return {
+        'day': DayDateRange(tz),
+        'week': WeekDateRange(tz),
+        'month': MonthDateRange(tz),
+    }
 
 
 def summary(time_entries, time_offset):
-    offset_in_minutes = time_offset if time_offset else 300
-    tz = timezone(timedelta(minutes=-offset_in_minutes))
-    stop_running_time_entry(time_entries, tz)
-    change_timezones(time_entries, tz)
+    date_ranges = summary_date_ranges(time_offset)
+    intervals = WorkedTimeIntervals.from_time_entries(
+        time_entries, running_end=date_ranges['day'].end()
+    )
     return {
-        'day': worked_time_in_day(time_entries, tz),
-        'week': worked_time_in_week(time_entries, tz),
-        'month': worked_time_in_month(time_entries, tz),
+        key: WorkedSeconds(
+            intervals.total_time_in_seconds(dr.start(), dr.end())
+        ).summary()
+        for key, dr in date_ranges.items()
+    }
+
+
+def utc_day_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def utc_days(start: datetime, end: datetime) -> List[date]:
+    """
+    :return: the UTC days with some time of the range
+    """
+    days = []
+    day_start = utc_day_start(start)
+    while day_start < end:
+        days.append(day_start.date())
+        day_start += timedelta(days=1)
+    return days
+
+
+def split_in_days(
+    start: datetime, end: datetime
+) -> Tuple[List[date], List[Tuple[datetime, datetime]]]:
+    """
+    :return: the whole UTC days inside the range and the parts of the range
+    left out of them
+    """
+    first_day_start = utc_day_start(start)
+    if first_day_start < start:
+        first_day_start += timedelta(days=1)
+    last_day_end = utc_day_start(end)
+    if last_day_end <= first_day_start:
+        return [], [(start, end)]
+
+    days = utc_days(first_day_start, last_day_end)
+    edges = []
+    if start < first_day_start:
+        edges.append((start, first_day_start))
+    if last_day_end < end:
+        edges.append((last_day_end, end))
+    return days, edges
+
+
+def overlap_in_seconds(
+    start: datetime,
+    end: datetime,
+    range_start: datetime,
+    range_end: datetime,
+) -> float:
+    overlap = min(end, range_end) - max(start, range_start)
+    return max(overlap.total_seconds(), 0)
+
+
+def day_rollup(time_entries: Iterable[dict], day: date) -> dict:
+    """
+    Worked time of the finished time entries inside a UTC day, in total and
+    per project and activity
+    """
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    day_end = day_start + timedelta(days=1)
+    rollup = {
+        'day': day.isoformat(),
+        'seconds': 0,
+        'projects': {},
+        'activities': {},
+        'time_entry_ids': [],
     }
+    for time_entry in time_entries:
+        seconds = overlap_in_seconds(
+            str_to_datetime(time_entry['start_date']),
+            str_to_datetime(time_entry['end_date']),
+            day_start,
+            day_end,
+        )
+        if seconds <= 0:
+            continue
+        rollup['seconds'] += seconds
+        for key, attribute in (
+            ('projects', 'project_id'),
+            ('activities', 'activity_id'),
+        ):
+            related_id = time_entry.get(attribute)
+            if related_id:
+                breakdown = rollup[key]
+                breakdown[related_id] = breakdown.get(related_id, 0) + seconds
+        rollup['time_entry_ids'].append(time_entry['id'])
+    return rollup
+
+
+def summary_from_rollups(
+    date_ranges: Dict[str, DateRange],
+    rollup_seconds: Dict[str, float],
+    time_entries: Iterable[dict],
+) -> dict:
+    """
+    Same result as summary, adding up the worked time of the whole UTC days
+    of each range from their rollups.
+    :param rollup_seconds: seconds worked in each day, by ISO date
+    :param time_entries: the running entry and the finished ones with some
+    time in the edges of the ranges, those out of the whole days, or at the
+    start of the ranges
+    """
+    time_entries = list(time_entries)
+    result = {}
+    for key, dr in date_ranges.items():
+        start, end = dr.start(), dr.end()
+        days, edges = split_in_days(start, end)
+        seconds = sum(rollup_seconds.get(day.isoformat(), 0) for day in days)
+        for time_entry in time_entries:
+            te_start = str_to_datetime(time_entry['start_date'])
+            if time_entry.get('end_date') is None:
+                seconds += overlap_in_seconds(te_start, end, start, end)
+                continue
+            te_end = str_to_datetime(time_entry['end_date'])
+            if te_start < start and te_end > end:
+                # Like in summary, the entries that span the whole range are
+                # left out, so the whole days they add to the rollups too
+                seconds -= len(days) * timedelta(days=1).total_seconds()
+                continue
+            seconds += sum(
+                overlap_in_seconds(te_start, te_end, edge_start, edge_end)
+                for edge_start, edge_end in edges
+            )
+        result[key] = WorkedSeconds(seconds).summary()
+    return result